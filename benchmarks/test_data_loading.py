@@ -0,0 +1,69 @@
+import base64
+import pathlib
+
+import pytest
+
+from vision_datasets.commands.benchmark import STORAGES, SyntheticDataset, benchmark_torch_dataset, default_transform, measure_stages, serve_directory
+from vision_datasets.common import DatasetTypes, FileReader, VisionDataset
+
+pytest.importorskip('pytest_benchmark')
+
+N_IMAGES = 64
+DATA_TYPES = [DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS, DatasetTypes.IMAGE_OBJECT_DETECTION, DatasetTypes.KEY_VALUE_PAIR]
+
+
+@pytest.fixture(scope='module', params=[(data_type, storage) for data_type in DATA_TYPES for storage in STORAGES if storage != 'tsv'], ids=lambda x: f'{x[0].name.lower()}-{x[1]}')
+def synthetic(request, tmp_path_factory):
+    data_type, storage = request.param
+    synthetic = SyntheticDataset(data_type, tmp_path_factory.mktemp(f'{data_type.name.lower()}_{storage}'), storage, N_IMAGES)
+    if storage == 'url':
+        with serve_directory(synthetic.root_dir) as url:
+            yield synthetic, url
+    else:
+        yield synthetic, None
+
+
+def test_manifest_load(benchmark, synthetic):
+    synthetic, url = synthetic
+    manifest = benchmark(synthetic.create_manifest, url)
+    assert len(manifest.images) == N_IMAGES
+
+
+def test_vision_dataset(benchmark, synthetic):
+    synthetic, url = synthetic
+    dataset = VisionDataset(synthetic.dataset_info(url), synthetic.create_manifest(url))
+
+    def read_all():
+        for i in range(len(dataset)):
+            dataset[i]
+
+    benchmark.pedantic(read_all, rounds=3)
+    benchmark.extra_info['images_per_round'] = len(dataset)
+
+
+@pytest.mark.parametrize('num_workers', [0, 2])
+def test_torch_dataset(benchmark, synthetic, num_workers):
+    pytest.importorskip('torch')
+    synthetic, url = synthetic
+    dataset = VisionDataset(synthetic.dataset_info(url), synthetic.create_manifest(url))
+    images_per_s = benchmark.pedantic(benchmark_torch_dataset, args=(dataset, num_workers, 16), rounds=3)
+    benchmark.extra_info['images_per_s'] = images_per_s
+
+
+def test_stages(benchmark, synthetic):
+    synthetic, url = synthetic
+    manifest = synthetic.create_manifest(url)
+    file_reader = FileReader()
+
+    def read_bytes(i):
+        with file_reader.open(manifest.images[i].img_path, 'rb') as f:
+            return f.read()
+
+    benchmark.extra_info['stage_ms'] = benchmark.pedantic(measure_stages, args=(read_bytes, N_IMAGES, default_transform), rounds=3)
+    file_reader.close()
+
+
+def test_tsv_stages(benchmark, tmp_path: pathlib.Path):
+    synthetic = SyntheticDataset(DatasetTypes.IMAGE_OBJECT_DETECTION, tmp_path, 'tsv', N_IMAGES)
+    lines = synthetic.tsv_path.read_text(encoding='utf-8').splitlines()
+    benchmark.extra_info['stage_ms'] = benchmark.pedantic(measure_stages, args=(lambda i: base64.b64decode(lines[i].split('\t')[2]), N_IMAGES, default_transform), rounds=3)
@@ -40,6 +40,8 @@ setuptools.setup(name='vision_datasets',
                  extras_require={
                      'torch': ['torch>=1.6.0'],
                      'plot': ['matplotlib'],
+                     'fast_json': ['orjson'],
+                     'benchmark': ['torch>=1.6.0', 'pytest-benchmark'],
                  },
                  entry_points={
                      'console_scripts': ['vision_download=vision_datasets.commands.download_dataset:main',
@@ -48,5 +50,6 @@ setuptools.setup(name='vision_datasets',
                                          'vision_convert_od_to_ic=vision_datasets.commands.converter_od_to_ic:main',
                                          'vision_convert_to_aml_coco=vision_datasets.commands.converter_to_aml_coco:main',
                                          'vision_list_supported_operations=vision_datasets.commands.list_operations_by_data_type:main',
-                                         'vision_convert_to_line_oriented_format=vision_datasets.commands.converter_to_line_oriented_format:main']
+                                         'vision_convert_to_line_oriented_format=vision_datasets.commands.converter_to_line_oriented_format:main',
+                                         'vision_benchmark=vision_datasets.commands.benchmark:main']
                  })
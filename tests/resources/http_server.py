@@ -0,0 +1,138 @@
+import base64
+import functools
+import hashlib
+import http.server
+import io
+import os
+import pathlib
+import threading
+import time
+
+from PIL import Image
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # serves the files of the server, or of its directory, with range requests, see RangeServer
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _content(self, path):
+        if self.server.files is not None:
+            return self.server.files.get(path)
+
+        local_path = pathlib.Path(self.translate_path(path))
+        return local_path.read_bytes() if local_path.is_file() else None
+
+    def _respond(self, send_body):
+        server = self.server
+        path = self.path.split('?')[0]
+        with server.lock:
+            server.requests.append((self.command, self.path, self.headers.get('Range')))
+            server.n_active += 1
+            server.max_active = max(server.max_active, server.n_active)
+        try:
+            content = self._content(path)
+            if content is None:
+                self.send_error(404)
+                return
+
+            etag = f'"{hashlib.md5(content).hexdigest()}"'
+            # the whole file is sent for a range of another version of the file
+            ranged = bool(self.headers.get('Range')) and self.headers.get('If-Range', etag) == etag
+            start, end = 0, len(content)
+            if ranged:
+                first, last = self.headers['Range'][len('bytes='):].split('-')
+                start, end = (max(len(content) - int(last), 0), len(content)) if not first else (int(first), min(int(last) + 1, len(content)) if last else len(content))
+                if start >= len(content):
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{len(content)}')
+                    self.end_headers()
+                    return
+
+            self.send_response(206 if ranged else 200)
+            self.send_header('Content-Length', str(end - start))
+            self.send_header('ETag', etag)
+            if ranged:
+                self.send_header('Content-Range', f'bytes {start}-{end - 1}/{len(content)}')
+            else:
+                self.send_header('Content-MD5', server.content_md5.get(path, base64.b64encode(hashlib.md5(content).digest()).decode()))
+            self.end_headers()
+            if send_body:
+                self._send_body(path, content, start, end)
+        finally:
+            with server.lock:
+                server.n_active -= 1
+
+    def _send_body(self, path, content, start, end):
+        server = self.server
+        time.sleep(server.delay)
+        body = content[start:end]
+        if path in server.interrupt:
+            server.interrupt.remove(path)
+            body = body[:len(body) // 2]
+            self.close_connection = True
+
+        gate_offset, gate = server.gates.get(path, (end, None))
+        split = min(max(gate_offset - start, 0), len(body))
+        self.wfile.write(body[:split])
+        self.wfile.flush()
+        if gate is not None:
+            gate.wait(10)
+        self.wfile.write(body[split:])
+        with server.lock:
+            server.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RangeServer(http.server.ThreadingHTTPServer):
+    """
+    Http server on localhost, serving in a background thread the files of a dict {path: content}, or of a directory, with range requests, conditioned by If-Range on the ETag (the MD5 of
+    the content), for tests of downloads and fetches.
+
+    Requests received are logged as (method, path, range) in requests. The responses can be altered per path, without query: delayed by delay seconds, interrupted once halfway for the
+    paths in interrupt, sent up to an offset then held until an event is set for the paths in gates {path: (offset, event)}, and sent with the Content-MD5 in content_md5.
+    """
+
+    def __init__(self, files: dict = None, directory: str = None):
+        super().__init__(('127.0.0.1', 0), functools.partial(RangeRequestHandler, directory=directory))
+        self.files = files
+        self.requests = []
+        self.lock = threading.Lock()
+        self.n_active = 0
+        self.max_active = 0
+        self.bytes_sent = 0
+        self.delay = 0
+        self.interrupt = set()
+        self.gates = {}
+        self.content_md5 = {}
+        threading.Thread(target=self.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def close(self):
+        for _, gate in self.gates.values():
+            gate.set()
+        self.shutdown()
+        self.server_close()
+
+
+def jpeg_bytes(width=40, height=30) -> bytes:
+    # noise, so that the size of the jpeg is close to the raw size
+    stream = io.BytesIO()
+    Image.frombytes('RGB', (width, height), os.urandom(width * height * 3)).save(stream, 'JPEG')
+    return stream.getvalue()
+
+
+def wait_for(condition, timeout=10):
+    start = time.monotonic()
+    while not condition():
+        if time.monotonic() - start > timeout:
+            raise TimeoutError
+        time.sleep(0.01)
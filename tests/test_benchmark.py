@@ -0,0 +1,35 @@
+import tempfile
+import pathlib
+import unittest
+
+from vision_datasets.commands.benchmark import STAGES, SyntheticDataset, run_benchmark, run_benchmark_in_new_process
+from vision_datasets.common import DatasetTypes
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_synthetic_datasets_are_loadable(self):
+        for data_type in [DatasetTypes.IMAGE_OBJECT_DETECTION, DatasetTypes.IMAGE_MATTING, DatasetTypes.KEY_VALUE_PAIR, DatasetTypes.VISUAL_OBJECT_GROUNDING]:
+            for storage in ['folder', 'zip']:
+                with self.subTest(data_type=data_type, storage=storage), tempfile.TemporaryDirectory() as temp_dir:
+                    synthetic = SyntheticDataset(data_type, pathlib.Path(temp_dir), storage, 4, (32, 24))
+                    manifest = synthetic.create_manifest()
+                    self.assertEqual(len(manifest.images), 4)
+                    self.assertEqual(manifest.images[3].width, 24)
+
+    def test_run_benchmark(self):
+        for storage in ['folder', 'zip', 'url', 'tsv']:
+            with self.subTest(storage=storage), tempfile.TemporaryDirectory() as temp_dir:
+                result = run_benchmark(DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS, storage, 4, pathlib.Path(temp_dir), (32, 24), num_workers=[0])
+                self.assertEqual(list(result['stage_ms']), STAGES)
+                if storage == 'tsv':
+                    self.assertGreater(result['sequential_images_per_s'], 0)
+                else:
+                    self.assertGreater(result['vision_dataset_images_per_s'], 0)
+                    self.assertGreater(result['torch_dataset_images_per_s'][0], 0)
+                    self.assertGreaterEqual(result['manifest_load_s'], 0)
+
+    def test_run_benchmark_in_new_process(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result = run_benchmark_in_new_process(DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS, 'tsv', 4, pathlib.Path(temp_dir), (32, 24))
+            self.assertGreater(result['sequential_images_per_s'], 0)
+            self.assertIn('peak_rss_mb', result)
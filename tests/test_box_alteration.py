@@ -1,6 +1,12 @@
+import pathlib
 import random
+import tempfile
 import unittest
 
+from PIL import Image
+
+from vision_datasets.common import CategoryManifest, DatasetInfo, DatasetManifest, DatasetTypes, ImageDataManifest, VisionDataset
+from vision_datasets.image_object_detection import DetectionAsClassificationByCroppingDataset, ImageObjectDetectionLabelManifest
 from vision_datasets.image_object_detection.detection_as_classification_dataset import BoxAlteration
 
 
@@ -60,3 +66,37 @@ class TestBoxAlteration(unittest.TestCase):
         assert t == 3
         assert r == 19
         assert b == 23
+
+
+class TestCrop(unittest.TestCase):
+    @staticmethod
+    def _image_with_red_square():
+        img = Image.new('RGB', (800, 800), (0, 0, 255))
+        img.paste((255, 0, 0), (400, 400, 600, 600))
+        return img
+
+    def test_crop_reduced_image_with_full_resolution_box(self):
+        reduced = self._image_with_red_square().resize((200, 200))
+        crop = DetectionAsClassificationByCroppingDataset.crop(reduced, 400, 400, 600, 600, img_scale=0.25)
+        self.assertEqual(crop.size, (50, 50))
+        self.assertEqual(crop.getpixel((25, 25)), (255, 0, 0))
+
+    def test_crop_resized_to_output_size(self):
+        crop = DetectionAsClassificationByCroppingDataset.crop(self._image_with_red_square(), 400, 400, 600, 600, output_size=(32, 16))
+        self.assertEqual(crop.size, (32, 16))
+        self.assertEqual(crop.getpixel((16, 8)), (255, 0, 0))
+
+    def test_crop_size_decodes_jpeg_at_reduced_scale(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self._image_with_red_square().save(pathlib.Path(temp_dir) / '1.jpg', quality=95)
+            manifest = DatasetManifest([ImageDataManifest(1, str(pathlib.Path(temp_dir) / '1.jpg'), 800, 800, [ImageObjectDetectionLabelManifest([0, 400, 400, 600, 600])])],
+                                       [CategoryManifest(0, 'red')], DatasetTypes.IMAGE_OBJECT_DETECTION)
+            dataset = VisionDataset(DatasetInfo({'name': 'test', 'type': 'object_detection'}), manifest, 'absolute')
+
+            for crop_size, expected_scale in [((24, 24), 0.125), ((48, 48), 0.25), ((150, 150), 1)]:
+                ic_dataset = DetectionAsClassificationByCroppingDataset(dataset, crop_size=crop_size)
+                crop, labels, _ = ic_dataset[0]
+                self.assertEqual(ic_dataset._load_image(0)[1], expected_scale)
+                self.assertEqual(crop.size, crop_size)
+                self.assertTrue(all(abs(c - e) < 10 for c, e in zip(crop.getpixel((crop_size[0] // 2, crop_size[1] // 2)), (255, 0, 0))))
+                self.assertEqual(labels[0].label_data, 0)
@@ -70,6 +70,17 @@ class TestClassificationAsKeyValuePairDataset(unittest.TestCase):
                                  'classNames': {'value': [{'value': '1-class'}, {'value': '2-class'}]}}
                               })
 
+    def test_cached_schema_is_not_shared(self):
+        sample_classification_dataset, tempdir = MulticlassClassificationTestFixtures.create_an_ic_dataset()
+        with tempdir:
+            kvp_dataset_1 = MulticlassClassificationAsKeyValuePairDataset(sample_classification_dataset)
+            kvp_dataset_1.dataset_info.schema['fieldSchema']['className']['description'] = 'edited'
+            kvp_dataset_1.dataset_manifest.schema.field_schema['className'].description = 'edited'
+
+            kvp_dataset_2 = MulticlassClassificationAsKeyValuePairDataset(sample_classification_dataset)
+            self.assertEqual(kvp_dataset_2.dataset_info.schema['fieldSchema']['className']['description'], 'Class name that the image belongs to.')
+            self.assertEqual(kvp_dataset_2.dataset_manifest.schema.field_schema['className'].description, 'Class name that the image belongs to.')
+
 
 if __name__ == '__main__':
     unittest.main()
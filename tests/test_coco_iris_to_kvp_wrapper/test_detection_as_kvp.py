@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 
 from tests.test_fixtures import DetectionTestFixtures
 from vision_datasets.common.constants import DatasetTypes
@@ -7,6 +8,7 @@ from vision_datasets.image_object_detection import (
     DetectionAsKeyValuePairDatasetForMultilabelClassification,
     DetectionAsKeyValuePairDatasetForObjectCounting,
 )
+from vision_datasets.key_value_pair import LazyKeyValuePairAnnotations, VisionAsKeyValuePairDatasetBase
 from vision_datasets.key_value_pair.manifest import KeyValuePairLabelManifest
 
 
@@ -108,6 +110,39 @@ class TestDetectionAsKeyValuePairDataset(unittest.TestCase):
                 kvp_dataset.dataset_info.schema["description"], "Custom description"
             )
 
+    def test_source_dataset_is_shared_not_modified(self):
+        sample_detection_dataset, tempdir = DetectionTestFixtures.create_an_od_dataset()
+        with tempdir:
+            source_labels = [[box.label_data for box in img.labels] for img in sample_detection_dataset.dataset_manifest.images]
+            kvp_dataset = DetectionAsKeyValuePairDataset(sample_detection_dataset)
+
+            annotations = kvp_dataset.dataset_manifest.annotations
+            self.assertIsInstance(annotations, LazyKeyValuePairAnnotations)
+            self.assertEqual(len(kvp_dataset), len(source_labels))
+            self.assertEqual([x.id for x in annotations], list(range(1, len(source_labels) + 1)))
+            self.assertEqual([x.img_ids for x in annotations], [[i] for i in range(len(source_labels))])
+            self.assertTrue(all(not img.labels for img in kvp_dataset.dataset_manifest.images))
+            self.assertEqual([[box.label_data for box in img.labels] for img in sample_detection_dataset.dataset_manifest.images], source_labels)
+            self.assertEqual(kvp_dataset.img_id_to_pos, {img.id: i for i, img in enumerate(sample_detection_dataset.dataset_manifest.images)})
+
+    def test_schema_is_cached(self):
+        sample_detection_dataset, tempdir = DetectionTestFixtures.create_an_od_dataset()
+        with tempdir:
+            VisionAsKeyValuePairDatasetBase._schema_cache.clear()
+            with mock.patch.object(DetectionAsKeyValuePairDataset, '_create_schema', autospec=True, side_effect=DetectionAsKeyValuePairDataset._create_schema) as create_schema:
+                first = DetectionAsKeyValuePairDataset(sample_detection_dataset)
+                second = DetectionAsKeyValuePairDataset(sample_detection_dataset)
+                self.assertEqual(create_schema.call_count, 1)
+                other = DetectionAsKeyValuePairDataset(sample_detection_dataset, custom_schema_description="Custom description")
+                self.assertEqual(create_schema.call_count, 2)
+
+            self.assertEqual(first.dataset_info.schema, second.dataset_info.schema)
+            self.assertEqual(first.dataset_manifest.schema, second.dataset_manifest.schema)
+            self.assertIsNot(first.dataset_info.schema, second.dataset_info.schema)
+            self.assertIsNot(first.dataset_manifest.schema, second.dataset_manifest.schema)
+            self.assertNotEqual(first.dataset_info.schema, other.dataset_info.schema)
+            self.assertEqual(other.dataset_manifest.schema.description, "Custom description")
+
 
 class TestDetectionAsKeyValuePairDatasetForMultilabelClassification(unittest.TestCase):
     def test_detection_to_kvp(self):
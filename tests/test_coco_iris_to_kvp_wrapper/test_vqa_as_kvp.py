@@ -32,3 +32,14 @@ class TestVQAAsKeyValuePairDataset(unittest.TestCase):
 
             # Last image has 2 questions associated with it
             self.assertEqual(kvp_dataset[-2][0][0].size, kvp_dataset[-1][0][0].size)
+
+    def test_source_dataset_is_not_modified(self):
+        sample_vqa_dataset, tempdir = VQATestFixtures.create_a_vqa_dataset()
+        with tempdir:
+            n_labels = [len(img.labels) for img in sample_vqa_dataset.dataset_manifest.images]
+            kvp_dataset = VQAAsKeyValuePairDataset(sample_vqa_dataset)
+
+            self.assertEqual([len(img.labels) for img in sample_vqa_dataset.dataset_manifest.images], n_labels)
+            self.assertEqual([x.id for x in kvp_dataset.dataset_manifest.annotations], [1, 2, 3])
+            self.assertEqual([x.img_ids for x in kvp_dataset.dataset_manifest.annotations], [[0], [1], [1]])
+            self.assertEqual(kvp_dataset.dataset_manifest.annotations[-1].text, {'question': 'question 3'})
@@ -1,11 +1,24 @@
+import base64
+import gc
+import hashlib
 import io
 import json
+import multiprocessing
 import os
 import pathlib
+import pickle
+import socket
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
+import zipfile
 from unittest.mock import ANY, MagicMock
 
-from vision_datasets.common import DatasetDownloader, DatasetRegistry, DatasetTypes
+from vision_datasets.common import ContentManifest, DatasetDownloader, DatasetHub, DatasetRegistry, DatasetTypes
+from vision_datasets.common.data_reader import DownloadedDatasetsResources
+from .resources.http_server import RangeServer, wait_for
 
 
 class TestDatasetDownloader(unittest.TestCase):
@@ -77,6 +90,7 @@ class TestDatasetDownloader(unittest.TestCase):
         with unittest.mock.patch('requests.get') as mock_get:
             mock_get.return_value.__enter__.return_value.raw = io.BytesIO(b'42')
             mock_get.return_value.__enter__.return_value.status_code = 200
+            mock_get.return_value.__enter__.return_value.headers = {}
             downloader.download()
             mock_get.assert_called_once_with('http://example.com/somewhere/dir/42.txt?sastoken=something', allow_redirects=True, stream=True, timeout=ANY)
 
@@ -89,5 +103,302 @@ class TestDatasetDownloader(unittest.TestCase):
         return DatasetRegistry(json.dumps(datasets))
 
 
+class _ServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = RangeServer({f'/data/{i}.bin': os.urandom(1000 + i) for i in range(6)})
+        self.base_url = f'{self.server.url}/data?sig=token'
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.target_dir = pathlib.Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.server.close()
+        self.temp_dir.cleanup()
+
+
+class TestParallelResumableDownload(_ServerTestCase):
+    def _downloader(self, **kwargs):
+        info = DatasetRegistry(json.dumps([{'name': 'd', 'type': DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS.name, 'root_folder': '', 'version': 1,
+                                            'train': {'index_path': '0.bin', 'files_for_local_usage': [f'{i}.bin' for i in range(1, 6)]}}])).get_dataset_info('d')
+        return DatasetDownloader(self.base_url, info, **kwargs)
+
+    def _assert_downloaded(self):
+        for path, content in self.server.files.items():
+            self.assertEqual((self.target_dir / pathlib.Path(path).name).read_bytes(), content)
+        self.assertEqual(list(self.target_dir.glob('*.part')), [])
+
+    def test_parallel_download_with_host_limit(self):
+        self.server.delay = 0.05
+        downloader = self._downloader(num_workers=6, max_connections_per_host=2)
+        downloader.download(self.target_dir)
+
+        self._assert_downloaded()
+        self.assertLessEqual(self.server.max_active, 2)
+        self.assertEqual(downloader.last_download_stats.n_downloaded, 6)
+        self.assertEqual(downloader.last_download_stats.n_bytes, sum(len(x) for x in self.server.files.values()))
+        sidecar = json.loads((self.target_dir / '3.bin.download.json').read_text())
+        self.assertEqual(sidecar['size'], 1003)
+        self.assertEqual(sidecar['md5'], hashlib.md5(self.server.files['/data/3.bin']).hexdigest())
+
+    def test_interrupted_download_is_resumed(self):
+        self.server.interrupt.add('/data/2.bin')
+        self._downloader().download(self.target_dir)
+
+        self._assert_downloaded()
+        ranges = [r for _, path, r in self.server.requests if path.startswith('/data/2.bin')]
+        self.assertEqual(ranges, [None, 'bytes=501-'])
+
+    def test_partial_file_is_resumed(self):
+        (self.target_dir / '1.bin.part').write_bytes(self.server.files['/data/1.bin'][:300])
+        (self.target_dir / '1.bin.part.download.json').write_text(json.dumps({'validator': f'"{hashlib.md5(self.server.files["/data/1.bin"]).hexdigest()}"'}))
+        self._downloader().download(self.target_dir)
+
+        self._assert_downloaded()
+        self.assertIn(('GET', '/data/1.bin?sig=token', 'bytes=300-'), self.server.requests)
+        self.assertFalse((self.target_dir / '1.bin.part.download.json').exists())
+
+    def test_partial_file_of_changed_remote_file_is_not_resumed(self):
+        part = os.urandom(300)
+        (self.target_dir / '1.bin.part').write_bytes(part)
+        (self.target_dir / '1.bin.part.download.json').write_text(json.dumps({'validator': f'"{hashlib.md5(part).hexdigest()}"'}))
+        # without validator, the remote file the part is from is unknown
+        (self.target_dir / '2.bin.part').write_bytes(os.urandom(300))
+        self._downloader().download(self.target_dir)
+
+        self._assert_downloaded()
+        self.assertIn(('GET', '/data/1.bin?sig=token', 'bytes=300-'), self.server.requests)
+        self.assertIn(('GET', '/data/2.bin?sig=token', None), self.server.requests)
+
+    def test_files_are_reused_if_valid(self):
+        self._downloader().download(self.target_dir)
+        self.server.requests.clear()
+        downloader = self._downloader(verify_checksums=True)
+        downloader.download(self.target_dir)
+
+        self.assertEqual(self.server.requests, [])
+        self.assertEqual(downloader.last_download_stats.n_downloaded, 0)
+
+    def test_truncated_files_are_downloaded_again(self):
+        self._downloader().download(self.target_dir)
+        # truncated file with a sidecar, and one without sidecar, e.g., from an older version
+        with open(self.target_dir / '4.bin', 'r+b') as f:
+            f.truncate(10)
+        (self.target_dir / '5.bin').write_bytes(b'12')
+        (self.target_dir / '5.bin.download.json').unlink()
+        self.server.requests.clear()
+        downloader = self._downloader()
+        downloader.download(self.target_dir)
+
+        self._assert_downloaded()
+        self.assertEqual(downloader.last_download_stats.n_downloaded, 2)
+        self.assertEqual(sorted((method, path) for method, path, _ in self.server.requests),
+                         [('GET', '/data/4.bin?sig=token'), ('GET', '/data/5.bin?sig=token'), ('HEAD', '/data/5.bin?sig=token')])
+
+    def test_checksum_mismatch_fails(self):
+        self.server.content_md5['/data/0.bin'] = base64.b64encode(hashlib.md5(b'other').digest()).decode()
+        with self.assertRaises(IOError):
+            self._downloader().download(self.target_dir)
+
+        self.assertFalse((self.target_dir / '0.bin').exists())
+
+
+def _download_in_process(base_url, target_dir):
+    TestSharedDownload._downloader(base_url).download(target_dir)
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+class TestSharedDownload(_ServerTestCase):
+    @staticmethod
+    def _downloader(base_url, **kwargs):
+        info = DatasetRegistry(json.dumps([{'name': 'd', 'type': DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS.name, 'root_folder': '', 'version': 1,
+                                            'train': {'index_path': '0.bin', 'files_for_local_usage': [f'{i}.bin' for i in range(1, 6)]}}])).get_dataset_info('d')
+        return DatasetDownloader(base_url, info, **kwargs)
+
+    def _assert_downloaded(self):
+        for path, content in self.server.files.items():
+            self.assertEqual((self.target_dir / pathlib.Path(path).name).read_bytes(), content)
+        self.assertEqual(list(self.target_dir.glob('*.lock')), [])
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'fork start method')
+    def test_processes_download_each_file_once(self):
+        self.server.delay = 0.05
+        processes = [multiprocessing.get_context('fork').Process(target=_download_in_process, args=(self.base_url, self.target_dir)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertEqual([process.exitcode for process in processes], [0] * 3)
+        self._assert_downloaded()
+        self.assertEqual(sorted(path for method, path, _ in self.server.requests if method == 'GET'), sorted(f'{path}?sig=token' for path in self.server.files))
+
+    def test_lock_of_dead_process_is_broken(self):
+        (self.target_dir / '0.bin.lock').write_text(json.dumps({'host': socket.gethostname(), 'pid': _dead_pid(), 'token': 'x'}))
+        self._downloader(self.base_url, lock_timeout=30).download(self.target_dir)
+
+        self._assert_downloaded()
+
+    def test_lock_without_heartbeat_is_broken(self):
+        (self.target_dir / '0.bin.lock').write_text(json.dumps({'host': 'other-node', 'pid': 1, 'token': 'x'}))
+        with self.assertRaises(TimeoutError):
+            self._downloader(self.base_url, lock_timeout=0.3).download(self.target_dir)
+        self.assertFalse((self.target_dir / '0.bin').exists())
+
+        self._downloader(self.base_url, stale_lock_seconds=0.3).download(self.target_dir)
+        self._assert_downloaded()
+
+    def test_empty_lock_is_broken(self):
+        # e.g., left by a process crashing before writing its lock
+        (self.target_dir / '0.bin.lock').touch()
+        with self.assertRaises(TimeoutError):
+            self._downloader(self.base_url, lock_timeout=0.3).download(self.target_dir)
+
+        self._downloader(self.base_url, stale_lock_seconds=0.3).download(self.target_dir)
+        self._assert_downloaded()
+
+    def test_shared_directory_is_removed_by_last_user(self):
+        r1 = DownloadedDatasetsResources([self.target_dir])
+        r2 = DownloadedDatasetsResources.merge(DownloadedDatasetsResources([self.target_dir]), DownloadedDatasetsResources([self.target_dir]))
+        # reference left by a crashed process
+        (self.target_dir / '.vision_datasets_references' / 'crashed').write_text(json.dumps({'host': socket.gethostname(), 'pid': _dead_pid()}))
+
+        with r1:
+            pass
+        self.assertTrue(self.target_dir.is_dir())
+        with r2:
+            pass
+        self.assertFalse(self.target_dir.is_dir())
+
+    def test_references_are_released_without_exit(self):
+        references_dir = self.target_dir / '.vision_datasets_references'
+        resources = DownloadedDatasetsResources([self.target_dir])
+        copy = pickle.loads(pickle.dumps(resources))
+        self.assertEqual(len(list(references_dir.iterdir())), 1)
+
+        with copy:
+            pass
+        self.assertTrue(self.target_dir.is_dir())
+        del resources
+        gc.collect()
+        self.assertEqual(list(references_dir.iterdir()), [])
+
+    def test_references_without_heartbeat_are_ignored(self):
+        references_dir = self.target_dir / '.vision_datasets_references'
+        references_dir.mkdir()
+        # reference of a process of another node, crashed long ago
+        (references_dir / 'crashed').write_text(json.dumps({'host': 'other-node', 'pid': 1}))
+        os.utime(references_dir / 'crashed', (time.time() - 1000, time.time() - 1000))
+        (references_dir / 'alive').write_text(json.dumps({'host': 'other-node', 'pid': 1}))
+
+        with DownloadedDatasetsResources([self.target_dir], stale_seconds=100):
+            pass
+        self.assertEqual([reference.name for reference in references_dir.iterdir()], ['alive'])
+
+        os.remove(references_dir / 'alive')
+        with DownloadedDatasetsResources([self.target_dir], stale_seconds=100):
+            pass
+        self.assertFalse(self.target_dir.is_dir())
+
+    def test_references_are_touched(self):
+        with DownloadedDatasetsResources([self.target_dir], stale_seconds=0.2) as resources:
+            reference = next(iter(resources._references.values()))
+            os.utime(reference, (0, 0))
+            wait_for(lambda: os.stat(reference).st_mtime > 0)
+
+
+def _zip_bytes(members: dict) -> bytes:
+    stream = io.BytesIO()
+    with zipfile.ZipFile(stream, 'w') as z:
+        for name, content in members.items():
+            z.writestr(zipfile.ZipInfo(name, (2024, 1, 1, 0, 0, 0)), content, compress_type=zipfile.ZIP_DEFLATED if name.endswith('.txt') else zipfile.ZIP_STORED)
+    return stream.getvalue()
+
+
+class TestIncrementalSync(_ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        members = {f'{i}.bin': os.urandom(20000) for i in range(10)}
+        members['notes.txt'] = b'notes ' * 1000
+        members_v2 = {name: content for name, content in members.items() if name != '0.bin'}
+        members_v2['3.bin'] = os.urandom(20000)
+        members_v2['10.bin'] = os.urandom(20000)
+        labels = b'a\nb\n'
+        versions = {'v1': {'images.zip': _zip_bytes(members), 'labels.txt': labels, 'train.txt': b'images.zip@1.bin 0\n'},
+                    'v2': {'images.zip': _zip_bytes(members_v2), 'labels.txt': labels, 'train.txt': b'images.zip@1.bin 1\n'}}
+
+        self.server.files = {}
+        for version, files in versions.items():
+            remote_dir = self.target_dir / 'remote' / version
+            remote_dir.mkdir(parents=True)
+            for name, content in files.items():
+                (remote_dir / name).write_bytes(content)
+            ContentManifest.from_dir(remote_dir).save(remote_dir / 'content_manifest.json')
+            self.server.files.update({f'/data/{version}/{p.name}': p.read_bytes() for p in remote_dir.iterdir()})
+
+        self.registry = json.dumps([{'name': 'd', 'version': i + 1, 'type': DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS.name, 'root_folder': version, 'labelmap': 'labels.txt',
+                                     'content_manifest': 'content_manifest.json', 'train': {'index_path': 'train.txt', 'files_for_local_usage': ['images.zip']}}
+                                    for i, version in enumerate(['v1', 'v2'])])
+        self.local_dir = self.target_dir / 'local'
+
+    def _info(self, version):
+        return DatasetRegistry(self.registry).get_dataset_info('d', version)
+
+    def _assert_synced(self, version):
+        for name in ['images.zip', 'labels.txt', 'train.txt']:
+            self.assertEqual((self.local_dir / version / name).read_bytes(), self.server.files[f'/data/{version}/{name}'])
+
+    def _requests_of(self, path):
+        return [(method, r) for method, p, r in self.server.requests if p.split('?')[0] == path]
+
+    def test_sync_from_previous_version(self):
+        DatasetDownloader(self.base_url, self._info(1)).download(self.local_dir)
+        self.server.requests.clear()
+        downloader = DatasetDownloader(self.base_url, self._info(2))
+        downloader.sync(self.local_dir, base_dataset_info=self._info(1))
+
+        self._assert_synced('v2')
+        self.assertEqual(self._requests_of('/data/v2/labels.txt'), [])
+        self.assertEqual(len(self._requests_of('/data/v2/train.txt')), 1)
+        # central directory, then the members changed
+        self.assertTrue(all(r is not None for _, r in self._requests_of('/data/v2/images.zip')))
+        self.assertLess(downloader.last_download_stats.n_bytes, len(self.server.files['/data/v2/images.zip']) / 2)
+
+    def test_sync_in_place(self):
+        (self.local_dir / 'v2').mkdir(parents=True)
+        (self.local_dir / 'v2' / 'images.zip').write_bytes(self.server.files['/data/v1/images.zip'])
+        (self.local_dir / 'v2' / 'labels.txt').write_bytes(self.server.files['/data/v2/labels.txt'])
+        (self.local_dir / 'v2' / 'train.txt').write_bytes(b'outdated')
+        DatasetDownloader(self.base_url, self._info(2)).sync(self.local_dir)
+
+        self._assert_synced('v2')
+        self.assertEqual(self._requests_of('/data/v2/labels.txt'), [])
+        self.assertEqual(sorted(p.name for p in (self.local_dir / 'v2').iterdir() if not p.name.endswith('.download.json')), ['images.zip', 'labels.txt', 'train.txt'])
+
+    def test_content_manifest_diff(self):
+        v1 = ContentManifest.from_dir(self.target_dir / 'remote' / 'v1')
+        v2 = ContentManifest.from_json(self.server.files['/data/v2/content_manifest.json'].decode())
+        self.assertEqual(sorted(v2.diff(v1)), ['images.zip', 'train.txt'])
+        self.assertEqual(sorted(v2.get('images.zip')['members']), sorted(['notes.txt'] + [f'{i}.bin' for i in range(1, 11)]))
+
+    def test_sync_without_content_manifest(self):
+        info = DatasetRegistry(self.registry.replace('"content_manifest": "content_manifest.json", ', '')).get_dataset_info('d', 2)
+        with self.assertRaises(ValueError):
+            DatasetDownloader(self.base_url, info).sync(self.local_dir)
+
+    def test_hub_syncs_from_previous_version(self):
+        hub = DatasetHub(self.registry, self.base_url, str(self.local_dir))
+        hub.create_dataset_manifest('d', 1)
+        self.server.requests.clear()
+        manifest, _, _ = hub.create_dataset_manifest('d', 2)
+
+        self._assert_synced('v2')
+        self.assertEqual(self._requests_of('/data/v2/labels.txt'), [])
+        self.assertEqual(manifest.images[0].labels[0].label_data, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -293,6 +293,34 @@ class TestCases:
         return _coco_dict_to_manifest(TestCases.manifest_dict_by_data_type[data_type][index], data_type)
 
 
+class TestGenerateMultitaskDatasetManifest(unittest.TestCase):
+    def test_join_on_image_id(self):
+        ic_manifest = TestCases.get_manifest(DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS, 0)
+        od_manifest = TestCases.get_manifest(DatasetTypes.IMAGE_OBJECT_DETECTION, 0)
+        od_manifest.images = od_manifest.images[1:]
+        manifest = generate_multitask_dataset_manifest({'ic': ic_manifest, 'od': od_manifest})
+
+        assert manifest.data_type == {'ic': DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS, 'od': DatasetTypes.IMAGE_OBJECT_DETECTION}
+        assert [x.id for x in manifest.images] == [1, 2]
+        assert list(manifest.images[0].labels.keys()) == ['ic']
+        assert manifest.images[1].labels['ic'] is ic_manifest.images[1].labels
+        assert manifest.images[1].labels['od'] is od_manifest.images[0].labels
+
+    def test_join_on_image_path(self):
+        ic_manifest = TestCases.get_manifest(DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS, 0)
+        ic_manifest_2 = TestCases.get_manifest(DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS, 0)
+        for image in ic_manifest_2.images:
+            image.id += 10
+        ic_manifest_2.images[1].img_path = 'train/4.jpg'
+
+        manifest = generate_multitask_dataset_manifest({'task1': ic_manifest, 'task2': ic_manifest_2}, join_key='img_path')
+        assert [x.img_path for x in manifest.images] == ['train/1.jpg', 'train/3.jpg', 'train/4.jpg']
+        assert [list(x.labels.keys()) for x in manifest.images] == [['task1', 'task2'], ['task1'], ['task2']]
+
+        with self.assertRaises(ValueError):
+            generate_multitask_dataset_manifest({'task1': ic_manifest}, join_key='width')
+
+
 class TestManifestRemoveImagesWithNoLabel(unittest.TestCase):
     def test_detection(self):
         num_classes = 10
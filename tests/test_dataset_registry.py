@@ -1,4 +1,6 @@
 import json
+import pathlib
+import tempfile
 import unittest
 
 from vision_datasets.common import DatasetRegistry, DatasetTypes, Usages
@@ -99,3 +101,43 @@ class TestDatasetRegistry(unittest.TestCase):
         assert info.index_files[Usages.TEST] == self.DUMMY_DATA_KEY_VALUE_PAIR['test']['index_path']
         # schema is required
         assert info.schema == self.DUMMY_DATA_KEY_VALUE_PAIR['schema']
+
+    def test_get_latest_or_specified_version(self):
+        dn = self.DUMMY_DATA_1['name']
+        versions = [{**self.DUMMY_DATA_1, 'version': v, 'root_folder': f'dummy{v}'} for v in [2, 5, 1]]
+        dr = DatasetRegistry(json.dumps(versions))
+        assert dr.get_dataset_info(dn).version == 5
+        assert dr.get_dataset_info(dn, 2).root_folder == 'dummy2'
+        assert dr.get_dataset_info(dn, 3) is None
+        assert dr.get_dataset_info('not_exist') is None
+
+    def test_dataset_info_parsed_on_first_access(self):
+        invalid_data = {**self.DUMMY_DATA_KEY_VALUE_PAIR, 'name': 'invalid'}
+        del invalid_data['schema']
+        dr = DatasetRegistry(json.dumps([self.DUMMY_DATA_1, invalid_data]))
+        assert dr.get_dataset_info(self.DUMMY_DATA_1['name'])
+        with self.assertRaises(ValueError):
+            dr.get_dataset_info('invalid')
+
+    def test_returned_dataset_info_is_independent_copy(self):
+        dn = self.DUMMY_DATA_1['name']
+        dr = DatasetRegistry(json.dumps([self.DUMMY_DATA_1]))
+        info = dr.get_dataset_info(dn)
+        info.index_files = {}
+        info.files_for_local_usage[Usages.TEST].append('Test.zip')
+        info.type = DatasetTypes.IMAGE_OBJECT_DETECTION
+
+        info = dr.get_dataset_info(dn)
+        assert info.index_files[Usages.TEST] == self.DUMMY_DATA_1['test']['index_path']
+        assert info.files_for_local_usage[Usages.TEST] == self.DUMMY_DATA_1['test']['files_for_local_usage']
+        assert info.type == DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS
+
+    def test_create_dataset_reg_from_json_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [pathlib.Path(temp_dir) / f'{i}.json' for i in range(2)]
+            paths[0].write_text(json.dumps([self.DUMMY_DATA_1]))
+            paths[1].write_text(json.dumps([self.DUMMY_DATA_2]))
+            dr = DatasetRegistry.from_json_files(paths)
+        assert len(dr.list_data_version_and_types()) == 2
+        assert dr.get_dataset_info(self.DUMMY_DATA_1['name'])
+        assert dr.get_dataset_info(self.DUMMY_DATA_2['name'])
@@ -1,4 +1,11 @@
+import json
+import os
+import pathlib
 import unittest
+import unittest.mock
+import zipfile
+
+from PIL import Image
 
 from tests.test_fixtures import DetectionTestFixtures
 from vision_datasets.common import DatasetInfo, DatasetTypes, VisionDataset
@@ -51,6 +58,59 @@ class TestDetectionAsClassification(unittest.TestCase):
             assert img_4[0].size == (100, 50)
             assert img_4[1] == [ImageClassificationLabelManifest(3)]
 
+    def test_od_as_ic_dataset_by_crop_decodes_each_image_once(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset(3)
+        with tempdir:
+            ic_dataset = DetectionAsClassificationByCroppingDataset(dataset, {'zoom_ratio_bounds': (0.5, 1.5), 'rnd_seed': 1})
+            with unittest.mock.patch.object(VisionDataset, '_get_single_item', autospec=True, side_effect=VisionDataset._get_single_item) as get_item:
+                manifest = ic_dataset.generate_manifest(dir=f'{tempdir.name}/crops', n_copies=2)
+                self.assertEqual(get_item.call_count, 3)
+
+                crops = list(ic_dataset.iter_crops_by_image(n_copies=2))
+                self.assertEqual(get_item.call_count, 6)
+
+            self.assertEqual(len(manifest.images), 12)
+            self.assertEqual([int(index) for _, _, index in crops], [0, 6, 1, 7, 2, 8, 3, 9, 4, 10, 5, 11])
+            for crop, labels, index in crops:
+                image = manifest.images[int(index)]
+                self.assertEqual(crop.size, (image.width, image.height))
+                self.assertEqual([x.label_data for x in labels], [x.label_data for x in image.labels])
+
+    def test_od_as_ic_dataset_by_crop_in_processes(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset(3)
+        with tempdir:
+            ic_dataset = DetectionAsClassificationByCroppingDataset(dataset, {'zoom_ratio_bounds': (0.5, 1.5), 'shift_relative_bounds': (-0.3, 0.3), 'rnd_seed': 1})
+            manifest = ic_dataset.generate_manifest(dir=f'{tempdir.name}/serial', n_copies=2)
+            parallel_manifest = ic_dataset.generate_manifest(dir=f'{tempdir.name}/parallel', n_copies=2, num_workers=2)
+
+            self.assertEqual([(x.width, x.height) for x in manifest.images], [(x.width, x.height) for x in parallel_manifest.images])
+            self.assertEqual([x.labels[0].label_data for x in manifest.images], [x.labels[0].label_data for x in parallel_manifest.images])
+            self.assertNotEqual([(x.width, x.height) for x in manifest.images[:6]], [(x.width, x.height) for x in manifest.images[6:]])
+
+    def test_od_as_ic_dataset_by_crop_differs_by_access(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset(3)
+        with tempdir:
+            ic_dataset = DetectionAsClassificationByCroppingDataset(dataset, {'zoom_ratio_bounds': (0.5, 1.5), 'shift_relative_bounds': (-0.3, 0.3), 'rnd_seed': 1})
+            self.assertNotEqual(len({ic_dataset[0][0].size for _ in range(4)}), 1)
+
+            cache = LocalFolderCacheDecorator(ic_dataset, {'dir': f'{tempdir.name}/cache', 'n_copies': 2})
+            n_boxes = len(ic_dataset)
+            self.assertNotEqual([cache[i][0].size for i in range(n_boxes)], [cache[i][0].size for i in range(n_boxes, 2 * n_boxes)])
+
+    def test_od_as_ic_dataset_by_crop_differs_by_epoch(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset(3)
+        with tempdir:
+            ic_dataset = DetectionAsClassificationByCroppingDataset(dataset, {'zoom_ratio_bounds': (0.5, 1.5), 'shift_relative_bounds': (-0.3, 0.3), 'rnd_seed': 1})
+            ic_dataset.set_epoch(0)
+            epoch_0 = [ic_dataset[i][0].size for i in range(len(ic_dataset))]
+            # e.g., fresh DataLoader workers of the same epoch
+            self.assertEqual([ic_dataset[i][0].size for i in range(len(ic_dataset))], epoch_0)
+
+            ic_dataset.set_epoch(1)
+            self.assertNotEqual([ic_dataset[i][0].size for i in range(len(ic_dataset))], epoch_0)
+            ic_dataset.set_epoch(0)
+            self.assertEqual([ic_dataset[i][0].size for i in range(len(ic_dataset))], epoch_0)
+
     def test_od_as_ic_dataset_by_ignore_box(self):
         dataset, tempdir = DetectionTestFixtures.create_an_od_dataset()
         with tempdir:
@@ -86,3 +146,120 @@ class TestLocalFolderCacheDecorator(unittest.TestCase):
             assert cached_dataset.dataset_info.type == data_type
             manifest = cached_dataset.generate_manifest()
             assert manifest.data_type == data_type
+
+    def test_generate_manifest_in_processes_keeps_order(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset(4)
+        with tempdir:
+            ic_dataset = DetectionAsClassificationByCroppingDataset(dataset)
+            manifest = LocalFolderCacheDecorator(ic_dataset, {'dir': f'{tempdir.name}/serial'}).generate_manifest()
+            parallel_manifest = LocalFolderCacheDecorator(ic_dataset, {'dir': f'{tempdir.name}/parallel', 'num_workers': 2}).generate_manifest()
+
+            self.assertEqual(len(parallel_manifest.images), 8)
+            for image, parallel_image in zip(manifest.images, parallel_manifest.images):
+                self.assertEqual(image.id, parallel_image.id)
+                self.assertEqual((image.width, image.height), (parallel_image.width, parallel_image.height))
+                self.assertEqual([x.label_data for x in image.labels], [x.label_data for x in parallel_image.labels])
+                self.assertEqual(pathlib.Path(image.img_path).name, pathlib.Path(parallel_image.img_path).name)
+
+    def test_resume_reuses_cached_samples(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset()
+        with tempdir:
+            ic_dataset = DetectionAsClassificationByCroppingDataset(dataset)
+            cache_dir = f'{tempdir.name}/cache'
+            LocalFolderCacheDecorator(ic_dataset, {'dir': cache_dir})[1]
+
+            with unittest.mock.patch.object(DetectionAsClassificationByCroppingDataset, '_get_single_item', wraps=ic_dataset._get_single_item) as get_item:
+                resumed = LocalFolderCacheDecorator(ic_dataset, {'dir': cache_dir, 'resume': True})
+                img, labels, _ = resumed[1]
+                self.assertEqual(get_item.call_count, 0)
+                self.assertEqual(img.size, (40, 90))
+                self.assertEqual([x.label_data for x in labels], [1])
+
+                manifest = resumed.generate_manifest()
+                self.assertEqual(get_item.call_count, 3)
+                self.assertEqual([(x.width, x.height) for x in manifest.images], [(100, 100), (40, 90), (30, 30), (100, 50)])
+
+                LocalFolderCacheDecorator(ic_dataset, {'dir': cache_dir})[1]
+                self.assertEqual(get_item.call_count, 4)
+
+    def test_cache_shared_by_instances_on_same_dir(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset()
+        with tempdir:
+            ic_dataset = DetectionAsClassificationByCroppingDataset(dataset)
+            cache_dir = f'{tempdir.name}/cache'
+            writer = LocalFolderCacheDecorator(ic_dataset, {'dir': cache_dir})
+            reader = LocalFolderCacheDecorator(ic_dataset, {'dir': cache_dir, 'resume': True})
+            writer[2]
+            self.assertIsNotNone(reader._get_entry(2))
+            self.assertIsNone(reader._get_entry(3))
+            self.assertEqual([x.name for x in pathlib.Path(cache_dir).iterdir() if x.is_file()], ['2.JPEG'])
+
+    def test_index_of_other_params_is_not_reused(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset()
+        with tempdir:
+            ic_dataset = DetectionAsClassificationByCroppingDataset(dataset)
+            cache_dir = f'{tempdir.name}/cache'
+            LocalFolderCacheDecorator(ic_dataset, {'dir': cache_dir})[1]
+            self.assertIsNotNone(LocalFolderCacheDecorator(ic_dataset, {'dir': cache_dir, 'resume': True})._get_entry(1))
+
+            self.assertIsNone(LocalFolderCacheDecorator(ic_dataset, {'dir': cache_dir, 'n_copies': 2, 'resume': True})._get_entry(1))
+            self.assertIsNone(LocalFolderCacheDecorator(ic_dataset, {'dir': cache_dir, 'resume': True})._get_entry(1))
+
+    def test_index_in_use_by_other_process_is_not_cleared(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset()
+        with tempdir:
+            ic_dataset = DetectionAsClassificationByCroppingDataset(dataset)
+            cache_dir = pathlib.Path(tempdir.name) / 'cache'
+            LocalFolderCacheDecorator(ic_dataset, {'dir': str(cache_dir)})[1]
+            info_path = cache_dir / '.cache_index' / 'index.json'
+            info = json.loads(info_path.read_text())
+
+            # e.g., another rank of the same run
+            info_path.write_text(json.dumps({**info, 'creator': {'host': 'other-node', 'pid': 1}}))
+            self.assertIsNotNone(LocalFolderCacheDecorator(ic_dataset, {'dir': str(cache_dir)})._get_entry(1))
+
+            # a previous run, by this process
+            info_path.write_text(json.dumps(info))
+            self.assertIsNone(LocalFolderCacheDecorator(ic_dataset, {'dir': str(cache_dir)})._get_entry(1))
+
+    def test_invalid_num_workers(self):
+        with self.assertRaises(ValueError):
+            LocalFolderCacheDecorator(TestLocalFolderCacheDecorator.TestDataset(DatasetInfo({'type': 'object_detection', 'name': 'test'})), {'dir': './', 'num_workers': 0})
+
+    def test_unmodified_images_cached_as_source_bytes(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset()
+        with tempdir:
+            cached = LocalFolderCacheDecorator(dataset, {'dir': f'{tempdir.name}/cache'})
+            manifest = cached.generate_manifest()
+            for image, source_image in zip(manifest.images, dataset.dataset_manifest.images):
+                self.assertEqual(pathlib.Path(image.img_path).read_bytes(), pathlib.Path(source_image.img_path).read_bytes())
+                self.assertEqual(os.stat(image.img_path).st_ino, os.stat(source_image.img_path).st_ino)
+
+            with zipfile.ZipFile(f'{tempdir.name}/images.zip', 'w') as zf:
+                for source_image in dataset.dataset_manifest.images:
+                    zf.write(source_image.img_path, pathlib.Path(source_image.img_path).name)
+                    source_image.img_path = f'{tempdir.name}/images.zip@{pathlib.Path(source_image.img_path).name}'
+            manifest = LocalFolderCacheDecorator(DetectionAsClassificationIgnoreBoxesDataset(dataset), {'dir': f'{tempdir.name}/zip_cache'}).generate_manifest()
+            self.assertEqual(pathlib.Path(manifest.images[0].img_path).read_bytes(), pathlib.Path(f'{tempdir.name}/1.jpg').read_bytes())
+
+    def test_modified_images_reencoded(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset()
+        with tempdir:
+            rotated_path = pathlib.Path(tempdir.name) / '1.jpg'
+            exif = Image.Exif()
+            exif[0x0112] = 6
+            Image.new('RGB', (100, 60)).save(rotated_path, exif=exif)
+            dataset.dataset_manifest.images[0].width, dataset.dataset_manifest.images[0].height = 60, 100
+
+            manifest = LocalFolderCacheDecorator(dataset, {'dir': f'{tempdir.name}/cache'}).generate_manifest()
+            self.assertNotEqual(pathlib.Path(manifest.images[0].img_path).read_bytes(), rotated_path.read_bytes())
+            self.assertEqual(Image.open(manifest.images[0].img_path).size, (60, 100))
+
+            crop_manifest = LocalFolderCacheDecorator(DetectionAsClassificationByCroppingDataset(dataset), {'dir': f'{tempdir.name}/crop_cache'}).generate_manifest()
+            self.assertEqual(Image.open(crop_manifest.images[3].img_path).size, (100, 50))
+
+    def test_passthrough_disabled(self):
+        dataset, tempdir = DetectionTestFixtures.create_an_od_dataset()
+        with tempdir:
+            manifest = LocalFolderCacheDecorator(dataset, {'dir': f'{tempdir.name}/cache', 'passthrough': False}).generate_manifest()
+            self.assertNotEqual(os.stat(manifest.images[0].img_path).st_ino, os.stat(dataset.dataset_manifest.images[0].img_path).st_ino)
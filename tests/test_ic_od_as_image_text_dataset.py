@@ -1,8 +1,10 @@
 import unittest
 
+import numpy as np
+
 from tests.test_fixtures import DetectionTestFixtures
 from vision_datasets.common.constants import DatasetTypes
-from vision_datasets.image_text_matching import VisionAsImageTextDataset
+from vision_datasets.image_text_matching import NegativeSampler, VisionAsImageTextDataset
 from vision_datasets.image_object_detection import DetectionAsClassificationIgnoreBoxesDataset
 
 
@@ -40,7 +42,7 @@ class TestVisionAsImageTextDataset(unittest.TestCase):
             assert len(it_dataset) == n_images, len(it_dataset)
             matches = [label.label_data[1] for x, labels, _ in it_dataset for label in labels]
             assert sum(matches) == 20, matches
-            assert len(matches) == 27, matches
+            assert len(matches) == 28, matches
 
     def test_od_as_image_text_dataset_with_neg_pairs_under_expected_ratio(self):
         n_images = 3
@@ -67,4 +69,40 @@ class TestClassificationAsImageTextDataset(unittest.TestCase):
             assert len(it_dataset) == n_images, len(it_dataset)
             matches = [label.label_data[1] for x, labels, _ in it_dataset for label in labels]
             assert sum(matches) == 20, matches
-            assert len(matches) == 27, matches
+            assert len(matches) == 28, matches
+
+
+class TestNegativeSampler(unittest.TestCase):
+    def test_negatives_exclude_positives_and_are_deterministic(self):
+        sampler = NegativeSampler(100, 2, rnd_seed=1)
+        for index in range(20):
+            negatives = sampler.sample(index, [3, 7, 7])
+            assert len(negatives) in (4, 5), negatives
+            assert not {3, 7} & set(negatives.tolist()), negatives
+            assert negatives.tolist() == sorted(set(negatives.tolist()))
+            np.testing.assert_array_equal(negatives, NegativeSampler(100, 2, rnd_seed=1).sample(index, [7, 3]))
+
+    def test_all_negatives_when_not_enough(self):
+        sampler = NegativeSampler(5, 3)
+        assert sampler.sample(0, [1, 3]).tolist() == [0, 2, 4]
+        assert sampler.sample(0, [0, 1, 2, 3, 4]).tolist() == []
+        assert NegativeSampler(5, 0).sample(0, [1]).tolist() == []
+
+    def test_fractional_ratio_is_rounded_stochastically(self):
+        sampler = NegativeSampler(1000, 0.25)
+        counts = [len(sampler.sample(index, [0, 1])) for index in range(400)]
+        assert set(counts) == {0, 1}, set(counts)
+        assert 150 < sum(counts) < 250, sum(counts)
+
+    def test_hard_negatives(self):
+        sampler = NegativeSampler(20000, 10, hard_negatives={0: [1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 5: [0, 11]}, hard_negative_ratio=0.5)
+        for index in range(10):
+            negatives = set(sampler.sample(index, [0, 5]).tolist())
+            assert len(negatives) == 20 and not {0, 5} & negatives, negatives
+            assert len(negatives & {1, 2, 3, 4, 6, 7, 8, 9, 10, 11}) >= 10, negatives
+
+    def test_invalid_ratio(self):
+        with self.assertRaises(ValueError):
+            NegativeSampler(10, -1)
+        with self.assertRaises(ValueError):
+            NegativeSampler(10, 1, hard_negative_ratio=1.5)
@@ -0,0 +1,40 @@
+import io
+import unittest
+
+from PIL import Image
+
+from vision_datasets.common import PILImageLoader
+
+
+def _encode(img, img_format, **kwargs):
+    stream = io.BytesIO()
+    img.save(stream, format=img_format, **kwargs)
+    stream.seek(0)
+    return stream
+
+
+class TestPILImageLoader(unittest.TestCase):
+    def test_jpeg_decoded_at_coarsest_scale_meeting_min_scale(self):
+        img = Image.new('RGB', (800, 600), (200, 10, 10))
+        image, scale = PILImageLoader.load_reduced_from_stream(_encode(img, 'JPEG'), 0.2)
+        self.assertEqual((image.size, scale), ((200, 150), 0.25))
+        self.assertEqual(image.format, 'JPEG')
+
+        image, scale = PILImageLoader.load_reduced_from_stream(_encode(img, 'JPEG'), 0.6)
+        self.assertEqual((image.size, scale), ((800, 600), 1))
+
+    def test_reduced_decoding_respects_orientation(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        image, scale = PILImageLoader.load_reduced_from_stream(_encode(Image.new('RGB', (800, 600)), 'JPEG', exif=exif), 0.125)
+        self.assertEqual((image.size, scale), ((75, 100), 0.125))
+
+    def test_read_size_from_header(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        self.assertEqual(PILImageLoader.read_size_from_stream(_encode(Image.new('RGB', (800, 600)), 'JPEG', exif=exif)), (600, 800))
+        self.assertEqual(PILImageLoader.read_size_from_stream(_encode(Image.new('RGB', (800, 600)), 'PNG')), (800, 600))
+
+    def test_non_jpeg_decoded_at_full_resolution(self):
+        image, scale = PILImageLoader.load_reduced_from_stream(_encode(Image.new('RGB', (800, 600)), 'PNG'), 0.2)
+        self.assertEqual((image.size, scale), ((800, 600), 1))
@@ -0,0 +1,121 @@
+import json
+import os
+import pathlib
+import pickle
+import tempfile
+import unittest
+import zipfile
+
+from vision_datasets.common import DatasetHub, DatasetTypes, FileReader, LazyFileFetcher
+from .resources.http_server import RangeServer, jpeg_bytes
+
+
+class TestLazyFileFetcher(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.remote_dir = pathlib.Path(self.temp_dir.name) / 'remote'
+        self.local_dir = pathlib.Path(self.temp_dir.name) / 'local'
+        (self.remote_dir / 'data').mkdir(parents=True)
+        # noise, larger than the margin fetched after an entry
+        self.images = {f'{i}.jpg': jpeg_bytes() for i in range(5)}
+        with zipfile.ZipFile(self.remote_dir / 'data' / 'images.zip', 'w') as z:
+            for i, (name, content) in enumerate(self.images.items()):
+                z.writestr(name, content, compress_type=zipfile.ZIP_STORED if i % 2 else zipfile.ZIP_DEFLATED)
+            # so that the images are not in the end of the zip fetched with the central directory
+            z.writestr('filler.bin', os.urandom(200000))
+        (self.remote_dir / 'data' / 'plain.txt').write_bytes(b'plain')
+
+        self.server = RangeServer(directory=str(self.remote_dir))
+        self.container_url = f'{self.server.url}/?sig=token'
+
+    def tearDown(self):
+        self.server.close()
+        self.temp_dir.cleanup()
+
+    def test_zip_entries_are_fetched_by_ranges(self):
+        reader = FileReader(LazyFileFetcher(self.container_url, self.local_dir))
+        for name in ['3.jpg', '0.jpg', '3.jpg']:
+            with reader.open(self.local_dir / 'data' / f'images.zip@{name}', 'rb') as f:
+                self.assertEqual(f.read(), self.images[name])
+        reader.close()
+
+        self.assertFalse((self.local_dir / 'data' / 'images.zip').exists())
+        self.assertTrue((self.local_dir / 'data' / 'images.zip.lazy').exists())
+        # end of the zip, then each entry once
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertTrue(all(r is not None for _, _, r in self.server.requests))
+
+    def test_entries_fetched_are_shared_by_fetchers(self):
+        reader = FileReader(LazyFileFetcher(self.container_url, self.local_dir))
+        reader.open(f'{self.local_dir}/data/images.zip@1.jpg').close()
+        n_requests = len(self.server.requests)
+
+        # e.g., a fetcher in another process
+        other_reader = pickle.loads(pickle.dumps(FileReader(LazyFileFetcher(self.container_url, self.local_dir))))
+        with other_reader.open(f'{self.local_dir}/data/images.zip@1.jpg') as f:
+            self.assertEqual(f.read(), self.images['1.jpg'])
+        self.assertEqual(len(self.server.requests), n_requests)
+        reader.close()
+        other_reader.close()
+
+    def test_large_central_directory(self):
+        names = [f'dir/{i:05d}_{"x" * 40}.txt' for i in range(2000)]
+        with zipfile.ZipFile(self.remote_dir / 'data' / 'many.zip', 'w') as z:
+            for name in names:
+                z.writestr(name, name.encode())
+
+        reader = FileReader(LazyFileFetcher(self.container_url, self.local_dir))
+        for name in [names[0], names[1234], names[-1]]:
+            with reader.open(f'{self.local_dir}/data/many.zip@{name}') as f:
+                self.assertEqual(f.read(), name.encode())
+        reader.close()
+        self.assertLess(self.server.bytes_sent, (self.remote_dir / 'data' / 'many.zip').stat().st_size)
+
+    def test_plain_files_and_local_files(self):
+        reader = FileReader(LazyFileFetcher(self.container_url, self.local_dir))
+        with reader.open(self.local_dir / 'data' / 'plain.txt', 'rb') as f:
+            self.assertEqual(f.read(), b'plain')
+        self.assertEqual((self.local_dir / 'data' / 'plain.txt').read_bytes(), b'plain')
+
+        # files present locally or out of local_dir are not fetched
+        self.server.requests.clear()
+        reader.open(self.local_dir / 'data' / 'plain.txt').close()
+        outside = pathlib.Path(self.temp_dir.name) / 'outside.txt'
+        outside.write_text('outside')
+        with reader.open(outside) as f:
+            self.assertEqual(f.read(), 'outside')
+        self.assertEqual(self.server.requests, [])
+        reader.close()
+
+    def test_hub_lazy_fetch(self):
+        coco = {'images': [{'id': i + 1, 'file_name': name, 'zip_file': 'images.zip', 'width': 40, 'height': 30} for i, name in enumerate(self.images)],
+                'annotations': [{'id': i + 1, 'image_id': i + 1, 'category_id': 1} for i in range(len(self.images))], 'categories': [{'id': 1, 'name': 'a'}]}
+        (self.remote_dir / 'data' / 'train.json').write_text(json.dumps(coco))
+        registry = [{'name': 'd', 'version': 1, 'type': DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS.name, 'root_folder': 'data', 'format': 'coco',
+                     'train': {'index_path': 'train.json', 'files_for_local_usage': ['images.zip']}}]
+
+        dataset = DatasetHub(json.dumps(registry), self.container_url, str(self.local_dir), lazy_fetch=True).create_vision_dataset('d')
+        self.assertFalse((self.local_dir / 'data' / 'images.zip').exists())
+        image, target, _ = dataset[2]
+        self.assertEqual(image.size, (40, 30))
+        self.assertEqual(target[0].label_data, 0)
+
+        dataset.start_fetch_warmer([[4, 0], [1]])
+        dataset._file_reader.fetcher.join_warmer()
+        fetched = {r for _, path, r in self.server.requests if path.startswith('/data/images.zip')}
+        self.assertEqual(len(fetched), 5)
+        n_requests = len(self.server.requests)
+        self.assertEqual([dataset[i][0].size for i in [4, 0, 1]], [(40, 30)] * 3)
+        self.assertEqual(len(self.server.requests), n_requests)
+        dataset.close()
+
+    def test_warmer_requires_fetcher(self):
+        (self.remote_dir / 'data' / 'train.json').write_text(json.dumps({'images': [], 'annotations': [], 'categories': [{'id': 1, 'name': 'a'}]}))
+        registry = [{'name': 'd', 'version': 1, 'type': DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS.name, 'root_folder': 'data', 'format': 'coco', 'train': {'index_path': 'train.json'}}]
+        dataset = DatasetHub(json.dumps(registry), None, str(self.remote_dir)).create_vision_dataset('d')
+        with self.assertRaises(ValueError):
+            dataset.start_fetch_warmer()
+
+
+if __name__ == '__main__':
+    unittest.main()
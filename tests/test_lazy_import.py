@@ -0,0 +1,59 @@
+import json
+import pathlib
+import subprocess
+import sys
+import unittest
+
+_REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+_HEAVY_MODULES = ['azure', 'requests', 'tenacity', 'numpy', 'PIL', 'tqdm', 'torch']
+_TASK_MODULES = ['vision_datasets.image_classification', 'vision_datasets.image_object_detection', 'vision_datasets.key_value_pair', 'vision_datasets.multi_task']
+
+
+def _run_in_fresh_interpreter(code: str):
+    result = subprocess.run([sys.executable, '-c', code], cwd=_REPO_ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestLazyImport(unittest.TestCase):
+    def test_import_does_not_load_heavy_or_task_modules(self):
+        loaded = _run_in_fresh_interpreter(f'''
+import json, sys
+import vision_datasets
+print(json.dumps([m for m in {_HEAVY_MODULES + _TASK_MODULES} if m in sys.modules]))
+''')
+        self.assertEqual(loaded, [])
+
+    def test_import_time(self):
+        # benchmark of "import vision_datasets" in a fresh interpreter, the bound is loose on purpose to stay stable on slow machines
+        seconds = _run_in_fresh_interpreter('''
+import json, time
+start = time.perf_counter()
+import vision_datasets
+print(json.dumps(time.perf_counter() - start))
+''')
+        self.assertLess(seconds, 2.0, f'import vision_datasets: {seconds * 1000:.1f} ms')
+
+    def test_task_attributes_are_loaded_on_access(self):
+        result = _run_in_fresh_interpreter('''
+import json, sys
+import vision_datasets
+before = 'vision_datasets.image_object_detection' in sys.modules
+label_cls = vision_datasets.ImageObjectDetectionLabelManifest
+print(json.dumps([before, label_cls.__module__, 'ImageObjectDetectionLabelManifest' in dir(vision_datasets)]))
+''')
+        self.assertEqual(result, [False, 'vision_datasets.image_object_detection.manifest', True])
+
+    def test_unknown_attribute_raises(self):
+        import vision_datasets
+        with self.assertRaises(AttributeError):
+            vision_datasets.NotExistingAttribute
+
+    def test_factories_register_task_operations_on_demand(self):
+        result = _run_in_fresh_interpreter('''
+import json
+from vision_datasets.common import CocoManifestAdaptorFactory, DatasetTypes, ManifestMergeStrategyFactory, SupportedOperationsByDataType
+adaptor = CocoManifestAdaptorFactory.create(DatasetTypes.IMAGE_OBJECT_DETECTION)
+ops = SupportedOperationsByDataType.list(DatasetTypes.KEY_VALUE_PAIR)
+print(json.dumps([type(adaptor).__name__, len(ops) > 0, DatasetTypes.MULTITASK in ManifestMergeStrategyFactory.list_data_types()]))
+''')
+        self.assertEqual(result, ['ImageObjectDetectionCocoManifestAdaptor', True, True])
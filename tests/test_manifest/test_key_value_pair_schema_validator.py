@@ -0,0 +1,76 @@
+import pickle
+import unittest
+
+from vision_datasets.key_value_pair import KeyValuePairSchemaValidator
+from vision_datasets.key_value_pair.manifest import KeyValuePairLabelManifest, KeyValuePairSchema
+
+
+def _interpret(fields, schema):
+    for key, field_schema in schema.field_schema.items():
+        if key not in fields:
+            raise ValueError(f'{key} not found')
+        KeyValuePairLabelManifest.check_field_schema_match(fields[key], field_schema)
+
+
+class TestKeyValuePairSchemaValidator(unittest.TestCase):
+    schema = KeyValuePairSchema('defects', {
+        'defects': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'kind': {'type': 'string', 'classes': {'scratch': {}, 'dent': {}}, 'includeGrounding': True},
+                    'severity': {'type': 'integer'},
+                },
+            },
+        },
+        'note': {'type': 'string'},
+    })
+
+    valid_fields = [
+        {'defects': {'value': []}, 'note': {'value': ''}},
+        {'defects': {'value': [{'value': {'kind': {'value': 'dent', 'groundings': [[0, 0, 10, 10]]}, 'severity': {'value': 2}}}]}, 'note': {'value': 'x'}},
+    ]
+    invalid_fields = [
+        {'defects': {'value': []}},
+        {'defects': {'value': {}}, 'note': {'value': ''}},
+        {'defects': [], 'note': {'value': ''}},
+        {'defects': {'value': [{'value': {'kind': {'value': 'crack', 'groundings': []}}}]}, 'note': {'value': ''}},
+        {'defects': {'value': [{'value': {'kind': {'value': 'dent'}}}]}, 'note': {'value': ''}},
+        {'defects': {'value': [{'value': {'kind': {'value': 'dent', 'groundings': [[10, 0, 0, 10]]}}}]}, 'note': {'value': ''}},
+        {'defects': {'value': [{'value': {'size': {'value': 1}}}]}, 'note': {'value': ''}},
+        {'defects': {'value': [{'value': {'severity': {'value': 'high'}}}]}, 'note': {'value': 1}},
+    ]
+
+    def test_same_result_as_interpreted_check(self):
+        validator = KeyValuePairSchemaValidator(self.schema)
+        for fields in self.valid_fields:
+            validator.check(fields)
+
+        for fields in self.invalid_fields:
+            with self.assertRaises(ValueError) as interpreted:
+                _interpret(fields, self.schema)
+            with self.assertRaises(ValueError) as compiled:
+                validator.check(fields)
+            self.assertEqual(str(compiled.exception), str(interpreted.exception))
+
+    def test_validator_is_cached_by_schema(self):
+        self.assertIs(self.schema.validator, self.schema.validator)
+        unpickled = pickle.loads(pickle.dumps(self.schema))
+        self.assertEqual(unpickled, self.schema)
+        self.assertIsNot(unpickled.validator, self.schema.validator)
+
+    def test_find_errors_aggregates(self):
+        fields_list = [self.valid_fields[0], self.invalid_fields[0], self.valid_fields[1], self.invalid_fields[3], None]
+        errors = self.schema.validator.find_errors(fields_list)
+        self.assertEqual([index for index, _ in errors], [1, 3, 4])
+        self.assertEqual(errors[0][1], 'note not found')
+
+        with self.assertRaisesRegex(ValueError, '3 of 5 annotations do not match the schema defects'):
+            self.schema.validator.check_all(fields_list)
+        self.schema.validator.check_all(self.valid_fields)
+
+    def test_find_errors_in_parallel(self):
+        fields_list = (self.valid_fields + self.invalid_fields) * 5
+        validator = self.schema.validator
+        self.assertEqual(validator.find_errors(fields_list, num_workers=2), validator.find_errors(fields_list))
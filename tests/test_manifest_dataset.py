@@ -3,14 +3,18 @@ import json
 import pathlib
 import tempfile
 import unittest
+import unittest.mock
 import zipfile
 
 import numpy as np
 from PIL import Image
 
 from tests.test_fixtures import DetectionTestFixtures
-from vision_datasets.common import CocoManifestAdaptorFactory, DatasetInfo, DatasetInfoFactory, DatasetTypes, Usages, VisionDataset
+from vision_datasets.common import CocoManifestAdaptorFactory, DatasetInfo, DatasetInfoFactory, DatasetManifestWithMultiImageLabel, DatasetTypes, ImageDataManifest, MultiTaskDatasetInfo, Usages, \
+    VisionDataset
 from vision_datasets.common.data_manifest.iris_data_manifest_adaptor import IrisManifestAdaptor
+from vision_datasets.common.data_manifest.utils import generate_multitask_dataset_manifest
+from vision_datasets.key_value_pair import KeyValuePairLabelManifest
 
 from .resources.util import coco_database, schema_database
 
@@ -67,6 +71,91 @@ class TestVisionDataset(unittest.TestCase):
             self.assertEqual([label.label_data for label in target0], [[0, 0.0, 0.0, 100.0, 100.0], [1, 10.0, 10.0, 50.0, 100.0]])
             self.assertEqual([label.label_data for label in target1], [[1, 50.0, 50.0, 80.0, 80.0], [3, 0.0, 50.0, 100.0, 100.0]])
 
+    def test_multitask_od_task_converted_to_relative(self):
+        od_dataset, tempdir = self._create_an_od_dataset()
+        with tempdir:
+            od_manifest = od_dataset.dataset_manifest
+            for image in od_manifest.images:
+                image.width, image.height = 100, 100
+            manifest = generate_multitask_dataset_manifest({'od': od_manifest, 'od_no_size': copy.deepcopy(od_manifest)})
+            manifest.images[0].width = None
+            dataset_info = MultiTaskDatasetInfo({'name': 'dummy', 'type': 'multitask', 'root_folder': tempdir.name,
+                                                 'tasks': {'od': {'type': 'object_detection', 'test': {'index_path': 'test.txt'}},
+                                                           'od_no_size': {'type': 'object_detection', 'test': {'index_path': 'test.txt'}}}})
+            dataset = VisionDataset(dataset_info, manifest, 'relative')
+            for task_name in ['od', 'od_no_size']:
+                _, target0, _ = dataset[0]
+                _, target1, _ = dataset[1]
+                self.assertEqual([label.label_data for label in target0[task_name]], [[0, 0.0, 0.0, 1.0, 1.0], [1, 0.1, 0.1, 0.5, 1.0]])
+                self.assertEqual([label.label_data for label in target1[task_name]], [[1, 0.5, 0.5, 0.8, 0.8], [3, 0.0, 0.5, 1.0, 1.0]])
+
+            self.assertEqual(od_manifest.images[0].labels[1].label_data, [1, 10, 10, 50, 100])
+
+    def test_od_relative_labels_do_not_alter_manifest(self):
+        dataset, tempdir = self._create_an_od_dataset()
+        with tempdir:
+            for image in dataset.dataset_manifest.images:
+                image.width, image.height = 100, 100
+            manifest_label = dataset.dataset_manifest.images[0].labels[1]
+            manifest_label.additional_info = {'iscrowd': 0}
+            _, target0, _ = dataset[0]
+            self.assertEqual(target0[1].label_data, [1, 0.1, 0.1, 0.5, 1.0])
+            self.assertIs(target0[1].additional_info, manifest_label.additional_info)
+            self.assertEqual(manifest_label.label_data, [1, 10, 10, 50, 100])
+            self.assertEqual([label.label_data for label in dataset.get_targets(1)], [[1, 0.5, 0.5, 0.8, 0.8], [3, 0.0, 0.5, 1.0, 1.0]])
+
+    def test_od_get_boxes(self):
+        dataset, tempdir = self._create_an_od_dataset()
+        with tempdir:
+            boxes = dataset.get_boxes(0)
+            self.assertEqual(boxes.tolist(), [[0, 0.0, 0.0, 1.0, 1.0], [1, 0.1, 0.1, 0.5, 1.0]])
+            self.assertFalse(boxes.flags.writeable)
+
+            for image in dataset.dataset_manifest.images:
+                image.width, image.height = 100, 100
+            dataset = VisionDataset(dataset.dataset_info, dataset.dataset_manifest, 'relative')
+            self.assertEqual(dataset.get_boxes(1).tolist(), [[1, 0.5, 0.5, 0.8, 0.8], [3, 0.0, 0.5, 1.0, 1.0]])
+
+            dataset = VisionDataset(dataset.dataset_info, dataset.dataset_manifest, 'absolute')
+            self.assertEqual(dataset.get_boxes(1).tolist(), [[1, 50, 50, 80, 80], [3, 0, 50, 100, 100]])
+
+    def test_od_targets_reflect_manifest_edits(self):
+        dataset, tempdir = self._create_an_od_dataset()
+        with tempdir:
+            for image in dataset.dataset_manifest.images:
+                image.width, image.height = 100, 100
+            self.assertEqual(dataset[0][1][1].label_data, [1, 0.1, 0.1, 0.5, 1.0])
+            self.assertEqual(dataset.get_boxes(0).tolist()[1], [1, 0.1, 0.1, 0.5, 1.0])
+
+            dataset.dataset_manifest.images[0].labels[1].label_data = [2, 20, 20, 50, 100]
+            self.assertEqual([label.label_data for label in dataset[0][1]], [[0, 0.0, 0.0, 1.0, 1.0], [2, 0.2, 0.2, 0.5, 1.0]])
+            dataset.dataset_manifest.images[1].width = 200
+            self.assertEqual([label.label_data for label in dataset.get_targets(1)], [[1, 0.25, 0.5, 0.4, 0.8], [3, 0.0, 0.5, 0.5, 1.0]])
+
+            self.assertEqual(dataset.get_boxes(0).tolist()[1], [1, 0.1, 0.1, 0.5, 1.0])
+            dataset.reset_box_stores()
+            self.assertEqual(dataset.get_boxes(0).tolist()[1], [2, 0.2, 0.2, 0.5, 1.0])
+
+            manifest = copy.deepcopy(dataset.dataset_manifest)
+            manifest.images[0].labels[1].label_data = [3, 30, 30, 50, 100]
+            dataset.dataset_manifest = manifest
+            self.assertEqual(dataset.get_boxes(0).tolist()[1], [3, 0.3, 0.3, 0.5, 1.0])
+
+    def test_get_image_size(self):
+        dataset, tempdir = self._create_an_od_dataset()
+        with tempdir:
+            Image.new('RGB', (30, 20)).save(pathlib.Path(tempdir.name) / '1.jpg')
+            dataset.dataset_manifest.images[0].width, dataset.dataset_manifest.images[0].height = 40, 50
+            self.assertEqual(dataset.get_image_size(0), (40, 50))
+            self.assertEqual(dataset.get_image_size(1), (30, 20))
+
+    def test_get_boxes_raises_for_non_od(self):
+        dataset, tempdir = self._create_an_od_dataset()
+        with tempdir:
+            dataset_info = DatasetInfo({**self.DATASET_INFO_DICT, 'root_folder': tempdir.name})
+            with self.assertRaises(ValueError):
+                VisionDataset(dataset_info, dataset.dataset_manifest).get_boxes(0)
+
     def test_works_with_empty_manifest(self):
         with tempfile.TemporaryDirectory() as temp_dir:
             dataset_manifest = DetectionTestFixtures.create_an_od_manifest(temp_dir)
@@ -206,3 +295,41 @@ class TestCocoKeyValuePairDataset(unittest.TestCase):
                 t = dataset.get_targets(i)
                 self.assertEqual(t.fields, coco_anno['fields'])
                 self.assertEqual(t.text, coco_anno.get('text', None))
+
+    def test_image_cache_reuses_decoded_images(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            dataset, images = self._create_key_value_pair_dataset(tempdir)
+            cached_dataset = VisionDataset(dataset.dataset_info, dataset.dataset_manifest, image_cache_size=2)
+            with unittest.mock.patch.object(cached_dataset, '_load_image', wraps=cached_dataset._load_image) as load_image:
+                items = [cached_dataset[i] for _ in range(2) for i in range(len(cached_dataset))]
+
+            self.assertEqual(load_image.call_count, 2)
+            self.assertEqual((cached_dataset.image_cache.hits, cached_dataset.image_cache.misses), (6, 2))
+            self.assertEqual(cached_dataset.image_cache.reuse_ratio, 0.75)
+            self.assertEqual(list(items[1][0][0].getdata()), list(images[1].getdata()))
+            self.assertIsNot(items[0][0][1], items[1][0][0])
+            self.assertIsNone(dataset.image_cache)
+            # as without cache, for hits and misses
+            self.assertEqual([img.format for item in items for img in item[0]], [img.format for i in range(len(dataset)) for img in dataset[i][0]] * 2)
+            self.assertIsNotNone(items[0][0][0].format)
+
+    def test_image_cache_is_cleared_with_new_manifest(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            dataset, images = self._create_key_value_pair_dataset(tempdir)
+            cached_dataset = VisionDataset(dataset.dataset_info, dataset.dataset_manifest, image_cache_size=2)
+            cached_dataset[0]
+            self.assertEqual(len(cached_dataset.image_cache), 2)
+
+            manifest = copy.deepcopy(dataset.dataset_manifest)
+            manifest.images = manifest.images[::-1]
+            cached_dataset.dataset_manifest = manifest
+            self.assertEqual(len(cached_dataset.image_cache), 0)
+            self.assertEqual(list(cached_dataset[0][0][0].getdata()), list(images[1].getdata()))
+
+    def test_image_reuse_order(self):
+        images = [ImageDataManifest(i, f'{i}.jpg', 10, 10, []) for i in range(4)]
+        img_ids = [[2, 3], [0, 1], [0, 2], [3, 1], [0, 3]]
+        annotations = [KeyValuePairLabelManifest(i, x, {'fields': {}}) for i, x in enumerate(img_ids)]
+        dataset = VisionDataset(DatasetInfoFactory.create(self.DATASET_INFO_DICT), DatasetManifestWithMultiImageLabel(images, annotations, DatasetTypes.KEY_VALUE_PAIR))
+
+        self.assertEqual(dataset.image_reuse_order(), [4, 1, 2, 3, 0])
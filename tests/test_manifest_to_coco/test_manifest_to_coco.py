@@ -1,3 +1,7 @@
+import json
+import pathlib
+import tempfile
+
 import pytest
 from vision_datasets.common import CocoDictGeneratorFactory, DatasetTypes
 
@@ -17,3 +21,28 @@ class TestManifestToCoco:
         manifest = coco_dict_to_manifest(DatasetTypes.KEY_VALUE_PAIR, coco_dict, schema)
         coco_generator = CocoDictGeneratorFactory.create(DatasetTypes.KEY_VALUE_PAIR)
         coco_dict = coco_generator.run(manifest)
+
+    @pytest.mark.parametrize("coco_dict, task", [(coco_dict, task) for task, coco_dicts in coco_database.items() if task not in [DatasetTypes.MULTITASK, DatasetTypes.KEY_VALUE_PAIR]
+                                                 for coco_dict in coco_dicts])
+    def test_write_coco_matches_coco_dict(self, coco_dict, task):
+        manifest = coco_dict_to_manifest(task, coco_dict)
+        coco_generator = CocoDictGeneratorFactory.create(task)
+        expected = coco_generator.run(manifest)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = pathlib.Path(temp_dir) / 'coco.json'
+            coco_generator.write_coco(manifest, file_path)
+            assert file_path.read_text(encoding='utf-8') == json.dumps(expected, indent=2, ensure_ascii=False)
+
+            coco_generator.write_coco(manifest, file_path, compact=True)
+            assert '\n' not in file_path.read_text(encoding='utf-8')
+            assert json.loads(file_path.read_text(encoding='utf-8')) == expected
+
+    @pytest.mark.parametrize("coco_dict, schema", zip(coco_database[DatasetTypes.KEY_VALUE_PAIR], schema_database))
+    def test_key_value_pair_write_coco_matches_coco_dict(self, coco_dict, schema):
+        manifest = coco_dict_to_manifest(DatasetTypes.KEY_VALUE_PAIR, coco_dict, schema)
+        coco_generator = CocoDictGeneratorFactory.create(DatasetTypes.KEY_VALUE_PAIR)
+        expected = coco_generator.run(manifest)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = pathlib.Path(temp_dir) / 'coco.json'
+            coco_generator.write_coco(manifest, file_path)
+            assert file_path.read_text(encoding='utf-8') == json.dumps(expected, indent=2, ensure_ascii=False)
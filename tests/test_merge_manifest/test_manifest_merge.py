@@ -1,8 +1,9 @@
 import copy
+import json
 
 import pytest
 
-from vision_datasets.common import DatasetTypes, ManifestMerger, ManifestMergeStrategyFactory
+from vision_datasets.common import DatasetHub, DatasetTypes, Usages, LazyMergedAnnotations, LazyMergedImages, ManifestMerger, ManifestMergeStrategyFactory
 
 from ..resources.util import TYPES_WITH_CATEGORIES, coco_database, coco_dict_to_manifest, schema_database
 
@@ -81,3 +82,51 @@ class TestMergeManifest:
         with pytest.raises(ValueError):
             merged = merger.run(manifest1, manifest2)
             self.check(manifest1, manifest2, merged)
+
+    @pytest.mark.parametrize("data_type, coco_dicts", [(data_type, coco_database[data_type]) for data_type in TYPES_WITH_CATEGORIES])
+    def test_lazy_merge_matches_eager_merge(self, data_type, coco_dicts):
+        coco_dict_1 = [coco_dict for coco_dict in coco_dicts if len(coco_dict['categories']) > 1][0]
+        coco_dict_2 = copy.deepcopy(coco_dict_1)
+        coco_dict_2['categories'][0]['name'] += '_unique'
+        manifests = [coco_dict_to_manifest(data_type, x) for x in [coco_dict_1, coco_dict_2, coco_dict_1]]
+
+        eager = ManifestMerger(ManifestMergeStrategyFactory.create(data_type)).run(*manifests)
+        lazy = ManifestMerger(ManifestMergeStrategyFactory.create(data_type, lazy=True)).run(*manifests)
+
+        assert isinstance(lazy.images, LazyMergedImages)
+        assert lazy.images.offsets == [0, len(manifests[0]), 2 * len(manifests[0]), 3 * len(manifests[0])]
+        assert lazy.categories == eager.categories
+        assert list(lazy.images) == eager.images
+        assert [x.label_data for img in lazy.images for x in img.labels] == [x.label_data for img in eager.images for x in img.labels]
+        assert lazy.images.materialize() == eager.images
+        assert lazy.images[-1] == eager.images[-1]
+
+    @pytest.mark.parametrize("coco_dict, schema", zip(coco_database[DatasetTypes.KEY_VALUE_PAIR], schema_database))
+    def test_lazy_merge_key_value_pair_matches_eager_merge(self, coco_dict, schema):
+        data_type = DatasetTypes.KEY_VALUE_PAIR
+        manifests = [coco_dict_to_manifest(data_type, copy.deepcopy(coco_dict), copy.deepcopy(schema)) for _ in range(3)]
+
+        eager = ManifestMerger(ManifestMergeStrategyFactory.create(data_type)).run(*manifests)
+        lazy = ManifestMerger(ManifestMergeStrategyFactory.create(data_type, lazy=True)).run(*manifests)
+
+        assert isinstance(lazy.annotations, LazyMergedAnnotations)
+        assert list(lazy.images) == eager.images
+        assert list(lazy.annotations) == eager.annotations
+        assert lazy.annotations[len(manifests[0].annotations)].img_ids == [x + len(manifests[0].images) for x in manifests[0].annotations[0].img_ids]
+
+    def test_hub_merges_usages_lazily(self, tmp_path):
+        for usage, n_images in [('train', 2), ('val', 3)]:
+            coco = {'images': [{'id': i + 1, 'file_name': f'{usage}_{i}.jpg', 'width': 100, 'height': 50} for i in range(n_images)],
+                    'annotations': [{'id': i + 1, 'image_id': i + 1, 'category_id': 1, 'bbox': [10, 10, 50, 25]} for i in range(n_images)],
+                    'categories': [{'id': 1, 'name': usage}]}
+            (tmp_path / f'{usage}.json').write_text(json.dumps(coco))
+        registry = [{'name': 'd', 'version': 1, 'type': DatasetTypes.IMAGE_OBJECT_DETECTION.name, 'root_folder': '', 'format': 'coco',
+                     'train': {'index_path': 'train.json'}, 'val': {'index_path': 'val.json'}}]
+
+        manifest, _, _ = DatasetHub(json.dumps(registry), None, str(tmp_path)).create_dataset_manifest('d', usage=[Usages.TRAIN, Usages.VAL])
+
+        assert isinstance(manifest.images, LazyMergedImages)
+        assert [x.name for x in manifest.categories] == ['train', 'val']
+        assert [x.id for x in manifest.images] == list(range(5))
+        assert [x.labels[0].category_id for x in manifest.images] == [0, 0, 1, 1, 1]
+        assert manifest.images[3].labels[0].label_data == [1, 10, 10, 60, 35]
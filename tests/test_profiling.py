@@ -0,0 +1,104 @@
+import json
+import pathlib
+import tempfile
+import unittest
+
+from PIL import Image
+
+from vision_datasets.common import DatasetInfo, DatasetTypes, StageProfiler, VisionDataset, disable_profiling, enable_profiling, get_profiler, load_snapshots, merge_snapshots, \
+    to_chrome_trace
+
+from .resources.util import coco_database, coco_dict_to_manifest
+
+
+class TestStageProfiler(unittest.TestCase):
+    def test_ring_buffer_keeps_latest_events_and_all_totals(self):
+        profiler = StageProfiler(capacity=3)
+        for i in range(5):
+            profiler.record('read' if i % 2 else 'decode', i * 100, i * 100 + 10 * (i + 1))
+
+        snapshot = profiler.snapshot()
+        self.assertEqual(snapshot['events'], [['decode', 200, 30], ['read', 300, 40], ['decode', 400, 50]])
+        self.assertEqual(snapshot['totals'], {'decode': [3, 90, 50], 'read': [2, 60, 40]})
+
+        stats = profiler.stats()
+        self.assertEqual(list(stats), ['read', 'decode'])
+        self.assertEqual(stats['decode']['count'], 3)
+        self.assertAlmostEqual(stats['decode']['share'], 0.6)
+
+    def test_merge_snapshots_and_chrome_trace(self):
+        snapshots = [{'pid': 1, 'totals': {'read': [1, 2000000, 2000000]}, 'events': [['read', 1000, 2000000]]},
+                     {'pid': 2, 'totals': {'read': [1, 4000000, 4000000], 'transform': [1, 2000000, 2000000]}, 'events': [['transform', 5000, 2000000]]}]
+        stats = merge_snapshots(snapshots)
+        self.assertEqual(stats['read']['count'], 2)
+        self.assertAlmostEqual(stats['read']['mean_ms'], 3)
+        self.assertAlmostEqual(stats['read']['max_ms'], 4)
+        self.assertAlmostEqual(stats['transform']['share'], 0.25)
+
+        trace = to_chrome_trace(snapshots)
+        json.dumps(trace)
+        complete_events = [x for x in trace['traceEvents'] if x['ph'] == 'X']
+        self.assertEqual([(x['name'], x['pid'], x['ts'], x['dur']) for x in complete_events], [('read', 1, 1, 2000), ('transform', 2, 5, 2000)])
+
+    def test_dump_and_load(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profiler = StageProfiler(output_dir=temp_dir)
+            profiler.record('open', 0, 5)
+            profiler.dump()
+            self.assertEqual(load_snapshots(temp_dir), [profiler.snapshot()])
+
+
+class TestVisionDatasetProfiling(unittest.TestCase):
+    def tearDown(self):
+        disable_profiling()
+
+    def _create_od_dataset(self, temp_dir):
+        coco_dict = coco_database[DatasetTypes.IMAGE_OBJECT_DETECTION][0]
+        manifest = coco_dict_to_manifest(DatasetTypes.IMAGE_OBJECT_DETECTION, coco_dict)
+        for image in manifest.images:
+            image.img_path = (pathlib.Path(temp_dir) / image.img_path).as_posix()
+            Image.new('RGB', (224, 224)).save(image.img_path)
+
+        dataset_info = DatasetInfo({'name': 'test', 'type': 'object_detection', 'root_folder': temp_dir, 'format': 'coco', 'train': {'index_path': 'test.json'}})
+        return VisionDataset(dataset_info, manifest)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(get_profiler())
+
+    def test_stages_are_recorded(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            dataset = self._create_od_dataset(temp_dir)
+            profiler = enable_profiling()
+            image, target, _ = dataset[0]
+            self.assertEqual(image.size, (224, 224))
+            self.assertEqual([label.label_data for label in target], [[0, 10 / 224, 10 / 224, 100 / 224, 100 / 224]])
+
+            stats = profiler.stats()
+            self.assertEqual(list(stats), ['open', 'read', 'decode', 'exif', 'convert', 'target_conversion'])
+            self.assertTrue(all(x['count'] == 1 for x in stats.values()))
+
+    def test_stats_of_data_loader_workers_are_merged(self):
+        import torch
+        from vision_datasets.torch import TorchDataset
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            dataset = TorchDataset(self._create_od_dataset(temp_dir), _to_size)
+            output_dir = pathlib.Path(temp_dir) / 'profiles'
+            enable_profiling(output_dir=output_dir)
+            context = torch.multiprocessing.get_context('fork')
+            for _ in torch.utils.data.DataLoader(dataset, batch_size=1, num_workers=2, collate_fn=_identity, multiprocessing_context=context):
+                pass
+
+            snapshots = load_snapshots(output_dir)
+            self.assertEqual(len(snapshots), 2)
+            stats = merge_snapshots(snapshots)
+            self.assertEqual(stats['transform']['count'], 2)
+            self.assertEqual(stats['decode']['count'], 2)
+
+
+def _to_size(image):
+    return image.size
+
+
+def _identity(batch):
+    return batch
@@ -0,0 +1,149 @@
+import io
+import json
+import os
+import pathlib
+import tempfile
+import threading
+import unittest
+import zipfile
+
+from vision_datasets.common import DatasetHub, DatasetTypes, FileReader, StreamingZipFetcher
+from .resources.http_server import RangeServer, jpeg_bytes, wait_for
+
+
+class TestStreamingZipFetcher(unittest.TestCase):
+    def setUp(self):
+        self.images = {f'{i}.jpg': jpeg_bytes() for i in range(4)}
+        stream = io.BytesIO()
+        with zipfile.ZipFile(stream, 'w') as z:
+            for i, (name, content) in enumerate(self.images.items()):
+                z.writestr(name, content, compress_type=zipfile.ZIP_STORED if i % 2 else zipfile.ZIP_DEFLATED)
+            z.writestr('filler.bin', os.urandom(200000))
+        self.zip_bytes = stream.getvalue()
+
+        self.server = RangeServer({'/data/images.zip': self.zip_bytes})
+        self.container_url = f'{self.server.url}/?sig=token'
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.local_dir = pathlib.Path(self.temp_dir.name)
+        self.zip_path = self.local_dir / 'data' / 'images.zip'
+
+    def tearDown(self):
+        self.server.close()
+        self.temp_dir.cleanup()
+
+    def _gate_before_filler(self) -> threading.Event:
+        gate = threading.Event()
+        with zipfile.ZipFile(io.BytesIO(self.zip_bytes)) as z:
+            self.server.gates['/data/images.zip'] = (z.getinfo('filler.bin').header_offset + 100, gate)
+        return gate
+
+    def test_entries_are_readable_while_downloading(self):
+        gate = self._gate_before_filler()
+        reader = FileReader(StreamingZipFetcher(self.container_url, self.local_dir))
+        for name in ['3.jpg', '0.jpg']:
+            with reader.open(f'{self.zip_path}@{name}', 'rb') as f:
+                self.assertEqual(f.read(), self.images[name])
+        self.assertFalse(self.zip_path.exists())
+
+        gate.set()
+        with reader.open(f'{self.zip_path}@filler.bin', 'rb') as f:
+            self.assertEqual(len(f.read()), 200000)
+        wait_for(lambda: self.zip_path.exists())
+        with reader.open(f'{self.zip_path}@1.jpg', 'rb') as f:
+            self.assertEqual(f.read(), self.images['1.jpg'])
+        reader.close()
+
+        self.assertEqual(self.zip_path.read_bytes(), self.zip_bytes)
+        self.assertTrue((self.local_dir / 'data' / 'images.zip.download.json').exists())
+        self.assertEqual(self.server.requests, [('GET', '/data/images.zip?sig=token', None)])
+
+    def test_zip_is_downloaded_once_by_fetchers(self):
+        gate = self._gate_before_filler()
+        # e.g., fetchers of other processes
+        readers = [FileReader(StreamingZipFetcher(self.container_url, self.local_dir)) for _ in range(3)]
+        for reader, name in zip(readers, ['0.jpg', '2.jpg', '3.jpg']):
+            with reader.open(f'{self.zip_path}@{name}', 'rb') as f:
+                self.assertEqual(f.read(), self.images[name])
+
+        gate.set()
+        wait_for(lambda: self.zip_path.exists())
+        for reader in readers:
+            reader.close()
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_part_of_changed_zip_is_not_resumed(self):
+        self.zip_path.parent.mkdir(parents=True)
+        (self.local_dir / 'data' / 'images.zip.part').write_bytes(b'PK' + os.urandom(1000))
+        (self.local_dir / 'data' / 'images.zip.part.download.json').write_text(json.dumps({'validator': '"other"'}))
+        reader = FileReader(StreamingZipFetcher(self.container_url, self.local_dir))
+        with reader.open(f'{self.zip_path}@filler.bin', 'rb') as f:
+            self.assertEqual(len(f.read()), 200000)
+        wait_for(lambda: (self.local_dir / 'data' / 'images.zip.download.json').exists())
+        reader.close()
+
+        self.assertEqual(self.zip_path.read_bytes(), self.zip_bytes)
+        self.assertEqual([r for _, _, r in self.server.requests], ['bytes=1002-'])
+        self.assertFalse((self.local_dir / 'data' / 'images.zip.part.download.json').exists())
+
+    def test_missing_entry(self):
+        reader = FileReader(StreamingZipFetcher(self.container_url, self.local_dir))
+        with self.assertRaises(KeyError):
+            reader.open(f'{self.zip_path}@missing.jpg')
+        reader.close()
+
+    def test_entries_with_data_descriptors_are_readable_once_downloaded(self):
+        class _Unseekable:
+            # e.g., a pipe, zips written to which have data descriptors
+            def __init__(self):
+                self.content = b''
+
+            def write(self, data):
+                self.content += data
+                return len(data)
+
+            def flush(self):
+                pass
+
+        stream = _Unseekable()
+        with zipfile.ZipFile(stream, 'w') as z:
+            for name, content in self.images.items():
+                with z.open(name, 'w') as f:
+                    f.write(content)
+        self.server.files['/data/images.zip'] = stream.content
+        gate = threading.Event()
+        self.server.gates['/data/images.zip'] = (len(stream.content) // 2, gate)
+
+        reader = FileReader(StreamingZipFetcher(self.container_url, self.local_dir))
+        threading.Timer(0.3, gate.set).start()
+        with reader.open(f'{self.zip_path}@0.jpg', 'rb') as f:
+            self.assertEqual(f.read(), self.images['0.jpg'])
+        self.assertTrue(self.zip_path.exists())
+        reader.close()
+
+    def test_hub_stream_zips(self):
+        coco = {'images': [{'id': i + 1, 'file_name': name, 'zip_file': 'images.zip', 'width': 40, 'height': 30} for i, name in enumerate(self.images)],
+                'annotations': [{'id': i + 1, 'image_id': i + 1, 'category_id': 1} for i in range(len(self.images))], 'categories': [{'id': 1, 'name': 'a'}]}
+        self.server.files['/data/train.json'] = json.dumps(coco).encode()
+        registry = [{'name': 'd', 'version': 1, 'type': DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS.name, 'root_folder': 'data', 'format': 'coco',
+                     'train': {'index_path': 'train.json', 'files_for_local_usage': ['images.zip']}}]
+        gate = self._gate_before_filler()
+
+        with self.assertRaises(ValueError):
+            DatasetHub(json.dumps(registry), self.container_url, str(self.local_dir), lazy_fetch=True, stream_zips=True)
+
+        dataset = DatasetHub(json.dumps(registry), self.container_url, str(self.local_dir), stream_zips=True).create_vision_dataset('d')
+        image, target, _ = dataset[2]
+        self.assertEqual(image.size, (40, 30))
+        self.assertEqual(target[0].label_data, 0)
+        self.assertFalse(self.zip_path.exists())
+
+        gate.set()
+        dataset._file_reader.fetcher.join_warmer()
+        self.assertTrue(self.zip_path.exists())
+        self.assertEqual([dataset[i][0].size for i in range(4)], [(40, 30)] * 4)
+        self.assertEqual([path.split('?')[0] for _, path, _ in self.server.requests], ['/data/train.json', '/data/images.zip'])
+        dataset.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
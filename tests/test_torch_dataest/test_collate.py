@@ -0,0 +1,106 @@
+import json
+import os
+import pathlib
+import tempfile
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+from vision_datasets import DatasetInfo, DatasetTypes, VisionDataset
+from vision_datasets.image_caption import ImageCaptionLabelManifest
+from vision_datasets.image_classification import ImageClassificationLabelManifest
+from vision_datasets.image_object_detection import ImageObjectDetectionLabelManifest
+from vision_datasets.torch import CollateFactory, TorchDataset, create_collate_fn
+
+from ..resources.util import coco_database, coco_dict_to_manifest, schema_database
+
+
+def _od(boxes):
+    return [ImageObjectDetectionLabelManifest(box) for box in boxes]
+
+
+class TestTaskCollate:
+    def test_object_detection(self):
+        collate = CollateFactory.create(DatasetTypes.IMAGE_OBJECT_DETECTION)
+        images, targets, idx_strs = collate([('a', _od([[1, 0, 0, 10, 10], [2, 5, 5, 8, 8]]), '0'), ('b', [], '1'), ('c', _od([[0, 1, 2, 3, 4]]), '2')])
+
+        assert images == ['a', 'b', 'c']
+        assert idx_strs == ['0', '1', '2']
+        assert targets['num_boxes'].tolist() == [2, 0, 1]
+        assert targets['labels'].tolist() == [[1, 2], [-1, -1], [0, -1]]
+        assert targets['boxes'].shape == (3, 2, 4)
+        assert targets['boxes'][0].tolist() == [[0, 0, 10, 10], [5, 5, 8, 8]]
+        assert targets['boxes'][1].tolist() == [[0, 0, 0, 0], [0, 0, 0, 0]]
+        assert targets['boxes'][2].tolist() == [[1, 2, 3, 4], [0, 0, 0, 0]]
+
+    def test_object_detection_from_box_arrays(self):
+        collate = CollateFactory.create(DatasetTypes.IMAGE_OBJECT_DETECTION)
+        targets = collate.collate_targets([np.array([[1, 0, 0, 10, 10]]), _od([[2, 5, 5, 8, 8], [3, 1, 1, 2, 2]])])
+
+        assert targets['num_boxes'].tolist() == [1, 2]
+        assert targets['labels'].tolist() == [[1, -1], [2, 3]]
+        assert targets['boxes'].dtype == torch.float32
+
+    def test_classification(self):
+        multilabel = CollateFactory.create(DatasetTypes.IMAGE_CLASSIFICATION_MULTILABEL, 4)
+        targets = multilabel.collate_targets([[ImageClassificationLabelManifest(0), ImageClassificationLabelManifest(3)], [], [ImageClassificationLabelManifest(1)]])
+        assert targets.tolist() == [[1, 0, 0, 1], [0, 0, 0, 0], [0, 1, 0, 0]]
+
+        multiclass = CollateFactory.create(DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS)
+        assert multiclass.collate_targets([[ImageClassificationLabelManifest(2)], []]).tolist() == [2, -1]
+
+    def test_caption(self):
+        collate = CollateFactory.create(DatasetTypes.IMAGE_CAPTION)
+        targets = collate.collate_targets([[ImageCaptionLabelManifest('a'), ImageCaptionLabelManifest('b')], [ImageCaptionLabelManifest('c')]])
+        assert targets['captions'] == ['a', 'b', 'c']
+        assert targets['image_index'].tolist() == [0, 0, 1]
+
+    def test_matting_is_padded(self):
+        collate = CollateFactory.create(DatasetTypes.IMAGE_MATTING)
+        targets = collate.collate_targets([np.full((2, 3), 7, dtype=np.uint8), np.ones((4, 1), dtype=np.uint8)])
+        assert targets['mattings'].shape == (2, 4, 3)
+        assert targets['sizes'].tolist() == [[2, 3], [4, 1]]
+        assert targets['mattings'][0].sum() == 42 and targets['mattings'][1].sum() == 4
+
+    def test_images_of_same_shape_are_stacked(self):
+        collate = CollateFactory.create(DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS, pin_memory=True)
+        images, _, _ = collate([(torch.zeros(3, 4, 4), [ImageClassificationLabelManifest(0)], '0'), (torch.ones(3, 4, 4), [ImageClassificationLabelManifest(1)], '1')])
+        assert images.shape == (2, 3, 4, 4)
+
+    def test_unsupported_type(self):
+        with pytest.raises(ValueError):
+            CollateFactory.create('unknown')
+
+    def test_key_value_pair(self):
+        manifest = coco_dict_to_manifest(DatasetTypes.KEY_VALUE_PAIR, coco_database[DatasetTypes.KEY_VALUE_PAIR][0], schema_database[0])
+        collate = CollateFactory.create(DatasetTypes.KEY_VALUE_PAIR)
+        batch = [(['a'] * len(ann.img_ids), ann, str(i)) for i, ann in enumerate(manifest.annotations)]
+        images, targets, _ = collate(batch)
+
+        assert len(images) == len(targets['image_index']) == sum(len(ann.img_ids) for ann in manifest.annotations)
+        assert targets['fields'] == [ann.fields for ann in manifest.annotations]
+        assert targets['text'] == [ann.text for ann in manifest.annotations]
+
+    @pytest.mark.parametrize("data_type, coco_dicts", [(data_type, coco_database[data_type]) for data_type in DatasetTypes
+                                                       if data_type not in [DatasetTypes.MULTITASK, DatasetTypes.KEY_VALUE_PAIR, DatasetTypes.IMAGE_MATTING]])
+    def test_data_loader(self, data_type, coco_dicts):
+        coco_dict = coco_dicts[0]
+        manifest = coco_dict_to_manifest(data_type, coco_dict)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tdir = pathlib.Path(temp_dir)
+            for image in manifest.images:
+                image.img_path = image.img_path.split('@')[1] if '@' in image.img_path else image.img_path
+                image.img_path = tdir / image.img_path
+                os.makedirs(image.img_path.parent, exist_ok=True)
+                image.img_path = image.img_path.as_posix()
+                Image.new(mode="RGB", size=(20, 20)).save(image.img_path)
+
+            (tdir / 'test.json').write_text(json.dumps(coco_dict))
+            dataset_info = DatasetInfo({'name': 'test', 'type': data_type.name, 'root_folder': tdir.as_posix(), 'format': 'coco', 'train': {'index_path': 'test.json'}})
+            dataset = TorchDataset(VisionDataset(dataset_info, manifest))
+
+            loader = torch.utils.data.DataLoader(dataset, batch_size=len(dataset), collate_fn=create_collate_fn(dataset))
+            images, _, idx_strs = next(iter(loader))
+            assert len(images) == len(idx_strs) == len(dataset)
@@ -0,0 +1,143 @@
+import pathlib
+import tempfile
+import zipfile
+
+import pytest
+import torch
+
+from vision_datasets.common.dataset.base_dataset import BaseDataset
+from vision_datasets.torch import LocalityAwareDistributedSampler, TorchIterableDataset
+from vision_datasets.torch.locality import locality_blocks, locality_order, split_image_path
+
+
+class FakePathDataset(BaseDataset):
+    def __init__(self, paths):
+        super().__init__(None)
+        self.paths = paths
+
+    @property
+    def categories(self):
+        return []
+
+    def get_raw_image_path(self, index):
+        return self.paths[index]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _get_single_item(self, index):
+        return index, None, str(index)
+
+    def close(self):
+        pass
+
+
+def _stream(dataset):
+    return [image for image, _, _ in dataset]
+
+
+class TestLocality:
+    def test_split_image_path(self):
+        assert split_image_path('a/b.zip@c/1.jpg') == ('a/b.zip', 'c/1.jpg')
+        assert split_image_path('a/b/1.jpg') == ('a/b', '1.jpg')
+        assert split_image_path('https://x.com/a@b/1.jpg') == ('https://x.com/a@b', '1.jpg')
+
+    def test_zip_entries_are_ordered_by_offset(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            zip_path = (pathlib.Path(temp_dir) / 'images.zip').as_posix()
+            with zipfile.ZipFile(zip_path, 'w') as zf:
+                for name in ['b.jpg', 'c.jpg', 'a.jpg']:
+                    zf.writestr(name, b'0')
+
+            dataset = FakePathDataset([f'{zip_path}@a.jpg', 'folder/2.jpg', f'{zip_path}@b.jpg', None, 'folder/1.jpg', f'{zip_path}@c.jpg'])
+            order = locality_order(dataset)
+
+        # entries of the zip in the order they are stored, then files of the folder by name
+        assert order == [3, 2, 5, 0, 4, 1]
+
+
+class TestTorchIterableDataset:
+    paths = [f'shard_{i % 3}/{i}.jpg' for i in range(50)]
+
+    def test_sequential_order_without_shuffle(self):
+        dataset = TorchIterableDataset(FakePathDataset(self.paths))
+        assert _stream(dataset) == locality_order(FakePathDataset(self.paths))
+        assert len(dataset) == 50
+
+    @pytest.mark.parametrize('shuffle', [False, True])
+    def test_ranks_partition_samples(self, shuffle):
+        world_size = 3
+        streams = [_stream(TorchIterableDataset(FakePathDataset(self.paths), shuffle=shuffle, block_size=4, shuffle_buffer_size=5, rank=r, world_size=world_size))
+                   for r in range(world_size)]
+
+        assert [len(x) for x in streams] == [17, 17, 17]
+        assert set(x for stream in streams for x in stream) == set(range(50))
+
+    def test_shuffle_is_deterministic_per_epoch(self):
+        dataset = TorchIterableDataset(FakePathDataset(self.paths), shuffle=True, block_size=4, shuffle_buffer_size=5, seed=1)
+        epoch_0 = _stream(dataset)
+        dataset.set_epoch(1)
+        epoch_1 = _stream(dataset)
+
+        assert sorted(epoch_0) == sorted(epoch_1) == list(range(50))
+        assert epoch_0 != epoch_1
+        dataset.set_epoch(0)
+        assert _stream(dataset) == epoch_0
+        assert _stream(TorchIterableDataset(FakePathDataset(self.paths), shuffle=True, block_size=4, shuffle_buffer_size=5, seed=1)) == epoch_0
+
+    def test_resume_from_offset(self):
+        dataset = TorchIterableDataset(FakePathDataset(self.paths), shuffle=True, block_size=4)
+        dataset.set_epoch(2)
+        full = _stream(dataset)
+
+        dataset.load_state_dict({'epoch': 2, 'offset': 20})
+        assert dataset.state_dict() == {'epoch': 2, 'offset': 20}
+        assert len(dataset) == 30
+        assert _stream(dataset) == full[20:]
+
+        with pytest.raises(ValueError):
+            dataset.set_epoch(3, 51)
+
+    def test_data_loader_order_does_not_depend_on_workers(self):
+        dataset = TorchIterableDataset(FakePathDataset(self.paths), shuffle=True, block_size=4, batch_size=4)
+        expected = dataset.rank_indices()
+        for num_workers in [0, 2]:
+            loader = torch.utils.data.DataLoader(dataset, batch_size=4, num_workers=num_workers, collate_fn=lambda batch: [x[0] for x in batch])
+            assert [x for batch in loader for x in batch] == expected
+
+
+class TestLocalityAwareDistributedSampler:
+    paths = [f'shard_{i % 3}/{i:02d}.jpg' for i in range(50)]
+
+    @pytest.mark.parametrize('drop_last, n_per_rank', [(False, 17), (True, 16)])
+    def test_partition_like_distributed_sampler(self, drop_last, n_per_rank):
+        dataset = FakePathDataset(self.paths)
+        samplers = [LocalityAwareDistributedSampler(dataset, num_replicas=3, rank=r, drop_last=drop_last, block_size=4) for r in range(3)]
+        parts = [list(x) for x in samplers]
+
+        assert [len(x) for x in parts] == [len(x) for x in samplers] == [n_per_rank] * 3
+        merged = [x for part in parts for x in part]
+        if drop_last:
+            assert len(set(merged)) == 48
+        else:
+            assert set(merged) == set(range(50))
+
+    def test_blocks_stay_within_containers(self):
+        dataset = FakePathDataset(self.paths)
+        sampler = LocalityAwareDistributedSampler(dataset, num_replicas=1, rank=0, block_size=4, seed=3)
+        indices = list(sampler)
+
+        blocks = locality_blocks(dataset, 4)
+        assert len(blocks) == 14
+        assert sorted(indices) == list(range(50))
+        containers = [x % 3 for x in indices]
+        assert sum(a != b for a, b in zip(containers, containers[1:])) <= len(blocks) - 1
+
+    def test_seeded_per_epoch(self):
+        sampler = LocalityAwareDistributedSampler(FakePathDataset(self.paths), num_replicas=1, rank=0, block_size=4)
+        epoch_0 = list(sampler)
+        assert list(sampler) == epoch_0
+        sampler.set_epoch(1)
+        assert list(sampler) != epoch_0
+        assert sorted(list(sampler)) == sorted(epoch_0) == list(range(50))
+        assert list(LocalityAwareDistributedSampler(FakePathDataset(self.paths), num_replicas=1, rank=0, shuffle=False)) == locality_order(FakePathDataset(self.paths))
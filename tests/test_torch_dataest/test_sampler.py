@@ -0,0 +1,92 @@
+import pytest
+
+from vision_datasets.torch import AspectRatioBucketBatchSampler, ImageReuseDistributedSampler
+
+
+class FakeSizedDataset:
+    def __init__(self, sizes):
+        self.sizes = sizes
+
+    def get_image_size(self, index):
+        return self.sizes[index]
+
+    def __len__(self):
+        return len(self.sizes)
+
+
+# 10 landscape images, 6 portrait images
+SIZES = [(40, 30)] * 5 + [(30, 40)] * 3 + [(64, 32)] * 5 + [(20, 60)] * 3
+
+
+class TestAspectRatioBucketBatchSampler:
+    def test_batches_do_not_mix_buckets(self):
+        sampler = AspectRatioBucketBatchSampler(FakeSizedDataset(SIZES), batch_size=4, num_buckets=2, num_replicas=1, rank=0)
+        batches = list(sampler)
+
+        landscape = {i for i, (w, h) in enumerate(SIZES) if w > h}
+        assert len(batches) == len(sampler) == 5
+        assert all(set(batch) <= landscape or not set(batch) & landscape for batch in batches)
+        assert sorted(i for batch in batches for i in batch) == list(range(16))
+
+    def test_drop_last(self):
+        sampler = AspectRatioBucketBatchSampler(FakeSizedDataset(SIZES), batch_size=4, num_buckets=2, drop_last=True, num_replicas=1, rank=0)
+        batches = list(sampler)
+        assert len(batches) == len(sampler) == 3
+        assert all(len(batch) == 4 for batch in batches)
+
+    @pytest.mark.parametrize('drop_last, n_batches', [(False, 3), (True, 1)])
+    def test_replicas_get_the_same_number_of_batches(self, drop_last, n_batches):
+        samplers = [AspectRatioBucketBatchSampler(FakeSizedDataset(SIZES), batch_size=4, num_buckets=2, drop_last=drop_last, num_replicas=2, rank=r) for r in range(2)]
+        batches = [list(x) for x in samplers]
+
+        assert [len(x) for x in batches] == [len(x) for x in samplers] == [n_batches] * 2
+        samples = [{i for batch in x for i in batch} for x in batches]
+        if drop_last:
+            assert not samples[0] & samples[1]
+        else:
+            assert samples[0] | samples[1] == set(range(16))
+
+    def test_seeded_per_epoch(self):
+        sampler = AspectRatioBucketBatchSampler(FakeSizedDataset(SIZES), batch_size=2, num_buckets=3, num_replicas=1, rank=0)
+        epoch_0 = list(sampler)
+        assert list(sampler) == epoch_0
+        sampler.set_epoch(1)
+        assert list(sampler) != epoch_0
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            AspectRatioBucketBatchSampler(FakeSizedDataset(SIZES), batch_size=0)
+        with pytest.raises(ValueError):
+            AspectRatioBucketBatchSampler(FakeSizedDataset(SIZES), batch_size=2, num_replicas=2, rank=2)
+
+
+class FakeReuseOrderedDataset:
+    def __init__(self, order):
+        self.order = order
+
+    def image_reuse_order(self):
+        return self.order
+
+    def __len__(self):
+        return len(self.order)
+
+
+class TestImageReuseDistributedSampler:
+    ORDER = [4, 1, 2, 3, 0, 7, 5, 6]
+
+    def test_samples_of_blocks_stay_in_reuse_order(self):
+        sampler = ImageReuseDistributedSampler(FakeReuseOrderedDataset(self.ORDER), num_replicas=1, rank=0, block_size=3)
+        blocks = [self.ORDER[i:i + 3] for i in range(0, 8, 3)]
+        for epoch in range(3):
+            sampler.set_epoch(epoch)
+            indices = list(sampler)
+            assert sorted(indices) == list(range(8))
+            for block in blocks:
+                start = indices.index(block[0])
+                assert indices[start:start + len(block)] == block
+
+        assert list(ImageReuseDistributedSampler(FakeReuseOrderedDataset(self.ORDER), num_replicas=1, rank=0, shuffle=False)) == self.ORDER
+
+    def test_replicas_split_blocks(self):
+        samplers = [ImageReuseDistributedSampler(FakeReuseOrderedDataset(self.ORDER), num_replicas=2, rank=r, shuffle=False, block_size=2) for r in range(2)]
+        assert [list(x) for x in samplers] == [self.ORDER[:4], self.ORDER[4:]]
@@ -108,3 +108,16 @@ class TestTorchDataset:
 
         dataset.transform = lambda x: x
         assert dataset.transform(1, 2) == (1, 2)
+
+    def test_set_epoch_is_forwarded(self):
+        class EpochDataset(FakeDataset):
+            epoch = None
+
+            def set_epoch(self, epoch):
+                self.epoch = epoch
+
+        dataset = TorchDataset(EpochDataset())
+        dataset.set_epoch(3)
+        assert dataset.dataset.epoch == 3
+        # datasets without epochs are left alone
+        TorchDataset(FakeDataset()).set_epoch(3)
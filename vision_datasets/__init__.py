@@ -1,17 +1,37 @@
 from .common import AnnotationFormats, BalancedInstanceWeightsFactory, BBoxFormat, CocoDictGeneratorFactory, CocoManifestAdaptorFactory, DataManifestFactory, DatasetHub, DatasetInfo, \
     DatasetManifest, DatasetRegistry, DatasetTypes, ImageDataManifest, ImageLabelManifest, ImageLabelWithCategoryManifest, ManifestMergeStrategyFactory, SampleStrategyFactory, \
     SpawnFactory, SplitFactory, SupportedOperationsByDataType, Usages, VisionDataset
-from .image_caption import ImageCaptionLabelManifest
-from .image_classification import ImageClassificationLabelManifest
-from .image_matting import ImageMattingLabelManifest
-from .image_object_detection import ImageObjectDetectionLabelManifest
-from .image_regression import ImageRegressionLabelManifest
-from .image_text_matching import ImageTextMatchingLabelManifest
-from .key_value_pair import KeyValuePairLabelManifest
-from .multi_task import MultitaskMerge
-from .text_2_image_retrieval import Text2ImageRetrievalLabelManifest
-from .visual_question_answering import VisualQuestionAnsweringLabelManifest
-from .visual_object_grounding import VisualObjectGroundingLabelManifest
+import importlib
+
+# Task modules are imported on first access, so that "import vision_datasets" does not pay for all of them. Factories import them on demand as well, see common/factory/deferred_registration.py
+_LAZY_ATTRIBUTES = {
+    'ImageCaptionLabelManifest': 'image_caption',
+    'ImageClassificationLabelManifest': 'image_classification',
+    'ImageMattingLabelManifest': 'image_matting',
+    'ImageObjectDetectionLabelManifest': 'image_object_detection',
+    'ImageRegressionLabelManifest': 'image_regression',
+    'ImageTextMatchingLabelManifest': 'image_text_matching',
+    'KeyValuePairLabelManifest': 'key_value_pair',
+    'MultitaskMerge': 'multi_task',
+    'Text2ImageRetrievalLabelManifest': 'text_2_image_retrieval',
+    'VisualQuestionAnsweringLabelManifest': 'visual_question_answering',
+    'VisualObjectGroundingLabelManifest': 'visual_object_grounding',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 __all__ = ['Usages', 'DatasetTypes', 'AnnotationFormats', 'BBoxFormat', 'DatasetInfo',
            'DatasetManifest', 'ImageDataManifest', 'ImageLabelManifest', 'ImageLabelWithCategoryManifest',
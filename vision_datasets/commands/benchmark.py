@@ -0,0 +1,384 @@
+"""
+Benchmark data loading on synthetic datasets of each data type, stored in a local folder, a stored (uncompressed) zip, urls served by a local http server, or a base64 TSV
+"""
+
+import argparse
+import base64
+import contextlib
+import functools
+import http.server
+import io
+import json
+import pathlib
+import sys
+import tempfile
+import threading
+import time
+import typing
+import zipfile
+
+import numpy as np
+from PIL import Image
+
+from vision_datasets.common import CocoManifestAdaptorFactory, DatasetInfo, DatasetTypes, FileReader, VisionDataset
+from vision_datasets.common.data_reader.image_loader import ORIENTATION_EXIF_TAG
+
+from .utils import enum_type, set_up_cmd_logger
+
+logger = set_up_cmd_logger(__name__)
+
+STORAGES = ['folder', 'zip', 'url', 'tsv']
+STAGES = ['read', 'decode', 'exif', 'convert', 'transform']
+BENCHMARKED_TYPES = [data_type for data_type in DatasetTypes if data_type != DatasetTypes.MULTITASK]
+
+_N_CATEGORIES = 10
+_KVP_SCHEMA = {
+    'name': 'synthetic',
+    'description': 'Synthetic schema for benchmarking',
+    'fieldSchema': {
+        'category': {'type': 'string', 'description': 'category of the image', 'classes': {f'class_{i}': {'description': f'class {i}'} for i in range(_N_CATEGORIES)}},
+        'objects': {'type': 'array', 'description': 'objects in the image', 'items': {'type': 'string', 'description': 'object name', 'includeGrounding': True}}
+    }
+}
+
+
+class SyntheticDataset:
+    """
+    Synthetic dataset written to root_dir: JPEG images (every 4th with an EXIF orientation transposing it), annotations in coco format, masks for matting.
+    """
+
+    def __init__(self, data_type: DatasetTypes, root_dir: pathlib.Path, storage: str, n_images: int, image_size: typing.Tuple[int, int] = (640, 480), seed: int = 0):
+        if storage not in STORAGES:
+            raise ValueError(f'storage must be one of {STORAGES}, got {storage}.')
+        if data_type not in BENCHMARKED_TYPES:
+            raise ValueError(f'Synthetic dataset is not supported for {data_type}.')
+
+        self.data_type = data_type
+        self.root_dir = pathlib.Path(root_dir)
+        self.storage = storage
+        self.n_images = n_images
+        self.image_size = image_size
+        self._rng = np.random.default_rng(seed)
+        self.coco_path = self.root_dir / 'coco.json'
+        self.tsv_path = self.root_dir / 'images.tsv'
+        self._write()
+
+    @property
+    def schema(self):
+        return _KVP_SCHEMA if self.data_type == DatasetTypes.KEY_VALUE_PAIR else None
+
+    def dataset_info(self, url_or_root_dir: str = None) -> DatasetInfo:
+        info = {'name': f'synthetic-{self.data_type.name.lower()}', 'type': self.data_type.name, 'root_folder': url_or_root_dir or self.root_dir.as_posix(), 'format': 'coco',
+                'train': {'index_path': self.coco_path.name}}
+        if self.schema:
+            info['schema'] = self.schema
+        return DatasetInfo(info)
+
+    def create_manifest(self, url_or_root_dir: str = None):
+        adaptor = CocoManifestAdaptorFactory.create(self.data_type, self.schema) if self.schema else CocoManifestAdaptorFactory.create(self.data_type)
+        return adaptor.create_dataset_manifest(self.coco_path.name, url_or_root_dir or self.root_dir.as_posix())
+
+    def _write(self):
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        width, height = self.image_size
+        images, annotations = [], []
+        files = {}
+        for i in range(self.n_images):
+            image_id = i + 1
+            file_name = f'images/{i}.jpg'
+            files[file_name] = self._encode_image(rotated=i % 4 == 3)
+            # sizes in coco are the ones of the loaded image, transposed by the EXIF orientation
+            img_w, img_h = (height, width) if i % 4 == 3 else (width, height)
+            images.append({'id': image_id, 'file_name': file_name, 'width': img_w, 'height': img_h})
+            for annotation in self._annotations(image_id, img_w, img_h):
+                if self.data_type == DatasetTypes.IMAGE_MATTING:
+                    files[annotation['label']] = self._encode_mask(img_w, img_h)
+                annotations.append(dict(annotation, id=len(annotations) + 1))
+
+        coco = {'images': images, 'annotations': annotations}
+        if self.data_type in (DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS, DatasetTypes.IMAGE_CLASSIFICATION_MULTILABEL, DatasetTypes.IMAGE_OBJECT_DETECTION):
+            coco['categories'] = [{'id': i + 1, 'name': f'class_{i}'} for i in range(_N_CATEGORIES)]
+
+        if self.storage == 'zip':
+            with zipfile.ZipFile(self.root_dir / 'images.zip', 'w', zipfile.ZIP_STORED) as zf:
+                for name, data in files.items():
+                    zf.writestr(name, data)
+            for entry in images + [x for x in annotations if 'label' in x]:
+                entry['zip_file'] = 'images.zip'
+        else:
+            for name, data in files.items():
+                (self.root_dir / name).parent.mkdir(parents=True, exist_ok=True)
+                (self.root_dir / name).write_bytes(data)
+
+        if self.storage == 'tsv':
+            with open(self.tsv_path, 'w', encoding='utf-8') as f:
+                for image in images:
+                    labels = [{k: v for k, v in x.items() if k not in ('id', 'image_id')} for x in annotations if x.get('image_id') == image['id']]
+                    f.write(f'{image["id"]}\t{json.dumps(labels)}\t{base64.b64encode(files[image["file_name"]]).decode("utf-8")}\n')
+
+        self.coco_path.write_text(json.dumps(coco))
+
+    def _encode_image(self, rotated: bool) -> bytes:
+        width, height = self.image_size
+        # low resolution noise upscaled, compressing like natural images rather than like noise
+        pixels = self._rng.integers(0, 256, (max(1, height // 16), max(1, width // 16), 3), dtype=np.uint8)
+        image = Image.fromarray(pixels).resize((width, height), Image.BILINEAR)
+        stream = io.BytesIO()
+        if rotated:
+            exif = Image.Exif()
+            exif[ORIENTATION_EXIF_TAG] = 6
+            image.save(stream, 'JPEG', quality=90, exif=exif)
+        else:
+            image.save(stream, 'JPEG', quality=90)
+        return stream.getvalue()
+
+    def _encode_mask(self, width, height) -> bytes:
+        stream = io.BytesIO()
+        Image.fromarray(self._rng.integers(0, 2, (height, width), dtype=np.uint8) * 255).save(stream, 'PNG')
+        return stream.getvalue()
+
+    def _annotations(self, image_id, width, height) -> typing.List[dict]:
+        rng = self._rng
+        n_labels = int(rng.integers(1, 4))
+
+        def box():
+            left, top = rng.integers(0, width // 2), rng.integers(0, height // 2)
+            return [int(left), int(top), int(rng.integers(1, width - left)), int(rng.integers(1, height - top))]
+
+        data_type = self.data_type
+        if data_type == DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS:
+            return [{'image_id': image_id, 'category_id': int(rng.integers(1, _N_CATEGORIES + 1))}]
+        if data_type == DatasetTypes.IMAGE_CLASSIFICATION_MULTILABEL:
+            return [{'image_id': image_id, 'category_id': int(c)} for c in rng.choice(np.arange(1, _N_CATEGORIES + 1), n_labels, replace=False)]
+        if data_type == DatasetTypes.IMAGE_OBJECT_DETECTION:
+            return [{'image_id': image_id, 'category_id': int(rng.integers(1, _N_CATEGORIES + 1)), 'bbox': box()} for _ in range(n_labels)]
+        if data_type == DatasetTypes.IMAGE_CAPTION:
+            return [{'image_id': image_id, 'caption': f'caption {k} of image {image_id}.'} for k in range(n_labels)]
+        if data_type == DatasetTypes.IMAGE_TEXT_MATCHING:
+            return [{'image_id': image_id, 'text': f'text {k} of image {image_id}.', 'match': int(rng.integers(0, 2))} for k in range(n_labels)]
+        if data_type == DatasetTypes.IMAGE_MATTING:
+            return [{'image_id': image_id, 'label': f'masks/{image_id}.png'}]
+        if data_type == DatasetTypes.IMAGE_REGRESSION:
+            return [{'image_id': image_id, 'target': float(rng.random())}]
+        if data_type == DatasetTypes.TEXT_2_IMAGE_RETRIEVAL:
+            return [{'image_id': image_id, 'query': f'query {k} of image {image_id}'} for k in range(n_labels)]
+        if data_type == DatasetTypes.VISUAL_QUESTION_ANSWERING:
+            return [{'image_id': image_id, 'question': f'question {k}?', 'answer': f'answer {k}'} for k in range(n_labels)]
+        if data_type == DatasetTypes.VISUAL_OBJECT_GROUNDING:
+            return [{'image_id': image_id, 'question': 'where are the objects?', 'answer': 'objects are here',
+                     'groundings': [{'id': 1, 'text': 'objects', 'text_span': [0, 7], 'bboxes': [box() for _ in range(n_labels)]}]}]
+        if data_type == DatasetTypes.KEY_VALUE_PAIR:
+            fields = {'category': {'value': f'class_{int(rng.integers(0, _N_CATEGORIES))}'}, 'objects': {'value': [{'value': 'object', 'groundings': [box()]} for _ in range(n_labels)]}}
+            return [{'image_ids': [image_id], 'fields': fields}]
+
+        raise ValueError(f'Synthetic annotations are not supported for {data_type}.')
+
+
+@contextlib.contextmanager
+def serve_directory(root_dir: pathlib.Path):
+    """
+    Serve root_dir over http on localhost in a background thread, yielding the url of root_dir
+    """
+
+    class QuietHandler(http.server.SimpleHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=str(root_dir)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def default_transform(image: Image.Image):
+    return np.asarray(image.resize((224, 224), Image.BILINEAR))
+
+
+def _collate_as_list(batch):
+    return batch
+
+
+def peak_rss_mb() -> typing.Dict[str, float]:
+    """
+    Peak resident set size of this process and of its terminated children (e.g., DataLoader workers), in MB, over the lifetime of the process: measures after the first one of a process
+    only grow, see run_benchmark_in_new_process. Empty where the resource module is unavailable
+    """
+
+    try:
+        import resource
+    except ImportError:
+        return {}
+
+    # ru_maxrss is in bytes on macOS, in KB elsewhere
+    scale = 1 / (1024 * 1024) if sys.platform == 'darwin' else 1 / 1024
+    return {'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale, 'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale}
+
+
+def measure_stages(read_bytes: typing.Callable[[int], bytes], n_images: int, transform=default_transform) -> typing.Dict[str, float]:
+    """
+    Mean time in ms of each stage of loading an image as VisionDataset does: read the bytes, decode, apply EXIF orientation, convert to RGB, then transform
+
+    Args:
+        read_bytes: function reading the bytes of the i-th image
+        n_images (int): number of images to load
+        transform: transform of the loaded image
+    """
+
+    totals = dict.fromkeys(STAGES, 0.0)
+    for i in range(n_images):
+        start = time.perf_counter()
+        data = read_bytes(i)
+        read_end = time.perf_counter()
+
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        decode_end = time.perf_counter()
+
+        orientation = image.getexif().get(ORIENTATION_EXIF_TAG)
+        if orientation and orientation >= 5:
+            image = image.transpose(Image.TRANSPOSE)
+        exif_end = time.perf_counter()
+
+        image = image.convert('RGB')
+        convert_end = time.perf_counter()
+
+        transform(image)
+        end = time.perf_counter()
+
+        for stage, duration in zip(STAGES, (read_end - start, decode_end - read_end, exif_end - decode_end, convert_end - exif_end, end - convert_end)):
+            totals[stage] += duration
+
+    return {stage: total * 1000 / max(n_images, 1) for stage, total in totals.items()}
+
+
+def _images_per_second(n_images, seconds):
+    return n_images / seconds if seconds > 0 else float('inf')
+
+
+def benchmark_vision_dataset(dataset: VisionDataset) -> float:
+    """
+    Images per second of reading all samples of the dataset sequentially
+    """
+
+    start = time.perf_counter()
+    for i in range(len(dataset)):
+        dataset[i]
+    return _images_per_second(len(dataset), time.perf_counter() - start)
+
+
+def benchmark_torch_dataset(dataset: VisionDataset, num_workers: int, batch_size: int, transform=default_transform) -> float:
+    """
+    Images per second of reading all samples of the dataset through a DataLoader of TorchDataset with num_workers workers, worker start-up included
+    """
+
+    import torch
+    from vision_datasets.torch import TorchDataset
+
+    torch_dataset = TorchDataset(dataset, transform if dataset.dataset_info.type != DatasetTypes.KEY_VALUE_PAIR else None)
+    loader = torch.utils.data.DataLoader(torch_dataset, batch_size=batch_size, num_workers=num_workers, collate_fn=_collate_as_list)
+    start = time.perf_counter()
+    n_samples = sum(len(batch) for batch in loader)
+    return _images_per_second(n_samples, time.perf_counter() - start)
+
+
+def run_benchmark(data_type: DatasetTypes, storage: str, n_images: int, work_dir: pathlib.Path, image_size=(640, 480), num_workers: typing.Sequence[int] = (0,), batch_size: int = 16,
+                  n_stage_images: int = 50, seed: int = 0) -> dict:
+    """
+    Benchmark a synthetic dataset of data_type stored in storage, see SyntheticDataset. TSV is read line by line as a whole, so only stage costs and sequential throughput are measured for it.
+
+    Returns:
+        dict of the settings and the measures: manifest load time in seconds, images/sec of VisionDataset and of TorchDataset per number of workers, stage costs in ms, peak RSS in MB of
+        the process since it started, see peak_rss_mb
+    """
+
+    synthetic = SyntheticDataset(data_type, work_dir, storage, n_images, image_size, seed)
+    result = {'data_type': data_type.name, 'storage': storage, 'n_images': n_images, 'image_size': list(image_size)}
+    n_stage_images = min(n_stage_images, n_images)
+
+    if storage == 'tsv':
+        with open(synthetic.tsv_path, encoding='utf-8') as f:
+            lines = f.readlines()
+
+        result['stage_ms'] = measure_stages(lambda i: base64.b64decode(lines[i].rstrip('\n').split('\t')[2]), n_stage_images)
+        start = time.perf_counter()
+        with open(synthetic.tsv_path, encoding='utf-8') as f:
+            for line in f:
+                img_id, labels, b64_image = line.rstrip('\n').split('\t')
+                json.loads(labels)
+                Image.open(io.BytesIO(base64.b64decode(b64_image))).convert('RGB')
+        result['sequential_images_per_s'] = _images_per_second(n_images, time.perf_counter() - start)
+        result['peak_rss_mb'] = peak_rss_mb()
+        return result
+
+    with serve_directory(work_dir) if storage == 'url' else contextlib.nullcontext(None) as url:
+        start = time.perf_counter()
+        manifest = synthetic.create_manifest(url)
+        result['manifest_load_s'] = time.perf_counter() - start
+
+        dataset = VisionDataset(synthetic.dataset_info(url), manifest, 'relative')
+        file_reader = FileReader()
+
+        def read_bytes(i):
+            with file_reader.open(manifest.images[i].img_path, 'rb') as f:
+                return f.read()
+
+        result['stage_ms'] = measure_stages(read_bytes, n_stage_images)
+        file_reader.close()
+        result['vision_dataset_images_per_s'] = benchmark_vision_dataset(dataset)
+        try:
+            result['torch_dataset_images_per_s'] = {n_workers: benchmark_torch_dataset(dataset, n_workers, batch_size) for n_workers in num_workers}
+        except ImportError:
+            logger.warning('torch is not installed, TorchDataset is not benchmarked.')
+        dataset.close()
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def run_benchmark_in_new_process(*args, **kwargs) -> dict:
+    """
+    run_benchmark in a new process, so that the peak RSS reported is the one of this benchmark only, not of the ones run before in this process
+    """
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(run_benchmark, *args, **kwargs).result()
+
+
+def main():
+    parser = argparse.ArgumentParser('Benchmark data loading on synthetic datasets')
+    parser.add_argument('--data_types', '-t', nargs='+', type=enum_type(DatasetTypes), choices=BENCHMARKED_TYPES, default=[DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS,
+                                                                                                                           DatasetTypes.IMAGE_OBJECT_DETECTION], help='Data types to benchmark.')
+    parser.add_argument('--storages', '-s', nargs='+', choices=STORAGES, default=STORAGES, help='Storages of the images.')
+    parser.add_argument('--n_images', '-n', type=int, default=500, help='Number of images of each synthetic dataset.')
+    parser.add_argument('--image_size', type=int, nargs=2, default=[640, 480], metavar=('WIDTH', 'HEIGHT'), help='Size of the images.')
+    parser.add_argument('--num_workers', '-w', type=int, nargs='+', default=[0, 4], help='Numbers of DataLoader workers to benchmark TorchDataset with.')
+    parser.add_argument('--batch_size', '-b', type=int, default=32, help='DataLoader batch size.')
+    parser.add_argument('--work_dir', type=pathlib.Path, default=None, help='Folder to write synthetic datasets to, a temporary folder if not provided.')
+    parser.add_argument('--output', '-o', type=pathlib.Path, default=None, help='Json file to write the results to.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the synthetic datasets.')
+
+    args = parser.parse_args()
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = args.work_dir or pathlib.Path(temp_dir)
+        for data_type in args.data_types:
+            for storage in args.storages:
+                logger.info(f'Benchmarking {data_type.name} stored in {storage}...')
+                result = run_benchmark_in_new_process(data_type, storage, args.n_images, work_dir / f'{data_type.name.lower()}_{storage}', args.image_size, args.num_workers, args.batch_size,
+                                                      seed=args.seed)
+                logger.info(json.dumps(result))
+                results.append(result)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
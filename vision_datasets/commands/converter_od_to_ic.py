@@ -11,7 +11,7 @@ import shutil
 from vision_datasets.common import CocoDictGeneratorFactory, DatasetHub, DatasetTypes
 from vision_datasets.image_object_detection import DetectionAsClassificationByCroppingDataset
 
-from .utils import add_args_to_locate_dataset, get_or_generate_data_reg_json_and_usages, set_up_cmd_logger, write_to_json_file_utf8
+from .utils import add_args_to_locate_dataset, get_or_generate_data_reg_json_and_usages, set_up_cmd_logger
 
 logger = set_up_cmd_logger(__name__)
 
@@ -26,6 +26,7 @@ def create_arg_parser():
                         help='lower/upper bounds of relative ratio wrt box width and height that a box can shift, during cropping, e.g., "-0.3/0.1"')
     parser.add_argument('-np', '--n_copies', type=int, required=False, default=1, help='number of copies per bbox')
     parser.add_argument('-s', '--rnd_seed', type=int, required=False, help='random see for box expansion/shrink/shifting.', default=0)
+    parser.add_argument('-nw', '--num_workers', type=int, required=False, default=1, help='number of processes cropping images of a usage, usages are converted one after another if greater than 1')
 
     return parser
 
@@ -44,11 +45,10 @@ def process_usage(params):
         raise ValueError(f'Data type must be {DatasetTypes.IMAGE_OBJECT_DETECTION}')
     logger.info(f'start conversion for {args.name}...')
     ic_dataset = DetectionAsClassificationByCroppingDataset(dataset, aug_params)
-    ic_manifest = ic_dataset.generate_manifest(dir=str(usage), n_copies=args.n_copies)
+    ic_manifest = ic_dataset.generate_manifest(dir=str(usage), n_copies=args.n_copies, num_workers=args.num_workers)
 
     coco_gen = CocoDictGeneratorFactory.create(DatasetTypes.IMAGE_CLASSIFICATION_MULTILABEL)
-    coco = coco_gen.run(ic_manifest)
-    write_to_json_file_utf8(coco, args.output_folder / f'{usage}.json')
+    coco_gen.write_coco(ic_manifest, args.output_folder / f'{usage}.json')
     shutil.move(f'{usage}', f'{args.output_folder.as_posix()}/', copy_function=shutil.copytree)
 
 
@@ -76,8 +76,13 @@ def main():
     data_reg_json, usages = get_or_generate_data_reg_json_and_usages(args)
     params = [(args, data_reg_json, aug_params, phase) for phase in usages]
 
-    with multiprocessing.Pool(len(usages)) as pool:
-        pool.map(process_usage, params)
+    if args.num_workers > 1:
+        # processes of the pool cannot start the workers cropping images
+        for param in params:
+            process_usage(param)
+    else:
+        with multiprocessing.Pool(len(usages)) as pool:
+            pool.map(process_usage, params)
 
 
 if __name__ == '__main__':
@@ -1,27 +1,32 @@
 from .constants import AnnotationFormats, BBoxFormat, DatasetTypes, Usages
 from .data_manifest import BalancedInstanceWeightsGenerator, CategoryManifest, DatasetFilter, DatasetManifest, GenerateCocoDictBase, MultiImageCocoDictGenerator, ImageDataManifest, ImageFilter, \
     ImageLabelManifest, ImageLabelWithCategoryManifest, ImageNoAnnotationFilter, ManifestMerger, ManifestSampler, MergeStrategy, MultiImageDatasetSingleTaskMerge, DatasetManifestWithMultiImageLabel, \
-    MultiImageLabelManifest, Operation, RemoveCategories, RemoveCategoriesConfig, SampleBaseConfig, SampleByFewShotConfig, SampleByNumSamples, SampleByNumSamplesConfig, SampleFewShot, \
-    SampleStrategy, SampleStrategyType, SingleTaskMerge, Spawn, SpawnConfig, Split, SplitConfig, SplitWithCategories, WeightsGenerationConfig, CocoManifestWithoutCategoriesAdaptor, \
-    CocoManifestWithCategoriesAdaptor, CocoManifestWithMultiImageLabelAdaptor, CocoManifestAdaptorBase, GenerateStandAloneImageListBase
+    LazyConcatenation, LazyMergedAnnotations, LazyMergedImages, MultiImageLabelManifest, Operation, RemoveCategories, RemoveCategoriesConfig, SampleBaseConfig, SampleByFewShotConfig, \
+    SampleByNumSamples, SampleByNumSamplesConfig, SampleFewShot, SampleStrategy, SampleStrategyType, SingleTaskMerge, Spawn, SpawnConfig, Split, SplitConfig, SplitWithCategories, \
+    WeightsGenerationConfig, CocoManifestWithoutCategoriesAdaptor, CocoManifestWithCategoriesAdaptor, CocoManifestWithMultiImageLabelAdaptor, CocoManifestAdaptorBase, \
+    GenerateStandAloneImageListBase
 from .dataset_info import BaseDatasetInfo, DatasetInfo, DatasetInfoFactory, KeyValuePairDatasetInfo, MultiTaskDatasetInfo
-from .data_reader import DatasetDownloader, FileReader, PILImageLoader
+from .data_reader import ContentManifest, DatasetDownloader, FileReader, LazyFileFetcher, PILImageLoader, StreamingZipFetcher
 from .dataset import VisionDataset
 from .factory import CocoManifestAdaptorFactory, CocoDictGeneratorFactory, ManifestMergeStrategyFactory, DataManifestFactory, SampleStrategyFactory, BalancedInstanceWeightsFactory, SpawnFactory, \
     SplitFactory, StandAloneImageListGeneratorFactory, SupportedOperationsByDataType
 from .dataset_management import DatasetHub, DatasetRegistry
 from .base64_utils import Base64Utils
+from .profiling import StageProfiler, disable_profiling, enable_profiling, get_profiler, load_snapshots, merge_snapshots, to_chrome_trace
 
 __all__ = [
     'Usages', 'DatasetTypes', 'AnnotationFormats', 'BBoxFormat', 'MultiImageDatasetSingleTaskMerge', 'DatasetManifestWithMultiImageLabel', 'MultiImageLabelManifest',
     'ImageLabelManifest', 'ImageLabelWithCategoryManifest', 'ImageDataManifest', 'CategoryManifest', 'DatasetManifest',
     'BalancedInstanceWeightsGenerator', 'WeightsGenerationConfig', 'DatasetFilter', 'ImageFilter', 'ImageNoAnnotationFilter', 'GenerateCocoDictBase', 'MultiImageCocoDictGenerator', 'ManifestMerger',
+    'LazyConcatenation', 'LazyMergedImages', 'LazyMergedAnnotations',
     'MergeStrategy', 'SingleTaskMerge', 'Operation', 'RemoveCategories', 'RemoveCategoriesConfig', 'ManifestSampler', 'SampleBaseConfig', 'SampleByFewShotConfig', 'SampleByNumSamples',
     'SampleByNumSamplesConfig', 'SampleFewShot', 'SampleStrategy', 'SampleStrategyType', 'Spawn', 'SpawnConfig', 'Split', 'SplitConfig', 'SplitWithCategories',
     'CocoManifestWithoutCategoriesAdaptor', 'CocoManifestWithCategoriesAdaptor', 'CocoManifestWithMultiImageLabelAdaptor', 'CocoManifestAdaptorBase', 'GenerateStandAloneImageListBase',
-    'DatasetInfo', 'BaseDatasetInfo', 'KeyValuePairDatasetInfo', 'MultiTaskDatasetInfo', 'DatasetInfoFactory', 'DatasetDownloader', 'FileReader', 'PILImageLoader',
+    'DatasetInfo', 'BaseDatasetInfo', 'KeyValuePairDatasetInfo', 'MultiTaskDatasetInfo', 'DatasetInfoFactory',
+    'ContentManifest', 'DatasetDownloader', 'FileReader', 'LazyFileFetcher', 'PILImageLoader', 'StreamingZipFetcher',
     'VisionDataset',
     'CocoManifestAdaptorFactory', 'CocoDictGeneratorFactory', 'ManifestMergeStrategyFactory', 'DataManifestFactory', 'SampleStrategyFactory', 'BalancedInstanceWeightsFactory', 'SpawnFactory',
     'SplitFactory', 'StandAloneImageListGeneratorFactory', 'SupportedOperationsByDataType',
-    'DatasetHub', 'DatasetRegistry', 'Base64Utils'
+    'DatasetHub', 'DatasetRegistry', 'Base64Utils',
+    'StageProfiler', 'enable_profiling', 'disable_profiling', 'get_profiler', 'load_snapshots', 'merge_snapshots', 'to_chrome_trace'
 ]
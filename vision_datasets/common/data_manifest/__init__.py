@@ -1,13 +1,15 @@
 from .data_manifest import CategoryManifest, DatasetManifest, ImageDataManifest, ImageLabelManifest, ImageLabelWithCategoryManifest, MultiImageLabelManifest, DatasetManifestWithMultiImageLabel
 from .operations import MultiImageDatasetSingleTaskMerge, BalancedInstanceWeightsGenerator, DatasetFilter, GenerateCocoDictBase, MultiImageCocoDictGenerator, GenerateStandAloneImageListBase, \
-    ImageFilter, ImageNoAnnotationFilter, ManifestMerger, ManifestSampler, MergeStrategy, Operation, RemoveCategories, RemoveCategoriesConfig, \
+    ImageFilter, ImageNoAnnotationFilter, LazyMergedAnnotations, LazyMergedImages, ManifestMerger, ManifestSampler, MergeStrategy, Operation, RemoveCategories, RemoveCategoriesConfig, \
     SampleBaseConfig, SampleByFewShotConfig, SampleByNumSamples, SampleByNumSamplesConfig, SampleFewShot, SampleStrategy, SampleStrategyType, SingleTaskMerge, \
     Spawn, SpawnConfig, Split, SplitConfig, SplitWithCategories, WeightsGenerationConfig
+from .lazy_sequence import LazyConcatenation
 from .coco_manifest_adaptor import CocoManifestWithCategoriesAdaptor, CocoManifestWithoutCategoriesAdaptor, CocoManifestAdaptorBase, CocoManifestWithMultiImageLabelAdaptor
 
 __all__ = ["ImageLabelManifest", "ImageLabelWithCategoryManifest", "MultiImageLabelManifest", "ImageDataManifest", "CategoryManifest", "DatasetManifest", "DatasetManifestWithMultiImageLabel",
            "BalancedInstanceWeightsGenerator", "WeightsGenerationConfig", "DatasetFilter", "ImageFilter", "ImageNoAnnotationFilter", "GenerateCocoDictBase", "MultiImageCocoDictGenerator",
-           "GenerateStandAloneImageListBase", "ManifestMerger", "MergeStrategy", "SingleTaskMerge", "MultiImageDatasetSingleTaskMerge", "Operation",
+           "GenerateStandAloneImageListBase", "ManifestMerger", "MergeStrategy", "SingleTaskMerge", "MultiImageDatasetSingleTaskMerge", "LazyMergedImages", "LazyMergedAnnotations",
+           "LazyConcatenation", "Operation",
            "RemoveCategories",
            "RemoveCategoriesConfig", "ManifestSampler", "SampleBaseConfig", "SampleByFewShotConfig", "SampleByNumSamples", "SampleByNumSamplesConfig", "SampleFewShot", "SampleStrategy",
            "SampleStrategyType", "Spawn", "SpawnConfig", "Split", "SplitConfig", "SplitWithCategories",
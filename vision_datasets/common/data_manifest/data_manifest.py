@@ -243,7 +243,7 @@ class DatasetManifestWithMultiImageLabel(ManifestBase):
     including field 'img_ids' to capture indices in images list, and label_data to capture the label.
     """
 
-    def __init__(self, images: List[ImageDataManifest], annotations: List[MultiImageLabelManifest], data_type: str, addtional_info={}):
+    def __init__(self, images: List[ImageDataManifest], annotations: List[MultiImageLabelManifest], data_type: str, addtional_info={}, validate: bool = True):
         """
 
         Args:
@@ -251,15 +251,17 @@ class DatasetManifestWithMultiImageLabel(ManifestBase):
             annotations (list): annotations
             data_type (str) : data type
             additional_info (dict): additional info about this dataset
+            validate (bool): whether to check images and annotations, skip it only for ones valid by construction, e.g., annotations created on access
         """
         if isinstance(data_type, dict):
             raise ValueError("composition type is not supported!")
-        for img in images:
-            if img.labels:
-                raise ValueError(f"labels associated with single image manifest ({img.id}) should not be provided.")
-        for ann in annotations:
-            if not ann.is_negative() and any([img_id < 0 or img_id >= len(images) for img_id in ann.img_ids]):
-                raise ValueError(f"image ids of annotation are out of range, expect 0 to {len(images)-1}, got {ann.img_ids}!")
+        if validate:
+            for img in images:
+                if img.labels:
+                    raise ValueError(f"labels associated with single image manifest ({img.id}) should not be provided.")
+            for ann in annotations:
+                if not ann.is_negative() and any([img_id < 0 or img_id >= len(images) for img_id in ann.img_ids]):
+                    raise ValueError(f"image ids of annotation are out of range, expect 0 to {len(images)-1}, got {ann.img_ids}!")
         super().__init__(addtional_info)
 
         self.images = images
@@ -0,0 +1,66 @@
+import abc
+import bisect
+import collections.abc
+import copy
+import typing
+
+
+class LazyConcatenation(collections.abc.Sequence):
+    """
+    Read-only concatenation of per-source sequences, e.g., images of several manifests, located through a table of source offsets. Items are created on access by _get_from_source.
+    """
+
+    def __init__(self, sources: typing.Sequence, lengths: typing.Iterable[int]):
+        """
+        Args:
+            sources (list): sources of the items
+            lengths (list): number of items of each source
+        """
+        self._sources = sources
+        self._offsets = [0]
+        for n in lengths:
+            self._offsets.append(self._offsets[-1] + n)
+
+    @property
+    def offsets(self) -> typing.List[int]:
+        """
+        Start position of each source in the concatenation, followed by the total length
+        """
+        return list(self._offsets)
+
+    def locate(self, index: int) -> typing.Tuple[int, int]:
+        """
+        Map a position in the concatenation to (source index, position within that source)
+        """
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError(index)
+
+        source_idx = bisect.bisect_right(self._offsets, index) - 1
+        return source_idx, index - self._offsets[source_idx]
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        source_idx, local_idx = self.locate(index)
+        return self._get_from_source(source_idx, local_idx, self._offsets[source_idx] + local_idx)
+
+    def __eq__(self, other):
+        if not isinstance(other, collections.abc.Sequence) or len(self) != len(other):
+            return False
+        return all(x == y for x, y in zip(self, other))
+
+    @abc.abstractmethod
+    def _get_from_source(self, source_idx: int, local_idx: int, index: int):
+        pass
+
+    def materialize(self) -> list:
+        """
+        Create independent copies of all the items, e.g., for editing the manifest holding them
+        """
+        return [copy.deepcopy(x) for x in self]
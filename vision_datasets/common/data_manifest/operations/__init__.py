@@ -2,7 +2,7 @@ from .balanced_instance_weights_generator import BalancedInstanceWeightsGenerato
 from .filter import DatasetFilter, ImageFilter, ImageNoAnnotationFilter
 from .generate_coco import GenerateCocoDictBase, MultiImageCocoDictGenerator
 from .generate_stand_alone_image_list_base import GenerateStandAloneImageListBase
-from .merge import MultiImageDatasetSingleTaskMerge, ManifestMerger, MergeStrategy, SingleTaskMerge
+from .merge import LazyMergedAnnotations, LazyMergedImages, MultiImageDatasetSingleTaskMerge, ManifestMerger, MergeStrategy, SingleTaskMerge
 from .operation import Operation
 from .remove_categories import RemoveCategories, RemoveCategoriesConfig
 from .sample import ManifestSampler, SampleBaseConfig, SampleByFewShotConfig, SampleByNumSamples, SampleByNumSamplesConfig, SampleFewShot, SampleStrategy, SampleStrategyType
@@ -12,7 +12,7 @@ from .split import Split, SplitConfig, SplitWithCategories
 __all__ = ['Operation',
            'GenerateCocoDictBase', 'MultiImageCocoDictGenerator',
            'GenerateStandAloneImageListBase',
-           'MultiImageDatasetSingleTaskMerge', 'MergeStrategy', 'ManifestMerger', 'SingleTaskMerge',
+           'MultiImageDatasetSingleTaskMerge', 'MergeStrategy', 'ManifestMerger', 'SingleTaskMerge', 'LazyMergedImages', 'LazyMergedAnnotations',
            'ManifestSampler', 'SampleBaseConfig', 'SampleByFewShotConfig', 'SampleByNumSamplesConfig', 'SampleStrategy', 'SampleStrategyType', 'SampleByNumSamples', 'SampleFewShot',
            'Spawn', 'SpawnConfig',
            'Split', 'SplitWithCategories', 'SplitConfig',
@@ -5,8 +5,6 @@ import typing
 from collections import Counter
 from dataclasses import dataclass
 
-import numpy
-
 from ..data_manifest import DatasetManifest, ImageLabelWithCategoryManifest
 from .operation import Operation
 
@@ -35,6 +33,8 @@ class BalancedInstanceWeightsGenerator(Operation):
         if data_manifest is None:
             raise ValueError('data manifest is None.')
 
+        import numpy
+
         logger.info("Generating instance weights for dataset balancing.")
         image_tags = [self._process_labels(x.labels) for x in data_manifest.images]
 
@@ -60,6 +60,8 @@ class BalancedInstanceWeightsGenerator(Operation):
 
     @staticmethod
     def _get_instance_multiplier(tags, class_wise_multipliers, weight_upper, weight_lower):
+        import numpy
+
         mul = numpy.prod([class_wise_multipliers[tag] for tag in tags])
 
         return BalancedInstanceWeightsGenerator._scope_multiplier(mul, weight_upper, weight_lower)
@@ -1,31 +1,71 @@
 import abc
+import json
+import pathlib
+import typing
 
 from ..data_manifest import DatasetManifest, DatasetManifestWithMultiImageLabel
 from .operation import Operation
 
 
+def _json_dumps_compact(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _get_compact_json_serializer() -> typing.Callable[[typing.Any], bytes]:
+    """
+    Fastest available serializer for compact JSON: orjson or msgspec if installed, else json. Objects the fast serializer does not support fall back to json.
+    """
+    try:
+        import orjson
+        fast_dumps = orjson.dumps
+    except ImportError:
+        try:
+            import msgspec
+            fast_dumps = msgspec.json.encode
+        except ImportError:
+            return _json_dumps_compact
+
+    def dumps(obj):
+        try:
+            return fast_dumps(obj)
+        except TypeError:
+            return _json_dumps_compact(obj)
+
+    return dumps
+
+
+def _json_dumps_indented(obj) -> bytes:
+    # element nested two levels deep in the coco dict, formatted the same as json.dumps(coco_dict, indent=2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).replace('\n', '\n    ').encode('utf-8')
+
+
 class GenerateCocoDictBase(Operation):
     """
     Base class for generating a COCO dictionary from DatasetManifest that can be serialized
     """
 
     def _generate_annotations(self, manifest: DatasetManifest):
-        annotations = []
+        return list(self._iter_annotations(manifest))
+
+    def _iter_annotations(self, manifest: DatasetManifest):
+        ann_id = 1
         for img_id, img in enumerate(manifest.images):
             for ann in img.labels:
                 coco_ann = {
-                    'id': len(annotations) + 1,
+                    'id': ann_id,
                     'image_id': img_id + 1,
                 }
 
                 self.process_labels(coco_ann, ann)
-                annotations.append(coco_ann)
-
-        return annotations
+                ann_id += 1
+                yield coco_ann
 
     def _generate_images(self, manifest):
-        images = [{'id': i + 1, 'file_name': x.img_path, 'width': x.width, 'height': x.height} for i, x in enumerate(manifest.images)]
-        return images
+        return list(self._iter_images(manifest))
+
+    def _iter_images(self, manifest):
+        for i, x in enumerate(manifest.images):
+            yield {'id': i + 1, 'file_name': x.img_path, 'width': x.width, 'height': x.height}
 
     def run(self, *args):
         if len(args) != 1:
@@ -41,6 +81,42 @@ class GenerateCocoDictBase(Operation):
         GenerateCocoDictBase._filter_none(result)
         return result
 
+    def write_coco(self, manifest: typing.Union[DatasetManifest, DatasetManifestWithMultiImageLabel], file_path: typing.Union[str, pathlib.Path], compact: bool = False):
+        """
+        Write the COCO json of a manifest to a file, generating and serializing images, categories and annotations one by one instead of building the whole COCO dict in memory.
+
+        Args:
+            manifest: manifest to be written
+            file_path (str or pathlib.Path): path of the output json file
+            compact (bool): if False, the output is the same as json.dumps(self.run(manifest), indent=2, ensure_ascii=False). If True, the output is not indented, and orjson or msgspec is used
+                for serialization when installed
+        """
+
+        if compact:
+            dumps = _get_compact_json_serializer()
+            doc_start, doc_end, section_sep, key_value_sep, list_start, list_end, item_sep = b'{', b'}', b',', b':', b'[', b']', b','
+        else:
+            dumps = _json_dumps_indented
+            doc_start, doc_end, section_sep, key_value_sep, list_start, list_end, item_sep = b'{\n  ', b'\n}', b',\n  ', b': ', b'[\n    ', b'\n  ]', b',\n    '
+
+        sections = [('images', self._iter_images(manifest)), ('categories', self.generate_categories_or_none(manifest)), ('annotations', self._iter_annotations(manifest))]
+        with open(file_path, 'wb') as f:
+            f.write(doc_start)
+            n_sections = 0
+            for key, items in sections:
+                if items is None:
+                    continue
+
+                f.write((section_sep if n_sections else b'') + json.dumps(key).encode('utf-8') + key_value_sep)
+                n_items = 0
+                for item in items:
+                    GenerateCocoDictBase._filter_none(item)
+                    f.write((item_sep if n_items else list_start) + dumps(item))
+                    n_items += 1
+                f.write(list_end if n_items else b'[]')
+                n_sections += 1
+            f.write(doc_end)
+
     @abc.abstractmethod
     def process_labels(self, coco_ann, label):
         pass
@@ -73,8 +149,7 @@ class MultiImageCocoDictGenerator(GenerateCocoDictBase):
     Base class for generating a COCO dictionary from DatasetManifestWithMultiImageLabel that can be serialized
     """
 
-    def _generate_annotations(self, manifest: DatasetManifestWithMultiImageLabel):
-        annotations = []
+    def _iter_annotations(self, manifest: DatasetManifestWithMultiImageLabel):
         for id, ann in enumerate(manifest.annotations, 1):
             coco_ann = {
                 'id': id,
@@ -82,6 +157,4 @@ class MultiImageCocoDictGenerator(GenerateCocoDictBase):
             }
 
             self.process_labels(coco_ann, ann)
-            annotations.append(coco_ann)
-
-        return annotations
+            yield coco_ann
@@ -4,7 +4,8 @@ import logging
 import typing
 
 from ....common.utils import deep_merge
-from ..data_manifest import CategoryManifest, DatasetManifest, ImageLabelWithCategoryManifest, DatasetManifestWithMultiImageLabel
+from ..data_manifest import CategoryManifest, DatasetManifest, ImageDataManifest, ImageLabelWithCategoryManifest, DatasetManifestWithMultiImageLabel, MultiImageLabelManifest
+from ..lazy_sequence import LazyConcatenation
 from .operation import Operation
 
 logger = logging.getLogger(__name__)
@@ -46,12 +47,25 @@ class SingleTaskMerge(MergeStrategy):
     Merge for single task data type
     """
 
+    def __init__(self, lazy: bool = False) -> None:
+        """
+        Args:
+            lazy (bool): if True, the merged manifest holds a read-only view (LazyMergedImages) over the source manifests instead of deep copies of all images
+        """
+        super().__init__()
+        self.lazy = lazy
+
     def merge(self, *args: DatasetManifest):
         data_type = args[0].data_type
-        images = []
 
         categories, category_name_to_idx = self._combine_categories(args) if bool(args[0].categories) else (None, None)
+        additional_info = deep_merge([x.additional_info for x in args])
+
+        if self.lazy:
+            category_id_maps = [self._category_id_map(manifest, category_name_to_idx) for manifest in args] if categories else None
+            return DatasetManifest(LazyMergedImages(args, category_id_maps), categories, copy.deepcopy(data_type), additional_info)
 
+        images = []
         for manifest in args:
             for image in manifest.images:
                 new_image = copy.deepcopy(image)
@@ -62,7 +76,6 @@ class SingleTaskMerge(MergeStrategy):
                         label.category_id = category_name_to_idx[manifest.categories[label.category_id].name]
                 images.append(new_image)
 
-        additional_info = deep_merge([x.additional_info for x in args])
         return DatasetManifest(images, categories, copy.deepcopy(data_type), additional_info)
 
     def check(self, *args: typing.Union[DatasetManifest, DatasetManifestWithMultiImageLabel]):
@@ -83,14 +96,35 @@ class SingleTaskMerge(MergeStrategy):
 
         return categories, category_name_to_idx
 
+    @staticmethod
+    def _category_id_map(manifest: DatasetManifest, category_name_to_idx: dict):
+        """
+        Category id remapping table of one source manifest, or None if the ids are unchanged after merge
+        """
+        id_map = [category_name_to_idx[x.name] for x in manifest.categories]
+        return None if id_map == list(range(len(id_map))) else id_map
+
 
 class MultiImageDatasetSingleTaskMerge(MergeStrategy):
     """
     Merge for single task data type with DatasetManifestWithMultiImageLabel.
     """
 
+    def __init__(self, lazy: bool = False) -> None:
+        """
+        Args:
+            lazy (bool): if True, the merged manifest holds read-only views (LazyMergedImages, LazyMergedAnnotations) over the source manifests instead of deep copies
+        """
+        super().__init__()
+        self.lazy = lazy
+
     def merge(self, *args: DatasetManifestWithMultiImageLabel):
         data_type = args[0].data_type
+        additional_info = deep_merge([x.additional_info for x in args])
+        if self.lazy:
+            images = LazyMergedImages(args)
+            return DatasetManifestWithMultiImageLabel(images, LazyMergedAnnotations(args, images.offsets), copy.deepcopy(data_type), additional_info)
+
         images = []
         annotations = []
         for manifest in args:
@@ -107,5 +141,58 @@ class MultiImageDatasetSingleTaskMerge(MergeStrategy):
                 new_annotation.img_ids = [old_to_new_img_ids[manifest.images[x].id] for x in annotation.img_ids]
                 annotations.append(new_annotation)
 
-        additional_info = deep_merge([x.additional_info for x in args])
         return DatasetManifestWithMultiImageLabel(images, annotations, copy.deepcopy(data_type), additional_info)
+
+
+class LazyMergedImages(LazyConcatenation):
+    """
+    Images of multiple manifests concatenated without copying. Image ids are remapped to positions in the concatenation and category ids of labels are remapped with per-source tables,
+    both on access. Items returned are new lightweight ImageDataManifest sharing label data with the source manifests, so they should be treated as read-only.
+    """
+
+    def __init__(self, manifests: typing.Sequence[typing.Union[DatasetManifest, DatasetManifestWithMultiImageLabel]], category_id_maps: typing.List[typing.Optional[typing.List[int]]] = None):
+        """
+        Args:
+            manifests (list): source manifests
+            category_id_maps (list): for each source, a list mapping source category ids to merged category ids, or None if the ids are unchanged
+        """
+        super().__init__(manifests, [len(x.images) for x in manifests])
+        self._category_id_maps = category_id_maps
+
+    def _get_from_source(self, source_idx, local_idx, index):
+        image: ImageDataManifest = self._sources[source_idx].images[local_idx]
+        id_map = self._category_id_maps[source_idx] if self._category_id_maps else None
+        labels = [LazyMergedImages._remap_category(label, id_map) for label in image.labels] if id_map else image.labels
+
+        return ImageDataManifest(index, image.img_path, image.width, image.height, labels, image.additional_info)
+
+    @staticmethod
+    def _remap_category(label: ImageLabelWithCategoryManifest, id_map: typing.List[int]):
+        new_label = copy.copy(label)
+        if isinstance(label.label_data, list):
+            new_label.label_data = list(label.label_data)
+        new_label.category_id = id_map[label.category_id]
+        return new_label
+
+
+class LazyMergedAnnotations(LazyConcatenation):
+    """
+    Annotations of multiple DatasetManifestWithMultiImageLabel concatenated without copying. Annotation ids are remapped to positions in the concatenation and img_ids are shifted by the offset
+    of their source manifest in the merged image list, both on access.
+    """
+
+    def __init__(self, manifests: typing.Sequence[DatasetManifestWithMultiImageLabel], image_offsets: typing.List[int]):
+        """
+        Args:
+            manifests (list): source manifests
+            image_offsets (list): start position of the images of each source in the merged image list, e.g., LazyMergedImages.offsets
+        """
+        super().__init__(manifests, [len(x.annotations) for x in manifests])
+        self._image_offsets = image_offsets
+
+    def _get_from_source(self, source_idx, local_idx, index):
+        annotation: MultiImageLabelManifest = self._sources[source_idx].annotations[local_idx]
+        new_annotation = copy.copy(annotation)
+        new_annotation.id = index
+        new_annotation.img_ids = [self._image_offsets[source_idx] + x for x in annotation.img_ids]
+        return new_annotation
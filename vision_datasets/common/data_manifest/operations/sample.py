@@ -7,8 +7,6 @@ import typing
 from dataclasses import dataclass
 from enum import Enum
 
-import numpy as np
-
 from ..data_manifest import DatasetManifest
 from .operation import Operation
 
@@ -73,6 +71,8 @@ class SampleByNumSamples(SampleStrategy):
         if not self.config.with_replacement and self.config.n_samples > len(manifest.images):
             raise ValueError('When with_replacement is disabled, n_samples must be less than or equal to the number of images in the dataset.')
 
+        import numpy as np
+
         rng = np.random.default_rng(self.config.random_seed)
         normalized_weights = [w / sum(self.config.weights) for w in self.config.weights] if self.config.weights else None
         sampled_indices = rng.choice(len(manifest.images), size=self.config.n_samples, replace=self.config.with_replacement, p=normalized_weights)
@@ -2,25 +2,53 @@ from typing import Dict
 
 from .data_manifest import DatasetManifest, ImageDataManifest
 
+_JOIN_KEYS = ('id', 'img_path')
 
-def generate_multitask_dataset_manifest(manifest_by_task: Dict[str, DatasetManifest]):
-    images_by_id = {}
+
+def generate_multitask_dataset_manifest(manifest_by_task: Dict[str, DatasetManifest], join_key: str = 'id'):
+    """
+    Join single-task manifests into one multitask manifest.
+
+    Images of all tasks are hash-joined on join_key in one pass, collecting the labels of each task in a column aligned with the joined images. The labels dict of each image is then built
+    once from the columns, instead of being created and mutated image by image.
+
+    The columns are not kept on the result, which stays row-based like any DatasetManifest, so that edits of its images are not shadowed by stale columns: per-task columns, e.g., the
+    boxes of detection tasks returned by VisionDataset.get_boxes, are built from the images when needed, see BoxCoordinateStore.
+
+    Args:
+        manifest_by_task (dict): task name to single-task manifest, None or empty manifests are skipped
+        join_key (str): image attribute that identifies the same image across tasks, 'id' or 'img_path'
+
+    Returns:
+        multitask DatasetManifest, or None if there is no image in any task
+    """
+
+    if join_key not in _JOIN_KEYS:
+        raise ValueError(f'join_key must be one of {_JOIN_KEYS}, got {join_key}.')
+
+    row_by_key = {}
+    joined_images = []
+    label_columns = {}
     for task_name, task_manifest in manifest_by_task.items():
         if not task_manifest:
             continue
 
+        column = label_columns[task_name] = {}
         for image in task_manifest.images:
-            if image.id not in images_by_id:
-                multi_task_image_manifest = ImageDataManifest(image.id, image.img_path, image.width, image.height, {task_name: image.labels})
-                images_by_id[image.id] = multi_task_image_manifest
-            else:
-                images_by_id[image.id].labels[task_name] = image.labels
+            key = getattr(image, join_key)
+            row = row_by_key.setdefault(key, len(joined_images))
+            if row == len(joined_images):
+                joined_images.append(image)
+            column[row] = image.labels
 
-    if not images_by_id:
+    if not joined_images:
         return None
 
+    images = [ImageDataManifest(image.id, image.img_path, image.width, image.height, {task_name: column[row] for task_name, column in label_columns.items() if row in column})
+              for row, image in enumerate(joined_images)]
+
     categories_by_task = {k: manifest.categories for k, manifest in manifest_by_task.items()}
     dataset_types_by_task = {k: manifest.data_type for k, manifest in manifest_by_task.items()}
     additional_info_by_task = {k: manifest.additional_info for k, manifest in manifest_by_task.items() if manifest.additional_info}
 
-    return DatasetManifest([v for v in images_by_id.values()], categories_by_task, dataset_types_by_task, addtional_info=additional_info_by_task)
+    return DatasetManifest(images, categories_by_task, dataset_types_by_task, addtional_info=additional_info_by_task)
@@ -1,5 +1,8 @@
+from .content_manifest import ContentManifest
 from .dataset_downloader import DatasetDownloader, DownloadedDatasetsResources
 from .file_reader import FileReader
 from .image_loader import PILImageLoader
+from .lazy_fetcher import LazyFileFetcher
+from .streaming_fetcher import StreamingZipFetcher
 
-__all__ = ['DatasetDownloader', 'DownloadedDatasetsResources', 'FileReader', 'PILImageLoader']
+__all__ = ['ContentManifest', 'DatasetDownloader', 'DownloadedDatasetsResources', 'FileReader', 'LazyFileFetcher', 'PILImageLoader', 'StreamingZipFetcher']
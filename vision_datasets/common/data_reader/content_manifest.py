@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import pathlib
+import typing
+import zipfile
+
+# files written by the downloader and the lazy fetcher next to the files of a dataset, not part of it
+_LOCAL_STATE_SUFFIXES = ('.part', '.download.json', '.lazy', '.lazy.ranges', '.tmp', '.lock', '.stale')
+# folder of the references to a download directory, see DownloadedDatasetsResources
+_REFERENCES_DIR = '.vision_datasets_references'
+
+
+def file_md5(filepath: typing.Union[str, pathlib.Path]) -> str:
+    md5 = hashlib.md5()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(4194304), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+class ContentManifest:
+    """
+    Content of the files of a dataset version: size and MD5 of each file, and for zips, the CRC32, compressed and uncompressed sizes of each member. Stored as json next to the files of the
+    version and referred to by 'content_manifest' in the dataset info, it allows syncing a local copy of another version, or an outdated copy, by downloading the files that changed only,
+    and from rebuilt zips, the members that changed only, see DatasetDownloader.sync.
+
+    {'files': {'<path relative to root_folder>': {'size': int, 'md5': str, 'members': {'<member name>': [crc32, compress_size, file_size]}}}}
+    """
+
+    def __init__(self, files: typing.Dict[str, dict]):
+        self.files = files
+
+    def get(self, path: typing.Union[str, pathlib.Path]) -> typing.Optional[dict]:
+        return self.files.get(pathlib.PurePath(path).as_posix())
+
+    @staticmethod
+    def from_dir(root_dir: typing.Union[str, pathlib.Path], file_paths: typing.Iterable[str] = None) -> 'ContentManifest':
+        """
+        Content manifest of the files of root_dir, to be published with them
+
+        Args:
+            root_dir (str or pathlib.Path): root folder of the dataset version
+            file_paths (iterable): paths of the files relative to root_dir, all files if None
+        """
+
+        root_dir = pathlib.Path(root_dir)
+        if file_paths is None:
+            file_paths = sorted(p.relative_to(root_dir).as_posix() for p in root_dir.rglob('*') if p.is_file() and not p.name.endswith(_LOCAL_STATE_SUFFIXES)
+                                and _REFERENCES_DIR not in p.relative_to(root_dir).parts)
+
+        return ContentManifest({pathlib.PurePath(file_path).as_posix(): ContentManifest.describe_file(root_dir / file_path) for file_path in file_paths})
+
+    @staticmethod
+    def describe_file(filepath: typing.Union[str, pathlib.Path]) -> dict:
+        entry = {'size': os.path.getsize(filepath), 'md5': file_md5(filepath)}
+        if str(filepath).endswith('.zip') and zipfile.is_zipfile(filepath):
+            with zipfile.ZipFile(filepath) as z:
+                entry['members'] = {info.filename: [info.CRC, info.compress_size, info.file_size] for info in z.infolist()}
+        return entry
+
+    @staticmethod
+    def from_json(manifest_json: typing.Union[str, dict]) -> 'ContentManifest':
+        manifest_dict = json.loads(manifest_json) if isinstance(manifest_json, str) else manifest_json
+        return ContentManifest(manifest_dict['files'])
+
+    def to_json(self) -> dict:
+        return {'files': self.files}
+
+    def save(self, path: typing.Union[str, pathlib.Path]):
+        pathlib.Path(path).write_text(json.dumps(self.to_json()))
+
+    def diff(self, other: 'ContentManifest') -> typing.List[str]:
+        """
+        Paths of the files of this manifest absent from other or with a different content
+        """
+
+        changed = []
+        for path, entry in self.files.items():
+            other_entry = other.files.get(path)
+            if other_entry is None or (other_entry['size'], other_entry['md5']) != (entry['size'], entry['md5']):
+                changed.append(path)
+
+        return changed
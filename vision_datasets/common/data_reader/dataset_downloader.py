@@ -1,94 +1,482 @@
+import base64
+import functools
+import hashlib
+import json
 import logging
 import os
 import pathlib
 import re
 import shutil
+import socket
+import struct
 import tempfile
+import threading
+import time
+import uuid
+import weakref
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import List
 from urllib import parse as urlparse
 
-import azure.storage.blob
-import requests
-import tenacity
-from azure.core.exceptions import AzureError
-from azure.identity import DefaultAzureCredential
-
 from ..constants import DatasetTypes, Usages
 from ..dataset_info import BaseDatasetInfo, DatasetInfo
 from ..utils import can_be_url
+from .content_manifest import _REFERENCES_DIR, ContentManifest, file_md5
+from .file_lock import FileLock, _is_dead_local_process
+from .lazy_fetcher import _LOCAL_HEADER_SIZE, LAZY_ZIP_SUFFIX, _fetch, _LazyZip
 
 logger = logging.getLogger(__name__)
 
 
+def _lazy_retry(get_retry_kwargs):
+    """
+    tenacity.retry, with tenacity (and the exception types to retry on) imported only when the decorated function is first called, to keep them out of the package import time.
+
+    Args:
+        get_retry_kwargs (callable): takes the tenacity module, returns the keyword arguments of tenacity.retry
+    """
+
+    def decorator(func):
+        retrying_func = None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal retrying_func
+            if retrying_func is None:
+                import tenacity
+                retrying_func = tenacity.retry(**get_retry_kwargs(tenacity))(func)
+            return retrying_func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _retry_on_azure_error(tenacity):
+    from azure.core.exceptions import AzureError
+    return {'stop': tenacity.stop_after_attempt(3), 'retry': tenacity.retry_if_exception_type(AzureError), 'reraise': True}
+
+
 class AzureDownloader:
     def __init__(self, container_url: str) -> None:
+        import azure.storage.blob
+        from azure.identity import DefaultAzureCredential
+
         self._container_url = container_url
         has_sas = 'sig=' in container_url
         credential = None if has_sas else DefaultAzureCredential()
         self._container_client = azure.storage.blob.ContainerClient.from_container_url(container_url, credential=credential)
 
-    @tenacity.retry(stop=tenacity.stop_after_attempt(3), retry=tenacity.retry_if_exception_type(AzureError), reraise=True)
+    @_lazy_retry(_retry_on_azure_error)
     def download(self, file_path, target_dir):
         target_dir = pathlib.Path(target_dir)
         (target_dir / file_path).parent.mkdir(parents=True, exist_ok=True)
         stream = self._container_client.download_blob(file_path, max_concurrency=8, read_timeout=1800)
-        with open((target_dir / file_path), 'wb') as f:
+        # written to a temp file renamed when complete, so that an interrupted download is never taken for a downloaded file
+        part_path = _part_path(target_dir / file_path)
+        with open(part_path, 'wb') as f:
             stream.readinto(f)
+        os.replace(part_path, target_dir / file_path)
 
     @staticmethod
     def is_azure_blob_url(url):
         return 'blob.core.windows.net' in url
 
 
+def _beat_references(references: dict, stop: threading.Event, interval: float):
+    # touches the reference files of a DownloadedDatasetsResources, holding no reference to the instance for it to be garbage collected
+    while not stop.wait(interval):
+        for reference in list(references.values()):
+            try:
+                os.utime(reference)
+            except OSError:
+                pass
+
+
+def _release_references(references: dict, stop: threading.Event, pid: int):
+    # drops the references of a DownloadedDatasetsResources without removing the directories, in the process that created them only, not in forked ones
+    stop.set()
+    if os.getpid() != pid:
+        return
+
+    for reference in list(references.values()):
+        try:
+            reference.unlink()
+        except FileNotFoundError:
+            pass
+    references.clear()
+
+
 class DownloadedDatasetsResources:
-    """Wrapper class to make sure the temporary directory is removed."""
+    """
+    Wrapper class to make sure the downloaded directories are removed.
+
+    Directories are reference-counted, as they can be shared with other DownloadedDatasetsResources, e.g., of processes of other nodes downloading a dataset to the same shared directory:
+    each instance holds a reference file in <base_dir>/.vision_datasets_references, and a directory is removed by the last instance exiting only. References are dropped without removing
+    the directories when an instance is garbage collected or the process exits without exiting the instance.
+
+    References are touched by a heartbeat thread. References of dead processes of this host, e.g., after a crash, and references not touched for stale_seconds, e.g., of processes of other
+    hosts that crashed, are ignored. Their age is judged against the modification time of the lock file of the directory, which is created on the same file system, not against the clock of
+    this host.
+    """
+
+    def __init__(self, base_dirs: List[pathlib.Path], stale_seconds: float = 600):
+        """
+        Args:
+            base_dirs (list): directories downloaded
+            stale_seconds (float): seconds without heartbeat after which a reference is ignored
+        """
 
-    def __init__(self, base_dirs: List[pathlib.Path]):
         self.base_dirs = base_dirs
+        self.stale_seconds = stale_seconds
+        self._references = {}
+        for base_dir in dict.fromkeys(pathlib.Path(base_dir) for base_dir in base_dirs):
+            reference = base_dir / _REFERENCES_DIR / f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex}'
+            with FileLock(self._lock_path(base_dir)):
+                reference.parent.mkdir(parents=True, exist_ok=True)
+                reference.write_text(json.dumps({'host': socket.gethostname(), 'pid': os.getpid()}))
+            self._references[base_dir] = reference
+
+        self._heartbeat_stop = threading.Event()
+        threading.Thread(target=_beat_references, args=(self._references, self._heartbeat_stop, stale_seconds / 4), name='vision_datasets_reference_heartbeat', daemon=True).start()
+        self._finalizer = weakref.finalize(self, _release_references, self._references, self._heartbeat_stop, os.getpid())
+
+    def __getstate__(self):
+        # copies, e.g., in worker processes, hold no references, the directories being kept by this instance
+        return {'base_dirs': self.base_dirs, 'stale_seconds': self.stale_seconds}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._references = {}
+        self._heartbeat_stop = threading.Event()
+        self._finalizer = None
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        for base_dir in self.base_dirs:
-            if os.path.isdir(base_dir):
-                logger.info(f'Removing folder: {base_dir}.')
-                shutil.rmtree(base_dir)
+        self._heartbeat_stop.set()
+        if self._finalizer is not None:
+            self._finalizer.detach()
+        for base_dir, reference in self._references.items():
+            with FileLock(self._lock_path(base_dir)) as lock:
+                if reference.exists():
+                    reference.unlink()
+                n_references = self._count_references(base_dir, os.stat(lock.path).st_mtime - self.stale_seconds)
+                if n_references:
+                    logger.info(f'Keeping folder {base_dir}, used by {n_references} other process(es).')
+                elif os.path.isdir(base_dir):
+                    logger.info(f'Removing folder: {base_dir}.')
+                    shutil.rmtree(base_dir)
+        self._references = {}
+
+    def _release(self):
+        # drops the references without removing the directories
+        if self._finalizer is not None:
+            self._finalizer()
+
+    @staticmethod
+    def _lock_path(base_dir: pathlib.Path) -> pathlib.Path:
+        return base_dir / f'{_REFERENCES_DIR}.lock'
+
+    @staticmethod
+    def _count_references(base_dir: pathlib.Path, stale_mtime: float) -> int:
+        references_dir = base_dir / _REFERENCES_DIR
+        n_references = 0
+        for reference in references_dir.iterdir() if references_dir.is_dir() else []:
+            try:
+                mtime = os.stat(reference).st_mtime
+                owner = json.loads(reference.read_text())
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError):
+                owner = {}
+            if _is_dead_local_process(owner) or mtime < stale_mtime:
+                logger.info(f'Removing reference {reference} of a dead process, or without heartbeat.')
+                reference.unlink()
+            else:
+                n_references += 1
+
+        return n_references
 
     @staticmethod
     def merge(r1, r2):
         if r1 is None or r2 is None:
             raise ValueError
 
-        return DownloadedDatasetsResources(r1.base_dirs + r2.base_dirs)
+        merged = DownloadedDatasetsResources(r1.base_dirs + r2.base_dirs)
+        r1._release()
+        r2._release()
+        return merged
+
+
+def _part_path(filepath: pathlib.Path) -> pathlib.Path:
+    return filepath.with_name(filepath.name + '.part')
+
+
+def _sidecar_path(filepath: pathlib.Path) -> pathlib.Path:
+    return filepath.with_name(filepath.name + '.download.json')
+
+
+def _lock_path(filepath: pathlib.Path) -> pathlib.Path:
+    return filepath.with_name(filepath.name + '.lock')
+
+
+def _file_md5(filepath: pathlib.Path, md5=None):
+    md5 = md5 or hashlib.md5()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(4194304), b''):
+            md5.update(chunk)
+    return md5
+
+
+def _resume_headers(part_path: pathlib.Path) -> dict:
+    """
+    Headers of the request resuming a partial download: the range from the end of <file>.part, sent with If-Range the validator of the remote file the part was downloaded from, so that a
+    remote file changed since is sent whole. Empty, restarting the download, if there is no partial file, or if its validator is unknown
+    """
+
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    if not offset:
+        return {}
+
+    try:
+        validator = json.loads(_sidecar_path(part_path).read_text()).get('validator')
+    except (OSError, ValueError):
+        validator = None
+    if not validator:
+        logger.info(f'Remote file of {part_path} is unknown, restarting the download.')
+        return {}
+
+    return {'Range': f'bytes={offset}-', 'If-Range': validator}
+
+
+def _write_part_validator(part_path: pathlib.Path, response):
+    # strong ETag, or Last-Modified, of the remote file being downloaded to <file>.part, in the sidecar of the part. Weak ETags are not valid in If-Range
+    etag = response.headers.get('ETag')
+    validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+    _sidecar_path(part_path).write_text(json.dumps({'validator': validator}))
+
+
+def _remove_part_validator(part_path: pathlib.Path):
+    try:
+        _sidecar_path(part_path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _expected_size(response, offset: int):
+    # total size of the file, from Content-Range of partial responses, or Content-Length
+    content_range = response.headers.get('Content-Range')
+    if response.status_code == 206 and content_range and '/' in content_range and not content_range.endswith('/*'):
+        return int(content_range.rsplit('/', 1)[1])
+
+    content_length = response.headers.get('Content-Length')
+    if content_length is None:
+        return None
+
+    return int(content_length) + (offset if response.status_code == 206 else 0)
+
+
+class DownloadValidationError(IOError):
+    pass
+
+
+def _link_or_copy(source: pathlib.Path, target: pathlib.Path):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _reusable_member(base_file, base_info: zipfile.ZipInfo, info: zipfile.ZipInfo, span_size: int):
+    # local header and data of a member of the zip to build, from the same member of a base zip, None if it cannot be reproduced exactly
+    if (base_info.CRC, base_info.compress_size, base_info.file_size, base_info.compress_type) != (info.CRC, info.compress_size, info.file_size, info.compress_type):
+        return None
+    if info.flag_bits & 0x08 or max(info.compress_size, info.file_size, info.header_offset) >= 0xFFFFFFFF:
+        # data descriptors and zip64 local headers are not reproduced
+        return None
+
+    filename = info.orig_filename.encode('utf-8' if info.flag_bits & 0x800 else 'cp437')
+    year, month, day, hour, minute, second = info.date_time
+    header = struct.pack('<4s2B4HL2L2H', b'PK\x03\x04', info.extract_version, info.reserved, info.flag_bits, info.compress_type, hour << 11 | minute << 5 | second // 2,
+                         (year - 1980) << 9 | month << 5 | day, info.CRC, info.compress_size, info.file_size, len(filename), len(info.extra))
+    if len(header) + len(filename) + len(info.extra) + info.compress_size != span_size:
+        return None
+
+    base_file.seek(base_info.header_offset)
+    name_length, extra_length = struct.unpack('<HH', base_file.read(_LOCAL_HEADER_SIZE)[26:30])
+    base_file.seek(base_info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+    return header + filename + info.extra + base_file.read(info.compress_size)
+
+
+def _rebuild_zip(url: str, zip_path: pathlib.Path, base_zip_path: pathlib.Path, expected: dict) -> int:
+    """
+    Build the zip at url into zip_path, with the members of base_zip_path of the same name, CRC and sizes, fetching only the central directory and the other members by range requests
+
+    Returns:
+        number of bytes fetched
+    """
+
+    # sparse copies of another version of the zip, e.g., left by lazy fetching, are not reused
+    for stale_path in [f'{zip_path}{LAZY_ZIP_SUFFIX}', f'{zip_path}{LAZY_ZIP_SUFFIX}.ranges']:
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+
+    lazy_zip = _LazyZip(str(zip_path), url)
+    spans = lazy_zip.entry_spans()
+    ranges_to_fetch = []
+    n_reused = 0
+    with zipfile.ZipFile(base_zip_path) as base_zip, open(base_zip_path, 'rb') as base_file:
+        base_infos = {info.filename: info for info in base_zip.infolist()}
+        for name, info in lazy_zip.entries.items():
+            start, end = spans[name]
+            if lazy_zip.covers(start, end):
+                # fetched with the central directory
+                continue
+            data = _reusable_member(base_file, base_infos[name], info, end - start) if name in base_infos else None
+            if data is None:
+                ranges_to_fetch.append((start, end))
+            else:
+                lazy_zip.write(start, data)
+                n_reused += 1
+
+    lazy_zip.fetch_ranges(ranges_to_fetch)
+    if os.path.getsize(lazy_zip.path) != expected['size'] or file_md5(lazy_zip.path) != expected['md5']:
+        raise DownloadValidationError(f'{zip_path} rebuilt from {base_zip_path} does not match the content manifest.')
+
+    os.replace(lazy_zip.path, zip_path)
+    os.remove(f'{lazy_zip.path}.ranges')
+    logger.info(f'Rebuilt {zip_path} with {n_reused} of {len(lazy_zip.entries)} members of {base_zip_path}, fetched {lazy_zip.n_bytes_fetched / 1e6:.1f} MB.')
+    return lazy_zip.n_bytes_fetched
+
+
+@dataclass
+class DownloadStats:
+    n_files: int
+    n_downloaded: int
+    n_bytes: int
+    seconds: float
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.n_bytes / self.seconds if self.seconds > 0 else 0.0
 
 
 class DatasetDownloader:
-    def __init__(self, dataset_sas_url: str, dataset_info: BaseDatasetInfo):
+    """
+    Downloader of the files of a dataset, in parallel with a limited number of connections per host.
+
+    Files are downloaded to <file>.part, resumed with HTTP range requests after an interruption, and renamed to <file> once complete and validated against the size, and the MD5 if provided
+    (Content-MD5), of the response. Range requests carry the validator (ETag or Last-Modified) of the remote file the part is from in If-Range, so that a file changed since is downloaded
+    again whole, see _resume_headers. Size, MD5 and ETag of downloaded files are recorded in a sidecar <file>.download.json, against which existing files are validated before being reused.
+    Existing files without sidecar are validated against the size of the remote file.
+
+    Processes downloading a dataset to the same directory, e.g., on nodes sharing a file system, download each file once: a file is downloaded by the process holding its lock <file>.lock,
+    while the others wait for the lock, then reuse the file downloaded, its sidecar being the ready marker. Locks of crashed processes are broken after stale_lock_seconds, see FileLock.
+    """
+
+    def __init__(self, dataset_sas_url: str, dataset_info: BaseDatasetInfo, num_workers: int = 8, max_connections_per_host: int = 4, verify_checksums: bool = False,
+                 stale_lock_seconds: float = 120, lock_timeout: float = None):
+        """
+        Args:
+            dataset_sas_url (str): url of the container of the dataset, with sas token if needed
+            dataset_info (BaseDatasetInfo): dataset info
+            num_workers (int): number of files downloaded concurrently
+            max_connections_per_host (int): max number of concurrent downloads from a host
+            verify_checksums (bool): whether to check the MD5 of existing files against their sidecar, instead of only their sizes
+            stale_lock_seconds (float): seconds without heartbeat after which the lock of a file being downloaded by another process is broken
+            lock_timeout (float): max seconds to wait for a file being downloaded by another process, None to wait indefinitely
+        """
+
         if not dataset_info:
             raise ValueError
 
         if not can_be_url(dataset_sas_url):
             raise ValueError('An url to the dataset should be provided.')
 
+        if num_workers < 1 or max_connections_per_host < 1:
+            raise ValueError('num_workers and max_connections_per_host must be equal or greater than 1.')
+
         self._base_url = dataset_sas_url
         self._dataset_info = dataset_info
+        self.num_workers = num_workers
+        self.max_connections_per_host = max_connections_per_host
+        self.verify_checksums = verify_checksums
+        self.stale_lock_seconds = stale_lock_seconds
+        self.lock_timeout = lock_timeout
+        self.last_download_stats = None
+        self._host_semaphores = {}
+        self._host_semaphores_lock = threading.Lock()
+
+    def download(self, target_dir: str = None, purposes=[Usages.TRAIN, Usages.VAL, Usages.TEST], include_files_for_local_usage: bool = True):
+        """
+        Args:
+            target_dir (str): directory to download the files to, a temp directory if None
+            purposes (list): usages of the files to download
+            include_files_for_local_usage (bool): whether to download files_for_local_usage, e.g., image zips, besides index files, labelmap and image metadata. Files not downloaded can be
+                fetched on first access, see LazyFileFetcher
+        """
 
-    def download(self, target_dir: str = None, purposes=[Usages.TRAIN, Usages.VAL, Usages.TEST]):
         if not purposes:
             raise ValueError
 
         target_dir = pathlib.Path(tempfile.mkdtemp()) if target_dir is None else pathlib.Path(target_dir)
         (target_dir / pathlib.Path(self._dataset_info.root_folder)).mkdir(parents=True, exist_ok=True)
 
+        if self._dataset_info.type == DatasetTypes.MULTITASK:
+            files_to_download = set.union(*[self._find_files_to_download(subtask_info, purposes, include_files_for_local_usage) for subtask_info in self._dataset_info.sub_task_infos.values()])
+        else:
+            files_to_download = self._find_files_to_download(self._dataset_info, purposes, include_files_for_local_usage)
+
+        # referenced before downloading, so that other processes sharing target_dir do not remove it meanwhile
+        resources = DownloadedDatasetsResources([target_dir])
+        try:
+            self._download_files(files_to_download, target_dir)
+        except BaseException:
+            resources._release()
+            raise
+
+        return resources
+
+    def sync(self, target_dir: str, purposes=[Usages.TRAIN, Usages.VAL, Usages.TEST], base_dataset_info: BaseDatasetInfo = None):
+        """
+        Update a local copy of the dataset to this version, downloading only the files that changed, based on the content manifest of this version ('content_manifest' in the dataset
+        info, see ContentManifest).
+
+        Files are compared with the local files at the same paths, in the root folder of this version, or of base_dataset_info, e.g., a previous version downloaded, unchanged files of which
+        are linked or copied. Zips that changed are rebuilt with the unchanged members of the local zip, fetching the other members only.
+
+        Args:
+            target_dir (str): local directory of the dataset files
+            purposes (list): usages of the files to sync
+            base_dataset_info (BaseDatasetInfo): info of another version of the dataset in target_dir, to reuse files of
+        """
+
+        if not purposes:
+            raise ValueError
+
+        if not self._dataset_info.content_manifest:
+            raise ValueError(f'Dataset {self._dataset_info.name} version {self._dataset_info.version} has no content manifest to sync with.')
+
+        target_dir = pathlib.Path(target_dir)
+        (target_dir / pathlib.Path(self._dataset_info.root_folder)).mkdir(parents=True, exist_ok=True)
+        content, _ = _fetch(self._url(pathlib.Path(self._dataset_info.root_folder) / self._dataset_info.content_manifest))
+        content_manifest = ContentManifest.from_json(content.decode('utf-8'))
+
         if self._dataset_info.type == DatasetTypes.MULTITASK:
             files_to_download = set.union(*[self._find_files_to_download(subtask_info, purposes) for subtask_info in self._dataset_info.sub_task_infos.values()])
         else:
             files_to_download = self._find_files_to_download(self._dataset_info, purposes)
 
-        self._download_files(files_to_download, target_dir)
+        resources = DownloadedDatasetsResources([target_dir])
+        try:
+            self._download_files(files_to_download, target_dir, content_manifest, pathlib.Path(base_dataset_info.root_folder) if base_dataset_info else None)
+        except BaseException:
+            resources._release()
+            raise
 
-        return DownloadedDatasetsResources([target_dir])
+        return resources
 
     @staticmethod
     def _keep_until_including_pattern(s, pattern):
@@ -99,7 +487,7 @@ class DatasetDownloader:
         else:
             return s
 
-    def _find_files_to_download(self, dataset_info: DatasetInfo, purposes: List[str]) -> set:
+    def _find_files_to_download(self, dataset_info: DatasetInfo, purposes: List[str], include_files_for_local_usage: bool = True) -> set:
         files_to_download = set()
         rt_dir = pathlib.Path(dataset_info.root_folder)
         for usage in purposes:
@@ -107,7 +495,7 @@ class DatasetDownloader:
                 # index file can be included in a zip file as well, e.g., "index_files.zip@ann.json"
                 file = self._keep_until_including_pattern(dataset_info.index_files[usage], pattern=r'@*\.zip')
                 files_to_download.add(rt_dir / file)
-            if usage in dataset_info.files_for_local_usage:
+            if include_files_for_local_usage and usage in dataset_info.files_for_local_usage:
                 files_to_download.update([rt_dir / x for x in dataset_info.files_for_local_usage[usage]])
 
         if dataset_info.labelmap:
@@ -118,34 +506,184 @@ class DatasetDownloader:
 
         return files_to_download
 
-    def _download_files(self, file_paths: List, target_dir: pathlib.Path):
+    def _url(self, file_path) -> str:
         parts = urlparse.urlparse(self._base_url)
+        path = os.path.join(parts[2], file_path).replace('\\', '/')
+        return urlparse.urlunparse((parts[0], parts[1], path, parts[3], parts[4], parts[5]))
 
+    def _download_files(self, file_paths: List, target_dir: pathlib.Path, content_manifest: ContentManifest = None, base_root_folder: pathlib.Path = None):
         azure_downloader = AzureDownloader(self._base_url) if AzureDownloader.is_azure_blob_url(self._base_url) else None
+        root_folder = pathlib.PurePath(self._dataset_info.root_folder or '')
+        jobs = []
         for file_path in file_paths:
-            path = os.path.join(parts[2], file_path).replace('\\', '/')
-            url = urlparse.urlunparse((parts[0], parts[1], path, parts[3], parts[4], parts[5]))
-            target_file_path = target_dir / file_path
-            target_file_path.parent.mkdir(parents=True, exist_ok=True)
-
-            if target_file_path.exists():
+            expected, base_file_path = None, None
+            if content_manifest is not None:
+                relative_path = pathlib.PurePath(file_path).relative_to(root_folder)
+                expected = content_manifest.get(relative_path)
+                base_file_path = target_dir / base_root_folder / relative_path if base_root_folder is not None else None
+            jobs.append((pathlib.Path(file_path), self._url(file_path), target_dir, expected, base_file_path))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(min(self.num_workers, max(len(jobs), 1))) as executor:
+            n_bytes = list(executor.map(lambda job: self._download_or_reuse(azure_downloader, *job), jobs))
+
+        self.last_download_stats = DownloadStats(len(jobs), sum(1 for x in n_bytes if x is not None), sum(x for x in n_bytes if x), time.perf_counter() - start)
+        stats = self.last_download_stats
+        if stats.n_downloaded:
+            logger.info(f'Downloaded {stats.n_downloaded} of {stats.n_files} files, {stats.n_bytes / 1e6:.1f} MB in {stats.seconds:.1f}s, {stats.bytes_per_second / 1e6:.1f} MB/s.')
+
+    def _download_or_reuse(self, azure_downloader, file_path: pathlib.Path, url: str, target_dir: pathlib.Path, expected: dict = None, base_file_path: pathlib.Path = None):
+        # returns the number of bytes downloaded, None if the existing file is reused, e.g., downloaded by another process while waiting for the lock
+        target_file_path = target_dir / file_path
+        target_file_path.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(_lock_path(target_file_path), stale_seconds=self.stale_lock_seconds, timeout=self.lock_timeout):
+            return self._download_or_reuse_locked(azure_downloader, file_path, url, target_dir, expected, base_file_path)
+
+    def _download_or_reuse_locked(self, azure_downloader, file_path: pathlib.Path, url: str, target_dir: pathlib.Path, expected: dict = None, base_file_path: pathlib.Path = None):
+        target_file_path = target_dir / file_path
+        if expected is not None:
+            n_bytes = self._sync_file(url, target_file_path, expected, base_file_path)
+            if n_bytes != -1:
+                return n_bytes
+        elif target_file_path.exists():
+            if self._is_existing_file_valid(url, target_file_path):
                 logger.info(f'{target_file_path} exists. Skip downloading.')
-                continue
+                return None
+            logger.warning(f'{target_file_path} does not match the file downloaded or the remote file, downloading it again.')
+            target_file_path.unlink()
 
+        with self._host_semaphore(url):
             if AzureDownloader.is_azure_blob_url(url):
                 try:
                     logger.info('Detected the URL is from Azure blob.')
                     azure_downloader.download(file_path.as_posix(), target_dir)
+                    self._write_sidecar(target_file_path, None, None)
                 except Exception as e:
-                    logger.warn(f'Azure downloading fails {e}. Fallback to regular download.')
+                    logger.warning(f'Azure downloading fails {e}. Fallback to regular download.')
                     self._download_file(url, target_file_path)
             else:
                 self._download_file(url, target_file_path)
 
-    @tenacity.retry(stop=tenacity.stop_after_attempt(3))
+        if expected is not None and not self._matches(target_file_path, expected):
+            raise DownloadValidationError(f'{target_file_path} downloaded does not match the content manifest.')
+
+        return target_file_path.stat().st_size
+
+    def _sync_file(self, url: str, target_file_path: pathlib.Path, expected: dict, base_file_path: pathlib.Path = None):
+        # reuses the local file or the base file if unchanged, or rebuilds a zip changed from them. Returns the number of bytes fetched, None if reused, -1 if to be downloaded
+        candidates = [path for path in [target_file_path, base_file_path] if path is not None and path.is_file()]
+        for candidate in candidates:
+            if self._matches(candidate, expected):
+                if candidate != target_file_path:
+                    if target_file_path.exists():
+                        target_file_path.unlink()
+                    _link_or_copy(candidate, target_file_path)
+                    self._write_sidecar(target_file_path, expected['md5'], None)
+                logger.info(f'{target_file_path} is unchanged. Skip downloading.')
+                return None
+
+        base_zips = [path for path in candidates if expected.get('members') and zipfile.is_zipfile(path)]
+        if base_zips:
+            try:
+                with self._host_semaphore(url):
+                    n_bytes = _rebuild_zip(url, target_file_path, base_zips[0], expected)
+                self._write_sidecar(target_file_path, expected['md5'], None)
+                return n_bytes
+            except Exception as e:
+                logger.warning(f'Failed to rebuild {target_file_path} from {base_zips[0]}, downloading it: {e}')
+
+        if target_file_path.exists():
+            target_file_path.unlink()
+        return -1
+
+    def _matches(self, filepath: pathlib.Path, expected: dict) -> bool:
+        # whether a local file has the size and MD5 of a content manifest entry, the MD5 recorded in its sidecar if any
+        size = filepath.stat().st_size
+        if size != expected['size']:
+            return False
+
+        sidecar_path = _sidecar_path(filepath)
+        sidecar = json.loads(sidecar_path.read_text()) if sidecar_path.exists() else {}
+        if sidecar.get('size') != size or not sidecar.get('md5'):
+            sidecar['md5'] = file_md5(filepath)
+            self._write_sidecar(filepath, sidecar['md5'], sidecar.get('etag'))
+
+        return sidecar['md5'] == expected['md5']
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse.urlparse(url).netloc
+        with self._host_semaphores_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.max_connections_per_host)
+            return self._host_semaphores[host]
+
+    def _is_existing_file_valid(self, url: str, filepath: pathlib.Path) -> bool:
+        sidecar_path = _sidecar_path(filepath)
+        if sidecar_path.exists():
+            sidecar = json.loads(sidecar_path.read_text())
+            if filepath.stat().st_size != sidecar['size']:
+                return False
+            return not self.verify_checksums or not sidecar.get('md5') or _file_md5(filepath).hexdigest() == sidecar['md5']
+
+        # file not downloaded by this downloader, or before sidecars existed: compared to the size of the remote file if available
+        remote_size = self._remote_size(url)
+        return remote_size is None or remote_size == filepath.stat().st_size
+
+    @staticmethod
+    def _remote_size(url: str):
+        import requests
+
+        try:
+            with requests.head(url, allow_redirects=True, timeout=60) as r:
+                content_length = r.headers.get('Content-Length') if r.ok else None
+                return int(content_length) if content_length is not None else None
+        except requests.RequestException as e:
+            logger.info(f'Failed to get the size of {url.split("?")[0]}: {e}')
+            return None
+
+    @staticmethod
+    def _write_sidecar(filepath: pathlib.Path, md5: str, etag: str):
+        _sidecar_path(filepath).write_text(json.dumps({'size': filepath.stat().st_size, 'md5': md5, 'etag': etag}))
+
+    @_lazy_retry(lambda tenacity: {'stop': tenacity.stop_after_attempt(3), 'reraise': True})
     def _download_file(self, url: str, filepath: pathlib.Path):
-        logger.info(f'Downloading from {url} to {filepath.absolute()}.')
-        with requests.get(url, stream=True, allow_redirects=True, timeout=60) as r:
+        import requests
+
+        part_path = _part_path(filepath)
+        # resuming a partial download with a range request, if the remote file is unchanged
+        headers = _resume_headers(part_path)
+        offset = part_path.stat().st_size if headers else 0
+        logger.info(f'Downloading from {url.split("?")[0]} to {filepath.absolute()}{f", resuming from byte {offset}" if offset else ""}.')
+        with requests.get(url, stream=True, allow_redirects=True, timeout=60, **({'headers': headers} if headers else {})) as r:
+            if offset and r.status_code == 416:
+                # the partial file is not a prefix of the remote file anymore
+                part_path.unlink()
+                raise DownloadValidationError(f'Range of {part_path} not satisfiable, restarting the download.')
             r.raise_for_status()
-            with open(filepath, 'wb') as f:
-                shutil.copyfileobj(r.raw, f, length=4194304)
+
+            # the whole file is sent if the remote file changed
+            resumed = bool(offset) and r.status_code == 206
+            if not resumed:
+                _write_part_validator(part_path, r)
+            md5 = _file_md5(part_path) if resumed else hashlib.md5()
+            with open(part_path, 'ab' if resumed else 'wb') as f:
+                for chunk in iter(lambda: r.raw.read(4194304), b''):
+                    md5.update(chunk)
+                    f.write(chunk)
+
+            expected_size = _expected_size(r, offset if resumed else 0)
+            expected_md5 = r.headers.get('Content-MD5') if not resumed else None
+            etag = r.headers.get('ETag')
+
+        size = part_path.stat().st_size
+        if expected_size is not None and size != expected_size:
+            if size > expected_size:
+                part_path.unlink()
+            raise DownloadValidationError(f'Downloaded {size} bytes of {filepath}, expected {expected_size}.')
+        if expected_md5 and base64.b64encode(md5.digest()).decode('utf-8') != expected_md5:
+            part_path.unlink()
+            raise DownloadValidationError(f'MD5 of {filepath} does not match Content-MD5 {expected_md5}.')
+
+        os.replace(part_path, filepath)
+        _remove_part_validator(part_path)
+        self._write_sidecar(filepath, md5.hexdigest(), etag)
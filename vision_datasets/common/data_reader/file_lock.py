@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import pathlib
+import socket
+import threading
+import time
+import typing
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+def _is_dead_local_process(owner: dict) -> bool:
+    if owner.get('host') != socket.gethostname() or os.name != 'posix':
+        return False
+
+    try:
+        os.kill(owner['pid'], 0)
+    except ProcessLookupError:
+        return True
+    except (PermissionError, KeyError, TypeError):
+        return False
+
+    return False
+
+
+class FileLock:
+    """
+    Lock shared by processes of this machine, or of machines sharing a file system (e.g., NFS), held by creating a lock file exclusively. The lock file records the host and pid of the
+    holder, and is touched by a heartbeat thread while held.
+
+    A lock is stale, and broken by a process waiting for it, if its holder is a dead process of this machine, or if it was not touched for stale_seconds, e.g., after its holder crashed on
+    another machine. Staleness is judged on the time waited, not on the modification time, which is subject to clock skews between machines. A lock file whose holder cannot be read,
+    e.g., left empty by a holder crashing while creating it, is stale once unchanged for stale_seconds.
+    """
+
+    def __init__(self, path: typing.Union[str, pathlib.Path], stale_seconds: float = 120, poll_seconds: float = 0.5, timeout: float = None):
+        """
+        Args:
+            path (str or pathlib.Path): path of the lock file
+            stale_seconds (float): seconds without heartbeat after which a lock is stale
+            poll_seconds (float): interval of checking a lock held by another process
+            timeout (float): max seconds to wait for the lock, None to wait indefinitely
+        """
+
+        if stale_seconds <= 0 or poll_seconds <= 0:
+            raise ValueError('stale_seconds and poll_seconds must be positive.')
+
+        self.path = pathlib.Path(path)
+        self.stale_seconds = stale_seconds
+        self.poll_seconds = poll_seconds
+        self.timeout = timeout
+        self._token = None
+        self._heartbeat = None
+        # state of the lock held by another process, and since when it is unchanged
+        self._observed = None
+        self._observed_since = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Args:
+            blocking (bool): whether to wait for the lock held by another process, or to return at once. Without blocking, a lock is found stale over several calls
+
+        Returns:
+            whether the lock is acquired, always True when blocking
+        """
+
+        start = time.monotonic()
+        while True:
+            if self._try_create():
+                return True
+
+            state = self._read_state()
+            if state != self._observed:
+                self._observed, self._observed_since = state, time.monotonic()
+            owner = state[0] if state else {}
+            if state and (_is_dead_local_process(owner) or time.monotonic() - self._observed_since >= self.stale_seconds):
+                logger.warning(f'Breaking stale lock {self.path} held by {owner}.')
+                self._break(state)
+                continue
+
+            if not blocking:
+                return False
+            if self.timeout is not None and time.monotonic() - start >= self.timeout:
+                raise TimeoutError(f'Timed out waiting for lock {self.path} held by {owner}.')
+            time.sleep(self.poll_seconds)
+
+    def release(self):
+        if self._heartbeat:
+            stop, thread = self._heartbeat
+            stop.set()
+            thread.join()
+            self._heartbeat = None
+
+        state = self._read_state()
+        if self._token and state and state[0].get('token') == self._token:
+            os.remove(self.path)
+        self._token = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def _try_create(self) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        token = uuid.uuid4().hex
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+
+        with os.fdopen(fd, 'w') as f:
+            f.write(json.dumps({'host': socket.gethostname(), 'pid': os.getpid(), 'token': token}))
+
+        self._token = token
+        stop = threading.Event()
+        thread = threading.Thread(target=self._beat, args=(stop,), name='vision_datasets_lock_heartbeat', daemon=True)
+        thread.start()
+        self._heartbeat = (stop, thread)
+        return True
+
+    def _beat(self, stop: threading.Event):
+        while not stop.wait(self.stale_seconds / 4):
+            try:
+                os.utime(self.path)
+            except OSError:
+                return
+
+    def _read_state(self):
+        # (owner, modification time, size) of the lock file, the owner being empty if the file cannot be read, e.g., being written, None if absent
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+
+        try:
+            owner = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            owner = {}
+
+        return (owner if isinstance(owner, dict) else {}), stat.st_mtime, stat.st_size
+
+    def _break(self, stale_state):
+        # the stale lock is moved away then checked, so that a lock created meanwhile by another process is restored rather than removed
+        moved_path = self.path.with_name(f'{self.path.name}.{uuid.uuid4().hex}.stale')
+        try:
+            os.rename(self.path, moved_path)
+        except OSError:
+            return
+
+        try:
+            if json.loads(moved_path.read_text()).get('token') != stale_state[0].get('token'):
+                try:
+                    os.link(moved_path, self.path)
+                except OSError:
+                    pass
+        except (OSError, ValueError):
+            pass
+        finally:
+            os.remove(moved_path)
@@ -6,30 +6,42 @@ from urllib.parse import quote
 from urllib.request import urlopen
 
 from ..utils import can_be_url
+from .lazy_fetcher import LAZY_ZIP_SUFFIX, LazyFileFetcher
 
 
 class MultiProcessZipFile:
     """ZipFile which is readable from multi processes"""
 
-    def __init__(self, filename):
+    def __init__(self, filename, unbuffered=False):
+        """
+        Args:
+            filename: path of the zip file
+            unbuffered (bool): whether to read the file without buffering, for zips written while being read, e.g., by LazyFileFetcher, so that no stale buffered bytes are read
+        """
+
         self.filename = filename
+        self.unbuffered = unbuffered
         self.zipfiles = {}
 
     def open(self, file):
         if os.getpid() not in self.zipfiles:
-            self.zipfiles[os.getpid()] = zipfile.ZipFile(self.filename)
+            self.zipfiles[os.getpid()] = zipfile.ZipFile(open(self.filename, 'rb', buffering=0) if self.unbuffered else self.filename)
         return self.zipfiles[os.getpid()].open(file)
 
     def close(self):
         for z in self.zipfiles.values():
+            fp = z.fp
             z.close()
+            if self.unbuffered and fp:
+                fp.close()
         self.zipfiles = {}
 
     def __getstate__(self):
-        return {'filename': self.filename}
+        return {'filename': self.filename, 'unbuffered': self.unbuffered}
 
     def __setstate__(self, state):
         self.filename = state['filename']
+        self.unbuffered = state.get('unbuffered', False)
         self.zipfiles = {}
 
 
@@ -38,10 +50,13 @@ class FileReader:
      1. <zip_filename>@<file_name>
      2. url
      3. regular file name
+
+     With a fetcher, local files missing are fetched on first access, see LazyFileFetcher and StreamingZipFetcher.
      """
 
-    def __init__(self):
+    def __init__(self, fetcher: LazyFileFetcher = None):
         self.zip_files = {}
+        self.fetcher = fetcher
 
     def open(self, name: Union[pathlib.Path, str], mode='r', encoding=None):
         name = str(name)
@@ -49,11 +64,17 @@ class FileReader:
         if can_be_url(name):
             return urlopen(self._encode_non_ascii(name))
 
+        if self.fetcher is not None:
+            name = self.fetcher.fetch(name)
+            if not isinstance(name, str):
+                # entry of a zip being downloaded, read from the bytes landed, see StreamingZipFetcher
+                return name
+
         # read file from local zip: <zip_filename>@<entry_name>, e.g. images.zip@1.jpg
         if '@' in name:
             zip_path, file_path = name.split('@', 1)
             if zip_path not in self.zip_files:
-                self.zip_files[zip_path] = MultiProcessZipFile(zip_path)
+                self.zip_files[zip_path] = MultiProcessZipFile(zip_path, unbuffered=zip_path.endswith(LAZY_ZIP_SUFFIX))
             return self.zip_files[zip_path].open(file_path)
 
         # read file from local dir
@@ -63,6 +84,8 @@ class FileReader:
         for zip_file in self.zip_files.values():
             zip_file.close()
         self.zip_files = {}
+        if self.fetcher is not None:
+            self.fetcher.stop_warmer()
 
     @staticmethod
     def _encode_non_ascii(s):
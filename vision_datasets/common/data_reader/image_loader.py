@@ -1,6 +1,8 @@
 import logging
+import math
+import time
 
-from PIL import Image
+from ..profiling import get_profiler
 
 logger = logging.getLogger(__name__)
 
@@ -8,13 +10,48 @@ logger = logging.getLogger(__name__)
 ORIENTATION_EXIF_TAG = 0x0112
 
 
+def _record(profiler, stage, start):
+    end = time.perf_counter_ns()
+    profiler.record(stage, start, end)
+    return end
+
+
 class PILImageLoader:
     """Load PIL image and fix image orientation using EXIF"""
 
     @staticmethod
     def load_from_stream(f):
+        return PILImageLoader.load_reduced_from_stream(f, None)[0]
+
+    @staticmethod
+    def load_reduced_from_stream(f, min_scale=None):
+        """
+        Load image, decoding JPEG at the coarsest DCT scale (1/2, 1/4 or 1/8) that keeps at least min_scale of the full resolution. Other formats are decoded at full resolution.
+
+        Args:
+            f: stream of the image
+            min_scale (float): smallest acceptable ratio of the decoded size to the full size, None or >= 1 for full resolution
+
+        Returns:
+            image, scale of the image wrt the full resolution
+        """
+
+        from PIL import Image
+
+        profiler = get_profiler()
+        start = time.perf_counter_ns() if profiler else 0
         image = Image.open(f)
         img_format = image.format
+        reduction = 1
+        if min_scale and min_scale < 1:
+            image.draft(image.mode, (max(1, math.ceil(image.size[0] * min_scale)), max(1, math.ceil(image.size[1] * min_scale))))
+            # JPEG decoder is configured with the reduction factor, no-op for other formats
+            reduction = image.decoderconfig[0] if getattr(image, 'decoderconfig', None) else 1
+
+        if profiler:
+            # decoded here rather than lazily by the first transpose or convert, to be timed on its own
+            image.load()
+            start = _record(profiler, 'decode', start)
 
         try:
             exif = image.getexif()
@@ -32,11 +69,47 @@ class PILImageLoader:
                 image = image.transpose(Image.FLIP_TOP_BOTTOM)
             if orientation == 1 or orientation == 2 or orientation == 5 or orientation == 6:
                 image = image.transpose(Image.FLIP_LEFT_RIGHT)
+        if profiler:
+            start = _record(profiler, 'exif', start)
         # not supported by the convert function
         if image.mode != "I" and image.mode != "F":
             image = image.convert('RGB')
+        if profiler:
+            _record(profiler, 'convert', start)
         image.format = img_format
-        return image
+        return image, 1 / reduction
+
+    @staticmethod
+    def read_size_from_stream(f):
+        """
+        Size (width, height) of the image as loaded by load_from_stream, read from the image header and EXIF orientation, without decoding pixels
+        """
+
+        from PIL import Image
+
+        image = Image.open(f)
+        width, height = image.size
+        try:
+            orientation = image.getexif().get(ORIENTATION_EXIF_TAG)
+        except Exception:
+            orientation = None
+
+        # orientations 5 to 8 transpose the image
+        return (height, width) if orientation and orientation >= 5 else (width, height)
+
+    @staticmethod
+    def loads_as_stored(image) -> bool:
+        """Whether load_from_stream keeps the stored pixels of an opened image, i.e., the image is neither transposed by its EXIF orientation nor converted to another mode"""
+
+        if image.mode not in ('RGB', 'I', 'F'):
+            return False
+
+        try:
+            orientation = image.getexif().get(ORIENTATION_EXIF_TAG)
+        except Exception:
+            return False
+
+        return not orientation or orientation == 1
 
     @staticmethod
     def load_from_file(filepath):
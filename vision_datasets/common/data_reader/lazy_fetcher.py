@@ -0,0 +1,369 @@
+import logging
+import os
+import pathlib
+import struct
+import threading
+import typing
+import uuid
+import zipfile
+from urllib import parse as urlparse
+
+logger = logging.getLogger(__name__)
+
+# suffix of the sparse local copies of the zips read lazily
+LAZY_ZIP_SUFFIX = '.lazy'
+
+_EOCD_SIGNATURE = b'PK\x05\x06'
+_EOCD_SIZE = 22
+_ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+_ZIP64_LOCATOR_SIZE = 20
+_LOCAL_HEADER_SIZE = 30
+# margin fetched after an entry for the local extra field, which might differ from the one of the central directory
+_LOCAL_EXTRA_MARGIN = 1024
+# max size of a range fetched at once
+_MAX_RANGE_SIZE = 64 * 1024 * 1024
+
+
+def _fetch(url: str, start: int = None, end: int = None, suffix: int = None) -> typing.Tuple[bytes, int]:
+    """
+    Fetch bytes [start, end) of url, the last suffix bytes, or the whole file if none is provided
+
+    Returns:
+        the bytes, and the size of the whole file
+    """
+
+    import requests
+
+    headers = {}
+    if suffix is not None:
+        headers['Range'] = f'bytes=-{suffix}'
+    elif start is not None:
+        headers['Range'] = f'bytes={start}-{end - 1}'
+
+    with requests.get(url, headers=headers, allow_redirects=True, timeout=60) as r:
+        r.raise_for_status()
+        content = r.content
+        content_range = r.headers.get('Content-Range')
+
+    if headers and r.status_code != 206:
+        # range not supported by the server, the whole file is returned
+        total_size = len(content)
+        if suffix is not None:
+            return content[-suffix:], total_size
+        return content[start:end], total_size
+
+    return content, int(content_range.rsplit('/', 1)[1]) if content_range else len(content)
+
+
+class _Ranges:
+    """Sorted disjoint [start, end) ranges"""
+
+    def __init__(self):
+        self._ranges = []
+
+    def add(self, start: int, end: int):
+        merged = []
+        for s, e in self._ranges:
+            if e < start or s > end:
+                merged.append((s, e))
+            else:
+                start, end = min(s, start), max(e, end)
+        merged.append((start, end))
+        self._ranges = sorted(merged)
+
+    def covers(self, start: int, end: int) -> bool:
+        return any(s <= start and end <= e for s, e in self._ranges)
+
+
+class _LazyZip:
+    """
+    Sparse local copy of a remote zip, <zip>.lazy, holding the end of central directory and the central directory, and the entries fetched. The ranges fetched are appended to <zip>.lazy.ranges,
+    shared by the processes reading the zip.
+    """
+
+    def __init__(self, zip_path: str, url: str):
+        self.path = zip_path + LAZY_ZIP_SUFFIX
+        self._ranges_path = self.path + '.ranges'
+        self._url = url
+        self._lock = threading.Lock()
+        self._ranges = _Ranges()
+        self.n_bytes_fetched = 0
+        if not os.path.exists(self.path):
+            self._create()
+        self._load_ranges()
+        with zipfile.ZipFile(self.path) as z:
+            self.entries = {info.filename: info for info in z.infolist()}
+        # entries lie before the central directory
+        self._end_of_data = self._central_directory_start()
+
+    def _create(self):
+        tail, size = _fetch(self._url, suffix=_EOCD_SIZE + 65535)
+        tail_start = size - len(tail)
+        cd_offset, cd_size = self._parse_central_directory_location(tail, tail_start)
+        pieces = [(tail_start, tail)]
+        if cd_offset < tail_start:
+            cd, _ = _fetch(self._url, cd_offset, min(cd_offset + cd_size, tail_start))
+            pieces.append((cd_offset, cd))
+        self.n_bytes_fetched += sum(len(data) for _, data in pieces)
+
+        # written to a temp file linked when complete, without replacing a copy created concurrently by another process, which might hold entries fetched already
+        temp_path = f'{self.path}.{uuid.uuid4().hex}.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                f.truncate(size)
+                for offset, data in pieces:
+                    f.seek(offset)
+                    f.write(data)
+            os.link(temp_path, self.path)
+        except FileExistsError:
+            return
+        finally:
+            os.remove(temp_path)
+
+        with open(self._ranges_path, 'a') as f:
+            f.write(''.join(f'{offset} {offset + len(data)}\n' for offset, data in pieces))
+
+    @staticmethod
+    def _parse_central_directory_location(tail: bytes, tail_start: int) -> typing.Tuple[int, int]:
+        eocd_pos = tail.rfind(_EOCD_SIGNATURE)
+        if eocd_pos < 0:
+            raise zipfile.BadZipFile('End of central directory not found.')
+
+        cd_size, cd_offset = struct.unpack('<LL', tail[eocd_pos + 12:eocd_pos + 20])
+        if cd_offset == 0xFFFFFFFF or cd_size == 0xFFFFFFFF:
+            locator_pos = eocd_pos - _ZIP64_LOCATOR_SIZE
+            if locator_pos < 0 or tail[locator_pos:locator_pos + 4] != _ZIP64_LOCATOR_SIGNATURE:
+                raise zipfile.BadZipFile('Zip64 end of central directory locator not found.')
+            zip64_eocd_offset, = struct.unpack('<Q', tail[locator_pos + 8:locator_pos + 16])
+            pos = zip64_eocd_offset - tail_start
+            if pos < 0:
+                raise zipfile.BadZipFile('Zip64 end of central directory too far from the end of the file.')
+            cd_size, cd_offset = struct.unpack('<QQ', tail[pos + 40:pos + 56])
+
+        return cd_offset, cd_size
+
+    def _central_directory_start(self) -> int:
+        with open(self.path, 'rb') as f:
+            f.seek(0, 2)
+            size = f.tell()
+            tail_size = min(size, _EOCD_SIZE + 65535)
+            f.seek(size - tail_size)
+            tail = f.read(tail_size)
+        return self._parse_central_directory_location(tail, size - tail_size)[0]
+
+    def _load_ranges(self):
+        if not os.path.exists(self._ranges_path):
+            return
+        with open(self._ranges_path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2:
+                    self._ranges.add(int(parts[0]), int(parts[1]))
+
+    def fetch_entry(self, entry_name: str):
+        info = self.entries.get(entry_name)
+        if info is None:
+            raise KeyError(f'There is no item named {entry_name} in the archive {self._url.split("?")[0]}.')
+
+        start = info.header_offset
+        end = start + _LOCAL_HEADER_SIZE + len(info.orig_filename.encode('utf-8' if info.flag_bits & 0x800 else 'cp437')) + len(info.extra) + info.compress_size
+        with self._lock:
+            if self._ranges.covers(start, end):
+                return
+            # maybe fetched by another process
+            self._load_ranges()
+            if self._ranges.covers(start, end):
+                return
+
+            fetch_end = min(end + _LOCAL_EXTRA_MARGIN, self._end_of_data)
+            data, _ = _fetch(self._url, start, fetch_end)
+            name_length, extra_length = struct.unpack('<HH', data[26:30])
+            end = start + _LOCAL_HEADER_SIZE + name_length + extra_length + info.compress_size
+            if end > start + len(data):
+                rest, _ = _fetch(self._url, start + len(data), end)
+                data += rest
+
+            self.n_bytes_fetched += len(data)
+            self._write(start, data)
+
+    def entry_spans(self) -> typing.Dict[str, typing.Tuple[int, int]]:
+        """
+        [start, end) of each entry in the zip, from its local header to the next entry or the central directory, data descriptor included
+        """
+
+        infos = sorted(self.entries.values(), key=lambda info: info.header_offset)
+        ends = [info.header_offset for info in infos[1:]] + [self._end_of_data]
+        return {info.filename: (info.header_offset, end) for info, end in zip(infos, ends)}
+
+    def covers(self, start: int, end: int) -> bool:
+        """
+        Whether [start, end) of the zip is fetched or written
+        """
+
+        with self._lock:
+            return self._ranges.covers(start, end)
+
+    def write(self, start: int, data: bytes):
+        """
+        Write bytes of the zip obtained otherwise than fetched, e.g., from another copy
+        """
+
+        with self._lock:
+            self._write(start, data)
+
+    def fetch_ranges(self, ranges: typing.Iterable[typing.Tuple[int, int]]):
+        """
+        Fetch [start, end) ranges of the zip, adjacent ranges being fetched at once
+        """
+
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and merged[-1][1] == start and end - merged[-1][0] <= _MAX_RANGE_SIZE:
+                merged[-1][1] = end
+            else:
+                merged.append([start, end])
+
+        for start, end in merged:
+            for chunk_start in range(start, end, _MAX_RANGE_SIZE):
+                data, _ = _fetch(self._url, chunk_start, min(chunk_start + _MAX_RANGE_SIZE, end))
+                self.n_bytes_fetched += len(data)
+                self.write(chunk_start, data)
+
+    def _write(self, start: int, data: bytes):
+        with open(self.path, 'r+b') as f:
+            f.seek(start)
+            f.write(data)
+        # recorded once the data is written, for other processes to only read ranges fully written
+        with open(self._ranges_path, 'a') as f:
+            f.write(f'{start} {start + len(data)}\n')
+        self._ranges.add(start, start + len(data))
+
+
+class LazyFileFetcher:
+    """
+    Fetcher of the files of a dataset from its container into local_dir on first access, for FileReader to read a dataset without downloading its files beforehand.
+
+    Files are fetched whole, except files in zips (<zip>@<entry>): only the parts of the zip needed to read the entry are fetched, with HTTP range requests, into a sparse local copy <zip>.lazy
+    readable as a zip for the entries fetched. Files and zips already in local_dir, e.g., downloaded by DatasetDownloader, are read as is.
+
+    Files of samples can be fetched ahead of reading them by a background thread, see start_warmer.
+    """
+
+    def __init__(self, container_url: str, local_dir: typing.Union[str, pathlib.Path]):
+        """
+        Args:
+            container_url (str): url of the container of the dataset, with sas token if needed
+            local_dir (str or pathlib.Path): local directory the files are fetched to, the one of the paths of the dataset manifest
+        """
+
+        if not container_url or not local_dir:
+            raise ValueError('container_url and local_dir are required.')
+
+        self.container_url = container_url
+        self.local_dir = local_dir
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._lazy_zips = {}
+        self._warmer = None
+
+    def _reset_if_forked(self):
+        if self._pid != os.getpid():
+            # inherited by a forked worker, the lock might have been held by another thread of the parent
+            self._reset()
+
+    def __getstate__(self):
+        return {'container_url': self.container_url, 'local_dir': self.local_dir}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset()
+
+    def fetch(self, name: str) -> str:
+        """
+        Fetch what is missing locally to read a file, name being a local path or <zip>@<entry> path under local_dir
+
+        Returns:
+            the local path to read the file from, <zip>.lazy@<entry> for an entry of a zip fetched lazily
+        """
+
+        self._reset_if_forked()
+        path, entry_name = name.split('@', 1) if '@' in name else (name, None)
+        relative_path = self._relative_path(path)
+        if relative_path is None or os.path.exists(path):
+            return name
+
+        url = self._url(relative_path)
+        if entry_name is None:
+            self._fetch_file(url, path)
+            return name
+
+        with self._lock:
+            lazy_zip = self._lazy_zips.get(path)
+            if lazy_zip is None:
+                pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+                lazy_zip = self._lazy_zips[path] = _LazyZip(path, url)
+
+        lazy_zip.fetch_entry(entry_name)
+        return f'{lazy_zip.path}@{entry_name}'
+
+    def start_warmer(self, names: typing.Iterable[str]):
+        """
+        Fetch files in a background thread, in the order of names, e.g., the order the samples are read, ahead of reading them. A running warmer is stopped first.
+        """
+
+        self.stop_warmer()
+        stop = threading.Event()
+
+        def warm():
+            for name in names:
+                if stop.is_set():
+                    return
+                try:
+                    self._warm(name, stop)
+                except Exception as e:
+                    logger.warning(f'Failed to fetch {name} ahead: {e}')
+
+        thread = threading.Thread(target=warm, name='vision_datasets_fetch_warmer', daemon=True)
+        thread.start()
+        self._warmer = (thread, stop)
+
+    def _warm(self, name: str, stop: threading.Event):
+        self.fetch(name)
+
+    def join_warmer(self, timeout: float = None):
+        """
+        Wait for the warmer to fetch all files
+        """
+
+        if self._warmer:
+            self._warmer[0].join(timeout)
+
+    def stop_warmer(self):
+        if self._warmer:
+            thread, stop = self._warmer
+            stop.set()
+            thread.join()
+            self._warmer = None
+
+    def _relative_path(self, path: str) -> typing.Optional[str]:
+        relative_path = os.path.relpath(os.path.abspath(path), os.path.abspath(self.local_dir))
+        return None if relative_path == '..' or relative_path.startswith('..' + os.sep) else relative_path
+
+    def _url(self, relative_path: str) -> str:
+        parts = urlparse.urlparse(self.container_url)
+        path = os.path.join(parts[2], relative_path).replace('\\', '/')
+        return urlparse.urlunparse((parts[0], parts[1], path, parts[3], parts[4], parts[5]))
+
+    @staticmethod
+    def _fetch_file(url: str, path: str):
+        logger.debug(f'Fetching {url.split("?")[0]} to {path}.')
+        content, _ = _fetch(url)
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # written to a temp file renamed when complete, the file being fetched concurrently by other threads or processes maybe
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, path)
@@ -0,0 +1,307 @@
+import io
+import logging
+import os
+import pathlib
+import struct
+import threading
+import time
+import typing
+import zipfile
+import zlib
+
+from .dataset_downloader import DatasetDownloader, DownloadValidationError, _expected_size, _lazy_retry, _lock_path, _part_path, _remove_part_validator, _resume_headers, \
+    _write_part_validator
+from .file_lock import FileLock
+from .lazy_fetcher import _LOCAL_HEADER_SIZE, LazyFileFetcher
+
+logger = logging.getLogger(__name__)
+
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+# signatures of the records following the entries: central directory header, zip64 end of central directory and end of central directory
+_END_OF_ENTRIES_SIGNATURES = (b'PK\x01\x02', b'PK\x06\x06', b'PK\x05\x06')
+_ZIP64_EXTRA_ID = 0x0001
+# max size of the chunks written, after each of which the bytes landed are readable
+_CHUNK_SIZE = 1024 * 1024
+
+
+class _StreamingZip:
+    """
+    Zip downloaded sequentially to <zip>.part, renamed to <zip> once complete, the entries of which are readable while being downloaded: the local headers are parsed as the bytes land,
+    indexing the entries on the fly, and entries are read from the bytes landed. The zip is downloaded by one process, holding <zip>.lock, and indexed by each process reading it.
+
+    Entries with sizes in data descriptors, i.e., after their data, stop the indexing, and entries that are encrypted or compressed otherwise than deflated are not read while downloading:
+    they are readable once the download completes.
+    """
+
+    def __init__(self, zip_path: str, url: str, stale_lock_seconds: float):
+        self.zip_path = zip_path
+        self._part_path = str(_part_path(pathlib.Path(zip_path)))
+        self._url = url
+        self._file_lock = FileLock(_lock_path(pathlib.Path(zip_path)), stale_seconds=stale_lock_seconds)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._error = None
+        # entry name -> (data offset, compress size, compress type, CRC), compress type being None for entries not readable while downloading
+        self.entries = {}
+        self._next_header = 0
+        self._all_indexed = False
+        self._indexable = True
+
+    @property
+    def is_complete(self) -> bool:
+        return os.path.exists(self.zip_path)
+
+    def start(self):
+        """
+        Download the zip in a background thread, unless downloaded already, or by another thread or process
+        """
+
+        with self._lock:
+            if self.is_complete or (self._thread is not None and self._thread.is_alive()):
+                return
+            if not self._file_lock.acquire(blocking=False):
+                return
+            self._thread = threading.Thread(target=self._download_and_release, name='vision_datasets_zip_stream', daemon=True)
+            self._thread.start()
+
+    def raise_error(self):
+        """
+        Raise the error of the last download of this process if it failed, once, so that the download is retried on the next start
+        """
+
+        with self._lock:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def read_entry(self, entry_name: str) -> typing.Optional[bytes]:
+        """
+        Content of an entry, None if not landed yet, or not readable before the download completes
+        """
+
+        with self._lock:
+            try:
+                f = open(self._part_path, 'rb', buffering=0)
+            except FileNotFoundError:
+                # download not started, or complete
+                return None
+
+            with f:
+                size = os.fstat(f.fileno()).st_size
+                self._index(f, size)
+                entry = self.entries.get(entry_name)
+                if entry is None:
+                    if self._all_indexed:
+                        raise KeyError(f'There is no item named {entry_name} in the archive {self.zip_path}.')
+                    return None
+
+                data_offset, compress_size, compress_type, crc = entry
+                if compress_type is None or data_offset + compress_size > size:
+                    return None
+                f.seek(data_offset)
+                data = f.read(compress_size)
+
+        try:
+            content = zlib.decompress(data, -15) if compress_type == zipfile.ZIP_DEFLATED else data
+        except zlib.error:
+            return None
+
+        # not fully written yet otherwise, e.g., by a downloader writing chunks out of order
+        return content if zlib.crc32(content) == crc else None
+
+    def _index(self, f, size: int):
+        while self._indexable and not self._all_indexed and self._next_header + _LOCAL_HEADER_SIZE <= size:
+            f.seek(self._next_header)
+            header = f.read(_LOCAL_HEADER_SIZE)
+            if header[:4] in _END_OF_ENTRIES_SIGNATURES:
+                self._all_indexed = True
+                return
+            if header[:4] != _LOCAL_HEADER_SIGNATURE:
+                # not landed yet
+                return
+
+            _, _, flags, compress_type, _, _, crc, compress_size, file_size, name_length, extra_length = struct.unpack('<4s5H3L2H', header)
+            if flags & 0x08:
+                logger.info(f'Entries of {self.zip_path} have data descriptors, they are readable once downloaded.')
+                self._indexable = False
+                return
+
+            name_and_extra = f.read(name_length + extra_length)
+            if len(name_and_extra) < name_length + extra_length:
+                return
+            extra = name_and_extra[name_length:]
+            if compress_size == 0xFFFFFFFF or file_size == 0xFFFFFFFF:
+                compress_size = self._zip64_compress_size(extra)
+
+            readable = not flags & 0x01 and compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+            data_offset = self._next_header + _LOCAL_HEADER_SIZE + name_length + extra_length
+            name = name_and_extra[:name_length].decode('utf-8' if flags & 0x800 else 'cp437')
+            self.entries[name] = (data_offset, compress_size, compress_type if readable else None, crc)
+            self._next_header = data_offset + compress_size
+
+    @staticmethod
+    def _zip64_compress_size(extra: bytes) -> int:
+        pos = 0
+        while pos + 4 <= len(extra):
+            extra_id, extra_size = struct.unpack('<HH', extra[pos:pos + 4])
+            if extra_id == _ZIP64_EXTRA_ID:
+                # both sizes are in the zip64 extra field of local headers, the uncompressed one first
+                return struct.unpack('<QQ', extra[pos + 4:pos + 20])[1]
+            pos += 4 + extra_size
+
+        raise zipfile.BadZipFile('Zip64 extra field not found.')
+
+    def _download_and_release(self):
+        try:
+            if not self.is_complete:
+                self._download()
+        except Exception as e:
+            logger.warning(f'Failed to download {self.zip_path}: {e}')
+            with self._lock:
+                self._error = e
+        finally:
+            self._file_lock.release()
+
+    @_lazy_retry(lambda tenacity: {'stop': tenacity.stop_after_attempt(3), 'reraise': True})
+    def _download(self):
+        import requests
+
+        part_path = pathlib.Path(self._part_path)
+        headers = _resume_headers(part_path)
+        offset = part_path.stat().st_size if headers else 0
+        logger.info(f'Streaming {self._url.split("?")[0]} to {self.zip_path}{f", resuming from byte {offset}" if offset else ""}.')
+        with requests.get(self._url, stream=True, allow_redirects=True, timeout=60, **({'headers': headers} if headers else {})) as r:
+            if offset and r.status_code == 416:
+                os.remove(self._part_path)
+                raise DownloadValidationError(f'Range of {self._part_path} not satisfiable, restarting the download.')
+            r.raise_for_status()
+
+            resumed = bool(offset) and r.status_code == 206
+            if not resumed:
+                _write_part_validator(part_path, r)
+            expected_size = _expected_size(r, offset if resumed else 0)
+            etag = r.headers.get('ETag')
+            # bytes written as they arrive with urllib3 2, by chunks of _CHUNK_SIZE otherwise
+            read = getattr(r.raw, 'read1', r.raw.read)
+            with open(self._part_path, 'ab' if resumed else 'wb') as f:
+                for chunk in iter(lambda: read(_CHUNK_SIZE), b''):
+                    f.write(chunk)
+                    # for the readers of the entries to see the bytes landed
+                    f.flush()
+
+        size = os.path.getsize(self._part_path)
+        if expected_size is not None and size != expected_size:
+            if size > expected_size:
+                os.remove(self._part_path)
+            raise DownloadValidationError(f'Downloaded {size} bytes of {self.zip_path}, expected {expected_size}.')
+
+        os.replace(self._part_path, self.zip_path)
+        _remove_part_validator(part_path)
+        DatasetDownloader._write_sidecar(pathlib.Path(self.zip_path), None, etag)
+        logger.info(f'Downloaded {self.zip_path}.')
+
+
+class StreamingZipFetcher(LazyFileFetcher):
+    """
+    Fetcher of the files of a dataset from its container into local_dir, for FileReader to read a dataset while its zips are being downloaded.
+
+    Zips are downloaded whole, as with DatasetDownloader, while their entries are readable as soon as their bytes land, see _StreamingZip: reading <zip>@<entry> starts the download of
+    the zip in the background if not started already, and waits for the entry to land. Zips can be downloaded ahead, one at a time, in the order the samples refer to them, see
+    start_warmer. Zips are downloaded once by processes sharing local_dir, the others reading the entries landed. Other files are fetched on first access, as with LazyFileFetcher.
+    """
+
+    def __init__(self, container_url: str, local_dir: typing.Union[str, pathlib.Path], poll_seconds: float = 0.05, stale_lock_seconds: float = 120):
+        """
+        Args:
+            container_url (str): url of the container of the dataset, with sas token if needed
+            local_dir (str or pathlib.Path): local directory the files are fetched to, the one of the paths of the dataset manifest
+            poll_seconds (float): interval of checking whether an entry waited for has landed
+            stale_lock_seconds (float): seconds without heartbeat after which the lock of a zip downloaded by another process is broken, see FileLock
+        """
+
+        self.poll_seconds = poll_seconds
+        self.stale_lock_seconds = stale_lock_seconds
+        super().__init__(container_url, local_dir)
+
+    def _reset(self):
+        super()._reset()
+        self._streams = {}
+
+    def __getstate__(self):
+        return {**super().__getstate__(), 'poll_seconds': self.poll_seconds, 'stale_lock_seconds': self.stale_lock_seconds}
+
+    def fetch(self, name: str) -> typing.Union[str, typing.BinaryIO]:
+        """
+        Fetch what is missing locally to read a file, as LazyFileFetcher.fetch, except for zips, which are downloaded whole
+
+        Returns:
+            the local path to read the file from, or for an entry of a zip being downloaded, a file object reading the entry from the bytes landed
+        """
+
+        self._reset_if_forked()
+        path, entry_name = name.split('@', 1) if '@' in name else (name, None)
+        stream = self._stream(path)
+        if stream is None:
+            return super().fetch(name)
+
+        while not stream.is_complete:
+            stream.start()
+            if entry_name is not None:
+                content = stream.read_entry(entry_name)
+                if content is not None:
+                    return io.BytesIO(content)
+            stream.raise_error()
+            time.sleep(self.poll_seconds)
+
+        return name
+
+    def start_warmer(self, names: typing.Iterable[str]):
+        """
+        Download the zips of names in a background thread, one at a time in the order they are first referred to, and fetch the other files ahead, in the order of names. A running
+        warmer is stopped first, the download of the current zip continuing.
+        """
+
+        super().start_warmer(self._zips_first_referred(names))
+
+    @staticmethod
+    def _zips_first_referred(names: typing.Iterable[str]):
+        # names, with the entries of zips replaced by the zip the first time it is referred to
+        zip_paths = set()
+        for name in names:
+            if '@' not in name:
+                yield name
+                continue
+
+            zip_path = name.split('@', 1)[0]
+            if zip_path not in zip_paths:
+                zip_paths.add(zip_path)
+                yield zip_path
+
+    def _warm(self, name: str, stop: threading.Event):
+        stream = self._stream(name)
+        if stream is None:
+            super()._warm(name, stop)
+            return
+
+        while not stream.is_complete:
+            stream.start()
+            stream.raise_error()
+            if stop.wait(self.poll_seconds):
+                return
+
+    def _stream(self, path: str) -> typing.Optional[_StreamingZip]:
+        # the streaming zip of path, None if path is not a zip to download
+        if not path.endswith('.zip') or os.path.exists(path):
+            return None
+
+        relative_path = self._relative_path(path)
+        if relative_path is None:
+            return None
+
+        with self._lock:
+            stream = self._streams.get(path)
+            if stream is None:
+                pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+                stream = self._streams[path] = _StreamingZip(path, self._url(relative_path), self.stale_lock_seconds)
+
+        return stream
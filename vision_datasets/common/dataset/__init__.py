@@ -1,3 +1,4 @@
+from .decoded_image_cache import DecodedImageCache
 from .vision_dataset import VisionDataset
 
-__all__ = ['VisionDataset']
+__all__ = ['DecodedImageCache', 'VisionDataset']
@@ -26,6 +26,13 @@ class BaseDataset(ABC):
         stop = min(self.__len__(), idx.stop)
         return [self.__getitem__(i) for i in range(idx.start, stop, idx.step)] if idx.step else [self.__getitem__(i) for i in range(idx.start, stop)]
 
+    def get_raw_image_path(self, index):
+        """
+        Path of the file, readable by FileReader, whose bytes are the image of a sample as returned, e.g., not cropped. None if there is no such file.
+        """
+
+        return None
+
     @property
     @abstractmethod
     def categories(self):
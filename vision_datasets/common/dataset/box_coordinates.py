@@ -0,0 +1,67 @@
+import typing
+
+import numpy as np
+
+from ..data_manifest import ImageLabelManifest
+
+
+class BoxCoordinateStore:
+    """
+    Bounding boxes [c_id, left, top, right, bottom] of a detection (sub)task, stored as one array with a per-image offset table. Relative coordinates are computed once in bulk from the image
+    width and height in the manifest.
+
+    Arrays returned are read-only views into the store, no copy is made per access. Boxes are kept in float64, so that relative coordinates are identical to the ones computed box by box.
+
+    Label data is snapshotted at construction, so the store has to be rebuilt if boxes or image sizes in the manifest are edited afterwards, see VisionDataset.reset_box_stores.
+    """
+
+    def __init__(self, labels_by_image: typing.Sequence[typing.Sequence[ImageLabelManifest]], widths: typing.Sequence[int], heights: typing.Sequence[int]):
+        """
+        Args:
+            labels_by_image (list): detection labels of each image
+            widths (list): width of each image, None if unknown
+            heights (list): height of each image, None if unknown
+        """
+
+        counts = np.fromiter((len(labels) for labels in labels_by_image), dtype=np.int64, count=len(labels_by_image))
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._absolute = np.array([label.label_data for labels in labels_by_image for label in labels], dtype=np.float64).reshape(-1, 5)
+        self._sizes = np.array([(w or 0, h or 0) for w, h in zip(widths, heights)], dtype=np.float64).reshape(-1, 2)
+
+        box_sizes = np.tile(np.repeat(self._sizes, counts, axis=0), 2)
+        self._relative = self._absolute.copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self._relative[:, 1:] /= box_sizes
+
+        for array in (self._offsets, self._absolute, self._sizes, self._relative):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_manifest(cls, images, task_name: str = None):
+        """
+        Create the store from images of a manifest, for a sub task of multitask manifest if task_name is given
+        """
+
+        labels_by_image = [img.labels for img in images] if task_name is None else [img.labels.get(task_name, []) for img in images]
+        return cls(labels_by_image, [img.width for img in images], [img.height for img in images])
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def absolute_boxes(self, index: int) -> np.ndarray:
+        """
+        [c_id, left, top, right, bottom] in absolute coordinates of the boxes of an image, in shape (n_boxes, 5)
+        """
+
+        return self._absolute[self._offsets[index]:self._offsets[index + 1]]
+
+    def relative_boxes(self, index: int, img_w, img_h) -> typing.Optional[np.ndarray]:
+        """
+        [c_id, left, top, right, bottom] in relative coordinates of the boxes of an image, in shape (n_boxes, 5), or None if (img_w, img_h) is not the size the store was built with
+        """
+
+        w, h = self._sizes[index]
+        if not w or not h or w != img_w or h != img_h:
+            return None
+
+        return self._relative[self._offsets[index]:self._offsets[index + 1]]
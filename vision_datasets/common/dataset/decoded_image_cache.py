@@ -0,0 +1,61 @@
+import collections
+import typing
+
+
+class DecodedImageCache:
+    """
+    Bounded cache of the most recently used decoded images, keyed by position of the image in the manifest, with reuse statistics.
+
+    Images are returned as copies, so that callers can modify them without affecting the cache. Copying a decoded image is much cheaper than reading and decoding it again.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Args:
+            max_size (int): max number of images kept
+        """
+
+        if max_size < 1:
+            raise ValueError('max_size must be equal or greater than 1.')
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._images = collections.OrderedDict()
+
+    def get(self, key, load: typing.Callable):
+        """
+        Copy of the cached image of key, loaded by load() and cached if not cached yet
+        """
+
+        img = self._images.get(key)
+        if img is None:
+            self.misses += 1
+            img = self._images[key] = load()
+            while len(self._images) > self.max_size:
+                self._images.popitem(last=False)
+        else:
+            self.hits += 1
+            self._images.move_to_end(key)
+
+        copy = img.copy()
+        # dropped by copy(), set by PILImageLoader
+        copy.format = img.format
+        return copy
+
+    @property
+    def reuse_ratio(self) -> float:
+        """
+        Ratio of image accesses served from the cache, 0 if no image is accessed yet
+        """
+
+        n_accesses = self.hits + self.misses
+        return self.hits / n_accesses if n_accesses else 0.0
+
+    def clear(self):
+        self._images.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._images)
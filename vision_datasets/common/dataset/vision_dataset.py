@@ -1,17 +1,25 @@
+import collections
 import copy
+import io
+import json
 import logging
 import os.path
 import pathlib
+import pickle
+import shutil
+import socket
+import time
 import typing
-
-from PIL import Image, JpegImagePlugin
-from tqdm import tqdm
+from dataclasses import dataclass
 
 from ..constants import DatasetTypes
-from ..data_reader import FileReader, PILImageLoader
+from ..data_reader import FileReader, LazyFileFetcher, PILImageLoader
+from ..data_reader.file_lock import FileLock, _is_dead_local_process
 from ..dataset_info import BaseDatasetInfo
+from ..profiling import get_profiler
 from ..data_manifest import DatasetManifest, ImageDataManifest, DatasetManifestWithMultiImageLabel, MultiImageLabelManifest
 from .base_dataset import BaseDataset
+from .decoded_image_cache import DecodedImageCache
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +29,7 @@ class VisionDataset(BaseDataset):
 
     """
 
-    def __init__(self, dataset_info: BaseDatasetInfo, dataset_manifest: DatasetManifest, coordinates='relative', dataset_resources=None):
+    def __init__(self, dataset_info: BaseDatasetInfo, dataset_manifest: DatasetManifest, coordinates='relative', dataset_resources=None, image_cache_size=0, file_fetcher: LazyFileFetcher = None):
         """
 
         Args:
@@ -30,6 +38,9 @@ class VisionDataset(BaseDataset):
             coordinates (str): 'relative' or 'absolute', indicating the desired format of the bboxes returned. Works for detection dataset only.
                     This params will be refactored out later as it is OD-specific.
             dataset_resources (str): disposable resources associated with this dataset
+            image_cache_size (int): number of decoded images kept for reuse by annotations sharing images, 0 to disable. Works for DatasetManifestWithMultiImageLabel only,
+                    see image_reuse_order, ImageReuseDistributedSampler and image_cache
+            file_fetcher (LazyFileFetcher): fetcher of the files missing locally on first access, None to read the files as they are, see start_fetch_warmer
         """
 
         if dataset_manifest is None:
@@ -40,10 +51,32 @@ class VisionDataset(BaseDataset):
 
         super().__init__(dataset_info)
 
+        self._box_stores = {}
         self.dataset_manifest = dataset_manifest
         self.coordinates = coordinates
-        self._file_reader = FileReader()
+        self._file_reader = FileReader(file_fetcher)
         self.dataset_resources = dataset_resources
+        self.image_cache = DecodedImageCache(image_cache_size) if image_cache_size and isinstance(dataset_manifest, DatasetManifestWithMultiImageLabel) else None
+
+    @property
+    def dataset_manifest(self):
+        return self._dataset_manifest
+
+    @dataset_manifest.setter
+    def dataset_manifest(self, dataset_manifest):
+        self._dataset_manifest = dataset_manifest
+        self.reset_box_stores()
+        # decoded images are cached by position in the manifest, image_cache is not set yet in __init__
+        if getattr(self, 'image_cache', None) is not None:
+            self.image_cache.clear()
+
+    def reset_box_stores(self):
+        """
+        Drop the boxes precomputed from the manifest, to be called after editing boxes or image sizes of the manifest in place, for get_boxes to reflect the edits. Targets of samples reflect
+        them without reset.
+        """
+
+        self._box_stores = {}
 
     @property
     def categories(self):
@@ -54,7 +87,6 @@ class VisionDataset(BaseDataset):
             return self.dataset_manifest.annotations[index]
 
         image_manifest: ImageDataManifest = self.dataset_manifest.images[index]
-        targets = image_manifest.labels
         w, h = image_manifest.width, image_manifest.height
 
         def load_image():
@@ -64,30 +96,154 @@ class VisionDataset(BaseDataset):
 
         return targets
 
+    def get_boxes(self, index, task_name=None):
+        """
+        Boxes of an image as a read-only array of shape (n_boxes, 5), each row being [c_id, left, top, right, bottom] in the coordinates of the dataset. Relative coordinates are based on the
+        image size in the manifest, the image is loaded only if the size is missing there. Boxes are precomputed on first access, see reset_box_stores.
+
+        Args:
+            index (int): index of the image
+            task_name (str): name of the detection sub task, for multitask dataset only
+        """
+
+        task_type = self.dataset_info.type if task_name is None else self.dataset_info.sub_task_infos[task_name].type
+        if task_type != DatasetTypes.IMAGE_OBJECT_DETECTION:
+            raise ValueError(f'Boxes are only available for {DatasetTypes.IMAGE_OBJECT_DETECTION}, got {task_type}.')
+
+        store = self._get_box_store(task_name)
+        if self.coordinates == 'absolute':
+            return store.absolute_boxes(index)
+
+        image_manifest = self.dataset_manifest.images[index]
+        boxes = store.relative_boxes(index, image_manifest.width, image_manifest.height)
+        if boxes is None:
+            w, h = self._load_image(image_manifest.img_path).size
+            boxes = store.absolute_boxes(index) / [1, w, h, w, h]
+            boxes.flags.writeable = False
+
+        return boxes
+
+    def load_reduced_image(self, index, min_scale=None):
+        """
+        Load the image of a sample, decoded at a reduced resolution if the format allows, see PILImageLoader.load_reduced_from_stream
+
+        Returns:
+            image, scale of the image wrt the full resolution
+        """
+
+        filepath = self.dataset_manifest.images[index].img_path
+        with self._file_reader.open(filepath, 'rb') as f:
+            return PILImageLoader.load_reduced_from_stream(f, min_scale)
+
+    def get_image_size(self, index) -> typing.Tuple[int, int]:
+        """
+        Size (width, height) of the image of a sample, from the manifest, or read from the image header if missing there. Works for DatasetManifest only.
+        """
+
+        if not isinstance(self.dataset_manifest, DatasetManifest):
+            raise ValueError('Image size is only available for single-image datasets.')
+
+        image_manifest = self.dataset_manifest.images[index]
+        if image_manifest.width and image_manifest.height:
+            return image_manifest.width, image_manifest.height
+
+        with self._file_reader.open(image_manifest.img_path, 'rb') as f:
+            return PILImageLoader.read_size_from_stream(f)
+
+    def image_reuse_order(self) -> typing.List[int]:
+        """
+        Order of the samples that keeps the ones sharing images together, for image_cache to serve them. Annotations are sorted by their images, ranked by the number of annotations referencing
+        them, so that annotations sharing the most referenced image come first and consecutively, then grouped by their next most referenced image, and so on.
+        Samples of single-image datasets are returned in their order.
+        """
+
+        if not isinstance(self.dataset_manifest, DatasetManifestWithMultiImageLabel):
+            return list(range(len(self)))
+
+        annotations = self.dataset_manifest.annotations
+        n_references = collections.Counter(img_id for annotation in annotations for img_id in annotation.img_ids)
+
+        def reuse_key(index):
+            return sorted(((-n_references[img_id], img_id) for img_id in annotations[index].img_ids))
+
+        return sorted(range(len(annotations)), key=reuse_key)
+
+    def start_fetch_warmer(self, order: typing.Iterable = None):
+        """
+        Fetch the images of the samples in a background thread, ahead of reading them, in order, e.g., a sampler or batch sampler iterated the same as by the DataLoader, or a list of indices.
+        Works with file_fetcher only.
+
+        Args:
+            order (iterable): indices or batches of indices of the samples, all samples in order if None
+        """
+
+        fetcher = self._file_reader.fetcher
+        if fetcher is None:
+            raise ValueError('Fetch warmer requires a file_fetcher.')
+
+        fetcher.start_warmer(self._image_paths_in_order(range(len(self)) if order is None else order))
+
+    def _image_paths_in_order(self, order: typing.Iterable):
+        for item in order:
+            for index in (item if isinstance(item, (list, tuple)) else [item]):
+                if isinstance(self.dataset_manifest, DatasetManifestWithMultiImageLabel):
+                    for img_id in self.dataset_manifest.annotations[index].img_ids:
+                        yield self.dataset_manifest.images[img_id].img_path
+                else:
+                    yield self.dataset_manifest.images[index].img_path
+
+    def get_raw_image_path(self, index):
+        if isinstance(self.dataset_manifest, DatasetManifestWithMultiImageLabel):
+            return None
+
+        return self.dataset_manifest.images[index].img_path
+
     def __len__(self):
         return len(self.dataset_manifest.images) if isinstance(self.dataset_manifest, DatasetManifest) else len(self.dataset_manifest.annotations)
 
     def _get_single_item(self, index):
         if isinstance(self.dataset_manifest, DatasetManifestWithMultiImageLabel):
             multi_image_label_manifest: MultiImageLabelManifest = self.dataset_manifest.annotations[index]
-            image_manifests = [self.dataset_manifest.images[id] for id in multi_image_label_manifest.img_ids]
-            image = [self._load_image(image_manifest.img_path) for image_manifest in image_manifests]
+            image = [self._load_image_by_id(img_id) for img_id in multi_image_label_manifest.img_ids]
             target = multi_image_label_manifest
         else:
             image_manifest: ImageDataManifest = self.dataset_manifest.images[index]
             image = self._load_image(image_manifest.img_path)
             target = image_manifest.labels
-            if self.coordinates == 'relative':
+            if self.coordinates == 'relative' and self.dataset_info.type in (DatasetTypes.IMAGE_OBJECT_DETECTION, DatasetTypes.MULTITASK):
+                profiler = get_profiler()
+                start = time.perf_counter_ns() if profiler else 0
                 w, h = image.size
-                target = VisionDataset._convert_box_to_relative_if_od(image_manifest.labels, w, h, None, self.dataset_info)
+                target = VisionDataset._convert_box_to_relative_if_od(target, w, h, None, self.dataset_info)
+                if profiler:
+                    profiler.record('target_conversion', start)
 
         return image, target, str(index)
 
     def close(self):
         self._file_reader.close()
 
+    def _get_box_store(self, task_name=None):
+        # Boxes of all images are precomputed on first access, per detection task
+        store = self._box_stores.get(task_name)
+        if store is None:
+            from .box_coordinates import BoxCoordinateStore
+            store = self._box_stores[task_name] = BoxCoordinateStore.from_manifest(self.dataset_manifest.images, task_name)
+
+        return store
+
+    def _load_image_by_id(self, img_id):
+        def load():
+            return self._load_image(self.dataset_manifest.images[img_id].img_path)
+
+        return load() if self.image_cache is None else self.image_cache.get(img_id, load)
+
     def _load_image(self, filepath):
+        profiler = get_profiler()
         try:
+            if profiler:
+                return self._load_image_profiled(filepath, profiler)
+
             with self._file_reader.open(filepath, 'rb') as f:
                 img = PILImageLoader.load_from_stream(f)
                 logger.debug(f'Loaded image from path: {filepath}')
@@ -96,6 +252,19 @@ class VisionDataset(BaseDataset):
             logger.exception(f'Failed to load an image with path: {filepath}')
             raise
 
+    def _load_image_profiled(self, filepath, profiler):
+        # the bytes are read at once, to time reading apart from decoding
+        start = time.perf_counter_ns()
+        with self._file_reader.open(filepath, 'rb') as f:
+            opened = time.perf_counter_ns()
+            profiler.record('open', start, opened)
+            stream = io.BytesIO(f.read())
+        profiler.record('read', opened)
+
+        img = PILImageLoader.load_from_stream(stream)
+        logger.debug(f'Loaded image from path: {filepath}')
+        return img
+
     @staticmethod
     def _convert_box_to_relative_if_od(target: typing.Union[typing.List, dict], img_w, img_h, load_image, dataset_info):
         # Convert absolute coordinates to relative coordinates.
@@ -104,24 +273,55 @@ class VisionDataset(BaseDataset):
             return {task_name: VisionDataset._convert_box_to_relative_if_od(task_target, img_w, img_h, load_image, dataset_info.sub_task_infos[task_name]) for task_name, task_target in target.items()}
 
         if dataset_info.type == DatasetTypes.IMAGE_OBJECT_DETECTION:
-            relative_target = copy.deepcopy(target)
             if not img_w or not img_h:
                 img_w, img_h = load_image().size
 
-            for t in relative_target:
+            relative_target = []
+            for t in target:
                 label = t.label_data
-                t.label_data = [label[0], label[1] / img_w, label[2] / img_h, label[3] / img_w, label[4] / img_h]
+                relative_label = copy.copy(t)
+                relative_label.label_data = [label[0], label[1] / img_w, label[2] / img_h, label[3] / img_w, label[4] / img_h]
+                relative_target.append(relative_label)
             return relative_target
 
         return target
 
 
+@dataclass
+class _CacheEntry:
+    file_name: str
+    width: int
+    height: int
+    annotations: typing.Any
+
+
+# cache decorator of a process in the pool of LocalFolderCacheDecorator.generate_manifest
+_worker_cache = None
+
+
+def _init_cache_worker(cache):
+    global _worker_cache
+    _worker_cache = cache
+
+
+def _cache_group(indices):
+    return _worker_cache._cache_group(indices)
+
+
 class LocalFolderCacheDecorator(BaseDataset):
     """
     Decorate a dataset by caching data in a local folder, in local_cache_params['dir'].
 
+    Each cached sample is recorded in an index under the folder, one record per sample, written atomically. The cache is therefore shared by processes working on the same folder, such as
+    DataLoader workers, and survives a restart when resumed.
+
+    The index records the fingerprint of the cached dataset and params, see _fingerprint, and the process that created it. An index of another fingerprint is cleared. Without resume, an
+    index is cleared unless created by another process alive, e.g., of the same run on this machine, or of another machine. The index is checked and cleared under a lock of the folder.
     """
 
+    _INDEX_DIR_NAME = '.cache_index'
+    _INDEX_INFO_NAME = 'index.json'
+
     def __init__(self, dataset: BaseDataset, local_cache_params: dict):
         """
         Args:
@@ -129,6 +329,11 @@ class LocalFolderCacheDecorator(BaseDataset):
             local_cache_params(dict): params controlling local cache for image access:
                 'dir': local dir for caching crops, it will be auto-created if not exist
                 [optional] 'n_copies': default being 1. if n_copies is greater than 1, then multiple copies will be cached and dataset will be n_copies times bigger
+                [optional] 'resume': default being False. if True, samples recorded in the index by a previous run in 'dir' are reused instead of being cached again, if recorded for the
+                    same dataset and params. Otherwise the index is cleared, unless in use by another process
+                [optional] 'num_workers': default being 1. number of processes used by generate_manifest
+                [optional] 'passthrough': default being True. if True, images returned unmodified by the dataset are cached by hardlinking or copying the source bytes, instead of being
+                    re-encoded. See BaseDataset.get_raw_image_path
         """
 
         if dataset is None:
@@ -137,10 +342,16 @@ class LocalFolderCacheDecorator(BaseDataset):
             raise ValueError
 
         local_cache_params['n_copies'] = local_cache_params.get('n_copies', 1)
+        local_cache_params['resume'] = local_cache_params.get('resume', False)
+        local_cache_params['num_workers'] = local_cache_params.get('num_workers', 1)
+        local_cache_params['passthrough'] = local_cache_params.get('passthrough', True)
 
         if local_cache_params['n_copies'] < 1:
             raise ValueError('n_copies must be equal or greater than 1.')
 
+        if local_cache_params['num_workers'] < 1:
+            raise ValueError('num_workers must be equal or greater than 1.')
+
         super().__init__(dataset.dataset_info)
 
         self._dataset = dataset
@@ -149,8 +360,10 @@ class LocalFolderCacheDecorator(BaseDataset):
             os.makedirs(self._local_cache_params['dir'])
 
         self._local_dir = pathlib.Path(self._local_cache_params['dir'])
-        self._annotations = {}
-        self._paths = {}
+        self._index_dir = self._local_dir / self._INDEX_DIR_NAME
+        self._prepare_index()
+        self._entries = {}
+        self._file_reader = FileReader()
 
     @property
     def categories(self):
@@ -160,18 +373,162 @@ class LocalFolderCacheDecorator(BaseDataset):
         return len(self._dataset) * self._local_cache_params['n_copies']
 
     def _get_single_item(self, index):
-        annotations = self._annotations.get(index)
-        if annotations:
-            return Image.open(self._paths[index]), annotations, str(index)
+        entry = self._get_entry(index)
+        if entry is not None:
+            from PIL import Image
+            return Image.open(self._local_dir / entry.file_name), entry.annotations, str(index)
+
+        img, entry = self._cache_item(index)
+        return img, entry.annotations, str(index)
+
+    def _get_entry(self, index) -> typing.Optional[_CacheEntry]:
+        # cached by this process, or by any other process sharing the folder
+        entry = self._entries.get(index)
+        if entry is None:
+            entry = self._read_record(index)
+            if entry is not None:
+                self._entries[index] = entry
+
+        return entry
+
+    def _fingerprint(self) -> dict:
+        """
+        What the cached samples depend on, records of an index of another fingerprint are not reused. Override to add the params of the wrapped dataset, e.g., its augmentations
+        """
+
+        return {'dataset': type(self._dataset).__name__, 'name': self._dataset.dataset_info.name, 'version': getattr(self._dataset.dataset_info, 'version', None),
+                'n_samples': len(self._dataset), 'n_copies': self._local_cache_params['n_copies'], 'passthrough': self._local_cache_params['passthrough']}
+
+    def _prepare_index(self):
+        fingerprint = json.loads(json.dumps(self._fingerprint(), default=str))
+        # written with the first record
+        self._index_info = {'fingerprint': fingerprint, 'creator': {'host': socket.gethostname(), 'pid': os.getpid()}}
+        info_path = self._index_dir / self._INDEX_INFO_NAME
+        with FileLock(self._local_dir / f'{self._INDEX_DIR_NAME}.lock'):
+            try:
+                info = json.loads(info_path.read_text())
+            except (OSError, ValueError):
+                info = None
+
+            if info is not None and info.get('fingerprint') == fingerprint:
+                creator = info.get('creator', {})
+                created_by_this_process = creator.get('host') == socket.gethostname() and creator.get('pid') == os.getpid()
+                if self._local_cache_params['resume'] or not (created_by_this_process or _is_dead_local_process(creator)):
+                    return
+            elif info is not None and self._local_cache_params['resume']:
+                logger.warning(f'Cache index in {self._local_dir} was created for another dataset or params, it is cleared: {info.get("fingerprint")} != {fingerprint}.')
+
+            if self._index_dir.exists():
+                shutil.rmtree(self._index_dir)
+
+    def _index_groups(self) -> typing.List[typing.Sequence[int]]:
+        """
+        Groups of indices cached together by generate_manifest, each group by a single process. Override with _load_items, for datasets producing several items from one source more
+        cheaply than one by one.
+        """
+
+        n_items = len(self)
+        group_size = self._group_size()
+        return [range(start, min(start + group_size, n_items)) for start in range(0, n_items, group_size)]
+
+    def _group_size(self):
+        # small enough for the work to spread over workers evenly
+        return max(1, min(64, len(self) // (self._local_cache_params['num_workers'] * 4)))
+
+    def _load_items(self, indices: typing.Sequence[int]) -> typing.List[tuple]:
+        """
+        (image, annotations) of the indices to be cached
+        """
+
+        return [self._dataset[index % len(self._dataset)][:2] for index in indices]
+
+    def _cache_group(self, indices: typing.Sequence[int]) -> typing.List[_CacheEntry]:
+        missing = [index for index in indices if self._get_entry(index) is None]
+        for index, item in zip(missing, self._load_items(missing)):
+            self._cache_item(index, item)
+
+        return [self._entries[index] for index in indices]
 
+    def _cache_item(self, index, item: tuple = None):
         idx_in_epoch = index % len(self._dataset)
-        img, annotations, _ = self._dataset[idx_in_epoch]
+        img, annotations = item or self._load_items([index])[0]
         local_img_path = self._construct_local_image_path(index, img.format)
-        self._save_image_matching_quality(img, local_img_path)
-        self._annotations[index] = annotations
-        self._paths[index] = local_img_path
+        if not (self._local_cache_params['passthrough'] and self._save_source_bytes(idx_in_epoch, img, local_img_path)):
+            self._write_atomically(local_img_path, lambda fp: self._save_image_matching_quality(img, fp))
 
-        return img, annotations, str(index)
+        entry = _CacheEntry(local_img_path.name, img.size[0], img.size[1], annotations)
+        self._index_dir.mkdir(exist_ok=True)
+        info_path = self._index_dir / self._INDEX_INFO_NAME
+        if not info_path.exists():
+            self._write_atomically(info_path, lambda fp: fp.write_text(json.dumps(self._index_info)))
+        self._write_atomically(self._record_path(index), lambda fp: fp.write_bytes(pickle.dumps(entry)))
+        self._entries[index] = entry
+
+        return img, entry
+
+    def _record_path(self, index):
+        return self._index_dir / f'{index}.pkl'
+
+    def _read_record(self, index) -> typing.Optional[_CacheEntry]:
+        try:
+            entry = pickle.loads(self._record_path(index).read_bytes())
+        except FileNotFoundError:
+            return None
+
+        return entry if (self._local_dir / entry.file_name).exists() else None
+
+    @staticmethod
+    def _write_atomically(path: pathlib.Path, write):
+        # write to a temp file unique to this process, then rename it, so readers never see a partial file
+        tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _save_source_bytes(self, idx_in_epoch, img, fp: pathlib.Path) -> bool:
+        """
+        Cache the source file of an image as is, if the image decoded from it is the one returned by the dataset. Local files are hardlinked when possible, other files are copied.
+
+        Returns:
+            bool: whether the image is cached
+        """
+
+        source = self._dataset.get_raw_image_path(idx_in_epoch)
+        if not source:
+            return False
+
+        from PIL import Image
+
+        source = str(source)
+        if os.path.isfile(source):
+            with Image.open(source) as stored:
+                if not self._is_decoded_as(stored, img):
+                    return False
+            self._write_atomically(fp, lambda tmp_fp: self._link_or_copy(source, tmp_fp))
+        else:
+            with self._file_reader.open(source, 'rb') as f:
+                data = f.read()
+            with Image.open(io.BytesIO(data)) as stored:
+                if not self._is_decoded_as(stored, img):
+                    return False
+            self._write_atomically(fp, lambda tmp_fp: tmp_fp.write_bytes(data))
+
+        return True
+
+    @staticmethod
+    def _is_decoded_as(stored, img):
+        # stored is only opened, the header is enough to tell
+        return stored.format == img.format and stored.size == img.size and PILImageLoader.loads_as_stored(stored)
+
+    @staticmethod
+    def _link_or_copy(source, fp):
+        try:
+            os.link(source, fp)
+        except OSError:
+            shutil.copyfile(source, fp)
 
     def _construct_local_image_path(self, img_idx, img_format):
         return self._local_dir / f'{img_idx}.{img_format}'
@@ -184,6 +541,7 @@ class LocalFolderCacheDecorator(BaseDataset):
         frmt = img.format
 
         if frmt == 'JPEG':
+            from PIL import JpegImagePlugin
             quantization = getattr(img, 'quantization', None)
             subsampling = JpegImagePlugin.get_sampling(img)
             quality = 100 if quantization is None else -1
@@ -194,18 +552,35 @@ class LocalFolderCacheDecorator(BaseDataset):
     def generate_manifest(self):
         """
         Generate dataset manifest for the cached dataset.
+
+        With 'num_workers' greater than 1, samples are cached by a pool of processes, each working on groups of indices, see _index_groups. Images keep the order of the indices in the manifest.
+        Random augmentations of the wrapped dataset continue from a copy of its random state in each process, so they differ from the ones of a single process run.
         """
 
-        images = []
-        for idx in tqdm(range(len(self)), desc='Generating manifest...'):
-            img, labels, _ = self._get_single_item(idx)  # make sure
-            width, height = img.size
-            image = ImageDataManifest(len(images) + 1, str(self._paths[idx].as_posix()), width, height, labels)
-            images.append(image)
+        from tqdm import tqdm
+
+        groups = self._index_groups()
+        num_workers = min(self._local_cache_params['num_workers'], len(groups))
+        entries = [None] * len(self)
+        if num_workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(num_workers, initializer=_init_cache_worker, initargs=(self,)) as executor:
+                # map yields results in the order of the groups
+                for group, group_entries in tqdm(zip(groups, executor.map(_cache_group, groups)), total=len(groups), desc='Generating manifest...'):
+                    self._entries.update(zip(group, group_entries))
+                    for index, entry in zip(group, group_entries):
+                        entries[index] = entry
+        else:
+            for group in tqdm(groups, desc='Generating manifest...'):
+                for index, entry in zip(group, self._cache_group(group)):
+                    entries[index] = entry
+
+        images = [ImageDataManifest(i + 1, str((self._local_dir / entry.file_name).as_posix()), entry.width, entry.height, entry.annotations) for i, entry in enumerate(entries)]
 
         manifest = getattr(self._dataset, "dataset_manifest", None)
         additional_info = None if manifest is None else manifest.additional_info
         return DatasetManifest(images, self.categories, self._dataset.dataset_info.type, additional_info)
 
     def close(self):
+        self._file_reader.close()
         self._dataset.close()
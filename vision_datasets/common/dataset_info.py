@@ -1,3 +1,4 @@
+import copy
 import logging
 from .constants import AnnotationFormats, DatasetTypes, Usages
 
@@ -43,6 +44,16 @@ class BaseDatasetInfo:
         self.root_folder = dataset_info_dict.get('root_folder')
         self.description = dataset_info_dict.get('description', '')
         self.data_format = AnnotationFormats[dataset_info_dict.get('format', 'IRIS').upper()]
+        # path of the content manifest of the version, relative to root_folder, see ContentManifest
+        self.content_manifest = dataset_info_dict.get('content_manifest')
+
+    def copy(self):
+        """
+        Copy that can be edited independently of this info, which is much cheaper than deepcopy. Containers that callers edit (e.g., index_files) are copied, while immutable values
+        and read-only data (e.g., KVP schema) are shared.
+        """
+
+        return copy.copy(self)
 
 
 class DatasetInfo(BaseDatasetInfo):
@@ -67,6 +78,12 @@ class DatasetInfo(BaseDatasetInfo):
             self.labelmap = None
             self.image_metadata_path = None
 
+    def copy(self):
+        info = super().copy()
+        info.index_files = dict(self.index_files)
+        info.files_for_local_usage = {usage: list(files) for usage, files in self.files_for_local_usage.items()}
+        return info
+
 
 class MultiTaskDatasetInfo(BaseDatasetInfo):
     def __init__(self, dataset_info_dict):
@@ -85,6 +102,11 @@ class MultiTaskDatasetInfo(BaseDatasetInfo):
 
         self.sub_task_infos = info_dict
 
+    def copy(self):
+        info = super().copy()
+        info.sub_task_infos = {task_name: task_info.copy() for task_name, task_info in self.sub_task_infos.items()}
+        return info
+
     @property
     def task_names(self):
         return list(self.sub_task_infos.keys())
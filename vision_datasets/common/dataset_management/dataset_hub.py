@@ -1,4 +1,5 @@
 import logging
+import pathlib
 from typing import List, Union, Tuple
 
 from ..constants import Usages
@@ -6,7 +7,7 @@ from ..data_manifest import ManifestMerger, DatasetManifest
 from ..dataset_info import MultiTaskDatasetInfo, BaseDatasetInfo
 from ..factory import DataManifestFactory, ManifestMergeStrategyFactory
 from ..dataset import VisionDataset
-from ..data_reader import DatasetDownloader, DownloadedDatasetsResources
+from ..data_reader import DatasetDownloader, DownloadedDatasetsResources, LazyFileFetcher, StreamingZipFetcher
 from .dataset_registry import DatasetRegistry
 
 logger = logging.getLogger(__name__)
@@ -18,7 +19,7 @@ class DatasetHub(object):
     This hub class works with both resources on local disk or on azure blob.
     """
 
-    def __init__(self, dataset_json_str: Union[str, list], container_url: str, local_dir: str):
+    def __init__(self, dataset_json_str: Union[str, list], container_url: str, local_dir: str, lazy_fetch: bool = False, stream_zips: bool = False):
         """
             If local_dir is provided, manifest_dataset consumes data from local disk. If data not present on local disk, it will be automatically downloaded.
             if container_url is provided but local_dir not provided, manifest_dataset consumes data directly from container_url.
@@ -29,16 +30,24 @@ class DatasetHub(object):
                 retrievable by their names, versions and usages.
             container_url (str): sas url to the container where datasets can be found/downloaded from
             local_dir (str): local directory where datasets can be found/downloaded to
+            lazy_fetch (bool): with both container_url and local_dir, whether to fetch the images to local_dir on first access, instead of downloading files_for_local_usage beforehand.
+                Only the index files are downloaded beforehand, and only the images read are fetched, see LazyFileFetcher and VisionDataset.start_fetch_warmer
+            stream_zips (bool): with both container_url and local_dir, whether to download the zips of files_for_local_usage in the background, their images being readable as soon as
+                downloaded, instead of downloading them beforehand. Only the index files are downloaded beforehand, see StreamingZipFetcher
         """
         if not dataset_json_str:
             raise ValueError
         if not container_url and not local_dir:
             raise ValueError('either container_url or local_dir should be provided.')
+        if lazy_fetch and stream_zips:
+            raise ValueError('lazy_fetch and stream_zips are exclusive.')
         self.dataset_registry = DatasetRegistry(dataset_json_str)
         self.container_url = container_url
         self.local_dir = local_dir
+        self.lazy_fetch = lazy_fetch
+        self.stream_zips = stream_zips
 
-    def create_vision_dataset(self, name: str, version: int = None, usage: Union[str, List] = Usages.TRAIN, coordinates: str = 'relative') -> VisionDataset:
+    def create_vision_dataset(self, name: str, version: int = None, usage: Union[str, List] = Usages.TRAIN, coordinates: str = 'relative', image_cache_size: int = 0) -> VisionDataset:
         """Create manifest dataset.
 
             Note that for data stored in zipped files, they can be consumed locally without unzip. However, in blob they must be stored in unzipped folders. In this case image/label file paths can
@@ -49,6 +58,7 @@ class DatasetHub(object):
             version: dataset version, if not specified, latest version will be returned
             usage: usage(s) of the dataset, 'train', 'val' or 'test' or a list of usages
             coordinates: format of the bounding boxes, can be 'relative' or 'absolute'
+            image_cache_size: number of decoded images kept for reuse by annotations sharing images, for multi-image datasets, see VisionDataset
 
         Returns:
             an instance of dataset for local usage
@@ -57,7 +67,19 @@ class DatasetHub(object):
         if manifest is None:
             return None
 
-        return VisionDataset(dataset_info, manifest, coordinates, downloader_resources)
+        file_fetcher = None
+        if self.container_url and self.local_dir:
+            if self.lazy_fetch:
+                file_fetcher = LazyFileFetcher(self.container_url, self.local_dir)
+            elif self.stream_zips:
+                file_fetcher = StreamingZipFetcher(self.container_url, self.local_dir)
+
+        dataset = VisionDataset(dataset_info, manifest, coordinates, downloader_resources, image_cache_size, file_fetcher)
+        if self.stream_zips and file_fetcher is not None:
+            # zips downloaded in the order the samples refer to them
+            dataset.start_fetch_warmer()
+
+        return dataset
 
     def create_dataset_manifest(self, name: str, version: int = None, usage: Union[str, List] = Usages.TRAIN) -> Tuple[DatasetManifest, BaseDatasetInfo, DownloadedDatasetsResources]:
         """Create dataset manifest.
@@ -68,7 +90,8 @@ class DatasetHub(object):
             usage: usage(s) of the dataset, 'train', 'val' or 'test' or a list of usages
 
         Returns:
-            dataset manifest, dataset_info, downloaded_resources, if dataset exists, else None
+            dataset manifest, dataset_info, downloaded_resources, if dataset exists, else None. The manifest of several usages of a single-task dataset holds read-only views over
+            the manifests of the usages (LazyMergedImages, LazyMergedAnnotations), call materialize() on them for editable copies
         """
         if not name:
             raise ValueError
@@ -89,26 +112,50 @@ class DatasetHub(object):
 
         downloader_resources = None
         if self.container_url and self.local_dir:
-            downloader = DatasetDownloader(self.container_url, self.dataset_registry.get_dataset_info(name, version))
-            downloader_resources_usage = downloader.download(self.local_dir, usages)
+            full_dataset_info = self.dataset_registry.get_dataset_info(name, version)
+            downloader = DatasetDownloader(self.container_url, full_dataset_info)
+            if full_dataset_info.content_manifest and not self.lazy_fetch and not self.stream_zips:
+                # only the files changed from a previous version downloaded are downloaded
+                downloader_resources_usage = downloader.sync(self.local_dir, usages, self._find_local_previous_version(full_dataset_info))
+            else:
+                downloader_resources_usage = downloader.download(self.local_dir, usages, include_files_for_local_usage=not self.lazy_fetch and not self.stream_zips)
         else:
             downloader_resources_usage = None
 
-        manifest = None
+        manifests = []
         for usage in usages:
             manifest_usage = DataManifestFactory.create(dataset_info, usage, self.local_dir or self.container_url)
             if manifest_usage is not None:
-                merger = ManifestMerger(ManifestMergeStrategyFactory.create(dataset_info.type))
-                manifest = merger.run(manifest, manifest_usage) if manifest else manifest_usage
+                manifests.append(manifest_usage)
 
             if downloader_resources_usage:
                 downloader_resources = DownloadedDatasetsResources.merge(downloader_resources, downloader_resources_usage) if downloader_resources else downloader_resources_usage
+
+        # merge all usages at once; single-task usages are merged lazily, as views over the usage manifests without copying the images
+        if len(manifests) > 1:
+            strategy_kwargs = {} if isinstance(dataset_info, MultiTaskDatasetInfo) else {'lazy': True}
+            merger = ManifestMerger(ManifestMergeStrategyFactory.create(dataset_info.type, **strategy_kwargs))
+            manifest = merger.run(*manifests)
+        else:
+            manifest = manifests[0] if manifests else None
+
         if manifest is None:
             logger.warning(f'Dataset with {name}, version {version}, and usage(s) {usages} not found.')
             return None, None, None
 
         return manifest, dataset_info, downloader_resources
 
+    def _find_local_previous_version(self, dataset_info: BaseDatasetInfo):
+        # latest version before dataset_info with files in local_dir, in another root folder
+        for version in reversed(self.dataset_registry.get_versions(dataset_info.name)):
+            if version >= dataset_info.version:
+                continue
+            previous = self.dataset_registry.get_dataset_info(dataset_info.name, version)
+            if previous.root_folder != dataset_info.root_folder and (pathlib.Path(self.local_dir) / (previous.root_folder or '')).is_dir():
+                return previous
+
+        return None
+
     def list_data_version_and_types(self):
         """List all dataset names, versions and types
         """
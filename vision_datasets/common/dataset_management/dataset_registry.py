@@ -1,32 +1,87 @@
-import copy
 import json
-from typing import Union
+import pathlib
+from typing import Dict, List, Union
 
-from ..dataset_info import DatasetInfoFactory
+from ..dataset_info import BaseDatasetInfo, DatasetInfoFactory
 
 
 class DatasetRegistry:
     """
     A central registry of all available datasets
+
+    Datasets are indexed by (name, version) when registered, while each dataset info is only parsed the first time it is accessed.
     """
 
     def __init__(self, datasets_json: Union[str, list]):
-        if isinstance(datasets_json, list):
-            self.datasets = [DatasetInfoFactory.create(d) for dj in datasets_json for d in json.loads(dj)]
-        else:
-            self.datasets = [DatasetInfoFactory.create(d) for d in json.loads(datasets_json)]
+        """
+        Args:
+            datasets_json (str or list): registry json containing a list of dataset info dicts, or a list of such jsons
+        """
+
+        self._dataset_dicts: List[dict] = []
+        self._parsed: Dict[int, BaseDatasetInfo] = {}
+        self._positions_by_name: Dict[str, Dict[int, int]] = {}
+        for dj in (datasets_json if isinstance(datasets_json, list) else [datasets_json]):
+            self.add_datasets_json(dj)
+
+    @classmethod
+    def from_json_files(cls, json_file_paths: List[Union[str, pathlib.Path]]) -> 'DatasetRegistry':
+        """
+        Create a registry from multiple registry json files, loaded one after another
+        """
+
+        registry = cls([])
+        for json_file_path in json_file_paths:
+            registry.add_datasets_json(pathlib.Path(json_file_path).read_text(encoding='utf-8'))
+        return registry
+
+    def add_datasets_json(self, datasets_json: str):
+        """
+        Register the datasets in a registry json. A dataset with the same name and version as a registered one takes its place in lookups.
+        """
+
+        for dataset_dict in json.loads(datasets_json):
+            versions = self._positions_by_name.setdefault(dataset_dict['name'], {})
+            versions[dataset_dict.get('version', 1)] = len(self._dataset_dicts)
+            self._dataset_dicts.append(dataset_dict)
+
+    @property
+    def datasets(self) -> List[BaseDatasetInfo]:
+        return [self._get_parsed_dataset_info(i) for i in range(len(self._dataset_dicts))]
 
     def get_dataset_info(self, dataset_name, dataset_version=None):
-        datasets = [d for d in self.datasets if d.name == dataset_name and (not dataset_version or d.version == dataset_version)]
-        if not datasets:
+        """
+        Get the info of a dataset, of the latest version if dataset_version is not specified.
+
+        The returned info is a copy that can be edited without affecting the registry, see BaseDatasetInfo.copy.
+        """
+
+        versions = self._positions_by_name.get(dataset_name)
+        if not versions:
+            return None
+
+        position = versions.get(dataset_version) if dataset_version else versions[max(versions)]
+        if position is None:
             return None
 
-        sorted_datasets = sorted(datasets, key=lambda d: d.version)
-        return copy.deepcopy(sorted_datasets[-1])
+        return self._get_parsed_dataset_info(position).copy()
+
+    def get_versions(self, dataset_name) -> List[int]:
+        """
+        Versions of a dataset, in ascending order
+        """
+
+        return sorted(self._positions_by_name.get(dataset_name, {}))
 
     def list_data_version_and_types(self):
         return [{'name': d.name, 'version': d.version, 'type': d.type, 'description': d.description} for d in self.datasets]
 
+    def _get_parsed_dataset_info(self, position: int) -> BaseDatasetInfo:
+        info = self._parsed.get(position)
+        if info is None:
+            info = self._parsed[position] = DatasetInfoFactory.create(self._dataset_dicts[position])
+        return info
+
     @staticmethod
     def _get_default_dataset_json(json_file_name):
         import sys
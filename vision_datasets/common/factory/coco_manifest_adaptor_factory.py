@@ -1,4 +1,5 @@
 from ..data_manifest import CocoManifestAdaptorBase
+from .deferred_registration import ensure_registered
 
 
 class CocoManifestAdaptorFactory:
@@ -13,5 +14,5 @@ class CocoManifestAdaptorFactory:
 
     @classmethod
     def create(cls, data_type: str, *args, **kwargs) -> CocoManifestAdaptorBase:
-
+        ensure_registered(data_type)
         return cls._mapping[data_type](*args, **kwargs)
@@ -0,0 +1,42 @@
+import importlib
+import typing
+
+from ..constants import DatasetTypes
+
+# Task modules register their operations into the factories when imported. They are only imported when an operation of their data type is first requested.
+_TASK_MODULE_BY_DATA_TYPE = {
+    DatasetTypes.MULTITASK: 'multi_task',
+    DatasetTypes.IMAGE_CLASSIFICATION_MULTILABEL: 'image_classification',
+    DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS: 'image_classification',
+    DatasetTypes.IMAGE_OBJECT_DETECTION: 'image_object_detection',
+    DatasetTypes.IMAGE_TEXT_MATCHING: 'image_text_matching',
+    DatasetTypes.IMAGE_MATTING: 'image_matting',
+    DatasetTypes.IMAGE_REGRESSION: 'image_regression',
+    DatasetTypes.IMAGE_CAPTION: 'image_caption',
+    DatasetTypes.TEXT_2_IMAGE_RETRIEVAL: 'text_2_image_retrieval',
+    DatasetTypes.VISUAL_QUESTION_ANSWERING: 'visual_question_answering',
+    DatasetTypes.VISUAL_OBJECT_GROUNDING: 'visual_object_grounding',
+    DatasetTypes.KEY_VALUE_PAIR: 'key_value_pair',
+}
+
+_ROOT_PACKAGE = __name__.split('.')[0]
+_registered = set()
+
+
+def ensure_registered(data_type: DatasetTypes):
+    """
+    Import the task module of data_type, if not yet, so that its operations are registered in the factories
+    """
+
+    if data_type in _registered:
+        return
+
+    module = _TASK_MODULE_BY_DATA_TYPE.get(data_type)
+    if module:
+        importlib.import_module(f'{_ROOT_PACKAGE}.{module}')
+    _registered.add(data_type)
+
+
+def ensure_all_registered(data_types: typing.Iterable[DatasetTypes] = None):
+    for data_type in (data_types or _TASK_MODULE_BY_DATA_TYPE):
+        ensure_registered(data_type)
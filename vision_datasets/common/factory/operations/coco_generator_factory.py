@@ -1,5 +1,6 @@
 from ...constants import DatasetTypes
 from ...data_manifest import GenerateCocoDictBase
+from ..deferred_registration import ensure_registered
 from .supported_operations_by_data_type import SupportedOperationsByDataType
 
 
@@ -16,4 +17,5 @@ class CocoDictGeneratorFactory:
 
     @classmethod
     def create(cls, data_type: DatasetTypes, *args, **kwargs) -> GenerateCocoDictBase:
+        ensure_registered(data_type)
         return cls._mapping[data_type](*args, **kwargs)
@@ -1,6 +1,7 @@
 import typing
 from ...constants import DatasetTypes
 from ...data_manifest import SampleBaseConfig, SampleStrategy, SampleStrategyType
+from ..deferred_registration import ensure_all_registered, ensure_registered
 from .supported_operations_by_data_type import SupportedOperationsByDataType
 
 
@@ -21,10 +22,12 @@ class SampleStrategyFactory:
 
     @classmethod
     def create(cls, data_type: DatasetTypes, strategy_type: SampleStrategyType, config: SampleBaseConfig, *args, **kwargs) -> SampleStrategy:
+        ensure_registered(data_type)
         return cls._mapping[(data_type, strategy_type)](config, *args, **kwargs)
 
     @classmethod
     def list_data_types(cls, strategy_type: SampleStrategyType) -> typing.Iterable[DatasetTypes]:
+        ensure_all_registered()
         for key in cls._mapping:
             if key[1] == strategy_type:
                 yield key[0]
@@ -1,6 +1,7 @@
 import typing
 from ...constants import DatasetTypes
 from ...data_manifest import Spawn, SpawnConfig
+from ..deferred_registration import ensure_all_registered, ensure_registered
 from .supported_operations_by_data_type import SupportedOperationsByDataType
 
 
@@ -21,9 +22,10 @@ class SpawnFactory:
 
     @classmethod
     def create(cls, data_type: DatasetTypes, config: SpawnConfig, *args, **kwargs) -> Spawn:
-
+        ensure_registered(data_type)
         return cls._mapping[data_type](config, *args, **kwargs)
 
     @classmethod
     def list_data_types(cls) -> typing.Iterable[DatasetTypes]:
+        ensure_all_registered()
         return list(cls._mapping.keys())
@@ -1,4 +1,5 @@
 from ...constants import DatasetTypes
+from ..deferred_registration import ensure_registered
 
 
 class SupportedOperationsByDataType:
@@ -11,4 +12,5 @@ class SupportedOperationsByDataType:
 
     @classmethod
     def list(cls, data_type: DatasetTypes):
+        ensure_registered(data_type)
         return cls._mapping.get(data_type, [])
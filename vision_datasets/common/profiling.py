@@ -0,0 +1,209 @@
+import glob
+import json
+import logging
+import multiprocessing.util
+import os
+import pathlib
+import threading
+import time
+import typing
+
+# stages timed by the hooks in VisionDataset, PILImageLoader and TorchDataset
+STAGES = ['open', 'read', 'decode', 'exif', 'convert', 'target_conversion', 'transform']
+
+_SNAPSHOT_FILE_PREFIX = 'profile_'
+
+logger = logging.getLogger(__name__)
+
+
+class StageProfiler:
+    """
+    Per-process recorder of the time spent in each stage of loading samples, see STAGES.
+
+    The latest events (stage, start, duration) are kept in a ring buffer of fixed capacity, for tracing. Count, total and max duration of each stage are kept for all events. Times are of
+    time.perf_counter_ns, a clock shared by the processes of a machine, so that events of DataLoader workers line up in a trace.
+
+    A profiler enabled before DataLoader workers are forked is inherited by the workers, each worker recording its own events. With output_dir set, the workers dump their snapshot to it when
+    they exit, to be merged by merge_snapshots and load_snapshots.
+    """
+
+    def __init__(self, capacity: int = 65536, output_dir: typing.Union[str, pathlib.Path] = None):
+        """
+        Args:
+            capacity (int): number of latest events kept for tracing
+            output_dir (str or pathlib.Path): folder the snapshots of the processes are dumped to on exit, None to not dump them
+        """
+
+        if capacity < 1:
+            raise ValueError('capacity must be equal or greater than 1.')
+
+        self.capacity = capacity
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._stages = [None] * self.capacity
+        self._starts = [0] * self.capacity
+        self._durations = [0] * self.capacity
+        self._n_events = 0
+        # stage => [count, total ns, max ns]
+        self._totals = {}
+        self._dump_registered = False
+
+    def record(self, stage: str, start_ns: int, end_ns: int = None):
+        """
+        Record an event of stage, from start_ns to end_ns (now if None), in time.perf_counter_ns
+        """
+
+        end_ns = time.perf_counter_ns() if end_ns is None else end_ns
+        duration = end_ns - start_ns
+        if self._pid != os.getpid():
+            # inherited by a forked worker: events of the parent are not the ones of this process, and the lock might have been held by another thread of the parent
+            self._lock = threading.Lock()
+            self._reset()
+        with self._lock:
+            if self.output_dir and not self._dump_registered:
+                self._dump_registered = True
+                multiprocessing.util.Finalize(self, self._dump_on_exit, exitpriority=0)
+
+            pos = self._n_events % self.capacity
+            self._stages[pos] = stage
+            self._starts[pos] = start_ns
+            self._durations[pos] = duration
+            self._n_events += 1
+
+            totals = self._totals.get(stage)
+            if totals is None:
+                self._totals[stage] = [1, duration, duration]
+            else:
+                totals[0] += 1
+                totals[1] += duration
+                if duration > totals[2]:
+                    totals[2] = duration
+
+    def snapshot(self) -> dict:
+        """
+        Picklable and json serializable state of the profiler: pid, totals by stage, and the events kept, oldest first
+        """
+
+        with self._lock:
+            n_kept = min(self._n_events, self.capacity)
+            first = self._n_events - n_kept
+            positions = [(first + i) % self.capacity for i in range(n_kept)]
+            return {
+                'pid': os.getpid(),
+                'totals': {stage: list(totals) for stage, totals in self._totals.items()},
+                'events': [[self._stages[p], self._starts[p], self._durations[p]] for p in positions]
+            }
+
+    def stats(self) -> typing.Dict[str, dict]:
+        """
+        Stats of each stage of this process, see merge_snapshots
+        """
+
+        return merge_snapshots([self.snapshot()])
+
+    def dump(self, path: typing.Union[str, pathlib.Path] = None) -> pathlib.Path:
+        """
+        Write the snapshot as json to path, by default to output_dir/profile_<pid>.json
+        """
+
+        if path is None:
+            if not self.output_dir:
+                raise ValueError('path is required when output_dir is not set.')
+            path = pathlib.Path(self.output_dir) / f'{_SNAPSHOT_FILE_PREFIX}{os.getpid()}.json'
+
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.snapshot()))
+        return path
+
+    def _dump_on_exit(self):
+        try:
+            self.dump()
+        except OSError as e:
+            logger.warning(f'Failed to dump the profile of process {os.getpid()} to {self.output_dir}: {e}')
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+_profiler: typing.Optional[StageProfiler] = None
+
+
+def enable_profiling(capacity: int = 65536, output_dir: typing.Union[str, pathlib.Path] = None) -> StageProfiler:
+    """
+    Enable timing the stages of loading samples in this process, and in DataLoader workers forked afterwards. Profiling is off by default, the hooks costing a global lookup then.
+
+    Returns:
+        the profiler recording the stages
+    """
+
+    global _profiler
+    _profiler = StageProfiler(capacity, output_dir)
+    return _profiler
+
+
+def disable_profiling():
+    global _profiler
+    _profiler = None
+
+
+def get_profiler() -> typing.Optional[StageProfiler]:
+    """
+    The enabled profiler, None if profiling is disabled
+    """
+
+    return _profiler
+
+
+def load_snapshots(output_dir: typing.Union[str, pathlib.Path]) -> typing.List[dict]:
+    """
+    Snapshots dumped to output_dir by the processes, see StageProfiler.dump
+    """
+
+    snapshots = []
+    for path in sorted(glob.glob(os.path.join(str(output_dir), f'{_SNAPSHOT_FILE_PREFIX}*.json'))):
+        with open(path) as f:
+            snapshots.append(json.load(f))
+
+    return snapshots
+
+
+def merge_snapshots(snapshots: typing.Iterable[dict]) -> typing.Dict[str, dict]:
+    """
+    Stats of each stage over the processes of the snapshots, e.g., the main process and the DataLoader workers
+
+    Returns:
+        dict of stage to {'count', 'total_ms', 'mean_ms', 'max_ms', 'share'}, share being the fraction of the total time of all stages
+    """
+
+    merged = {}
+    for snapshot in snapshots:
+        for stage, (count, total, max_duration) in snapshot['totals'].items():
+            m = merged.setdefault(stage, [0, 0, 0])
+            m[0] += count
+            m[1] += total
+            m[2] = max(m[2], max_duration)
+
+    total_all = sum(m[1] for m in merged.values())
+    order = {stage: i for i, stage in enumerate(STAGES)}
+    return {stage: {'count': count, 'total_ms': total / 1e6, 'mean_ms': total / 1e6 / count, 'max_ms': max_duration / 1e6, 'share': total / total_all if total_all else 0.0}
+            for stage, (count, total, max_duration) in sorted(merged.items(), key=lambda x: order.get(x[0], len(order)))}
+
+
+def to_chrome_trace(snapshots: typing.Iterable[dict]) -> dict:
+    """
+    Events of the snapshots in the Chrome trace event format, one track per process, to be written as json and opened in chrome://tracing or Perfetto
+    """
+
+    trace_events = []
+    for snapshot in snapshots:
+        pid = snapshot['pid']
+        trace_events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': f'vision_datasets pid {pid}'}})
+        trace_events += [{'name': stage, 'cat': 'vision_datasets', 'ph': 'X', 'ts': start / 1e3, 'dur': duration / 1e3, 'pid': pid, 'tid': 0} for stage, start, duration in snapshot['events']]
+
+    return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
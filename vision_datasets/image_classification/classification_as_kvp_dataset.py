@@ -1,19 +1,18 @@
 import logging
 import typing
 from abc import ABC, abstractmethod
-from copy import deepcopy
 
-from vision_datasets.common import DatasetTypes, KeyValuePairDatasetInfo, VisionDataset
+from vision_datasets.common import DatasetTypes, VisionDataset
 from vision_datasets.key_value_pair import (
-    KeyValuePairDatasetManifest,
     KeyValuePairLabelManifest,
+    VisionAsKeyValuePairDatasetBase,
 )
 
 logger = logging.getLogger(__name__)
 
 
-class ClassificationAsKeyValuePairDatasetBase(VisionDataset, ABC):
-    """Dataset class that access Classification datset as KeyValuePair dataset."""
+class ClassificationAsKeyValuePairDatasetBase(VisionAsKeyValuePairDatasetBase, ABC):
+    """Dataset class that access Classification datset as KeyValuePair dataset, see VisionAsKeyValuePairDatasetBase."""
 
     def __init__(self, classification_dataset: VisionDataset, class_type_name: str):
         """
@@ -27,35 +26,17 @@ class ClassificationAsKeyValuePairDatasetBase(VisionDataset, ABC):
             raise ValueError
 
         self.class_type_name = class_type_name
-        # Generate schema and update dataset info
-        classification_dataset = deepcopy(classification_dataset)
-
-        dataset_info_dict = classification_dataset.dataset_info.__dict__
-        dataset_info_dict["type"] = DatasetTypes.KEY_VALUE_PAIR.name.lower()
-        self.class_names = [c.name for c in classification_dataset.dataset_manifest.categories]
-        self.class_id_to_names = {c.id: c.name for c in classification_dataset.dataset_manifest.categories}
-        self.img_id_to_pos = {x.id: i for i, x in enumerate(classification_dataset.dataset_manifest.images)}
-
-        schema = self.create_schema_with_class_names(self.class_names)
-        # Update dataset_info with schema
-        dataset_info = KeyValuePairDatasetInfo({**dataset_info_dict, "schema": schema})
-
-        # Construct KeyValuePairDatasetManifest
-        annotations = []
-        for id, img in enumerate(classification_dataset.dataset_manifest.images, 1):
-            label_ids = [label.label_data for label in img.labels]
-            label_names = [self.class_id_to_names[id] for id in label_ids]
-
-            kvp_label_data = self.construct_kvp_label_data(label_names)
-            img_ids = [self.img_id_to_pos[img.id]]  # 0-based index
-            kvp_annotation = KeyValuePairLabelManifest(id, img_ids, label_data=kvp_label_data)
-
-            # KVPDatasetManifest expects img.labels to be empty. Labels are instead stored in KVP annotation
-            img.labels = []
-            annotations.append(kvp_annotation)
-
-        dataset_manifest = KeyValuePairDatasetManifest(classification_dataset.dataset_manifest.images, annotations, schema, additional_info=classification_dataset.dataset_manifest.additional_info)
-        super().__init__(dataset_info, dataset_manifest, dataset_resources=classification_dataset.dataset_resources)
+        categories = classification_dataset.dataset_manifest.categories
+        self.class_names = [c.name for c in categories]
+        self.class_id_to_names = {c.id: c.name for c in categories}
+
+        super().__init__(classification_dataset, (class_type_name, tuple(self.class_names)))
+
+    def _create_schema(self) -> typing.Dict[str, typing.Any]:
+        return self.create_schema_with_class_names(self.class_names)
+
+    def _construct_annotation_label_data(self, image, local_idx):
+        return self.construct_kvp_label_data([self.class_id_to_names[label.label_data] for label in image.labels])
 
     @abstractmethod
     def create_schema_with_class_names(self, class_names: typing.List[str]) -> typing.Dict[str, typing.Any]:
@@ -64,6 +64,9 @@ class DetectionAsClassificationIgnoreBoxesDataset(DetectionAsClassificationBaseD
         labels = DetectionAsClassificationIgnoreBoxesDataset._od_to_ic_labels(labels)
         return img, labels, idx_str
 
+    def get_raw_image_path(self, index):
+        return self._dataset.get_raw_image_path(index)
+
     def generate_manifest(self, **kwargs):
         """
         Generate dataset manifest for the multilabel classification dataset converted from detection dataset by ignoring the bbox. Manifest will re-use the existing image paths
@@ -86,10 +89,16 @@ class DetectionAsClassificationByCroppingDataset(DetectionAsClassificationBaseDa
     """
     Consume detection dataset as a classification dataset, i.e., sample from this dataset is a crop wrt a bbox in the detection dataset.
 
-    When box_aug_params is provided, different crops with randomness will be generated for the same bbox
+    When box_aug_params is provided, different crops with randomness will be generated for the same bbox, drawn from one random stream seeded with the rnd seed, so that each access gives
+    a new crop. Once an epoch is set, see set_epoch, the randomness of a crop only depends on the rnd seed, the box and the epoch instead, so crops are reproducible whatever the access
+    order and process, and differ from one epoch to another.
+
+    Boxes of an image are indexed consecutively and the last decoded image is kept, so that accessing boxes in order decodes each image once.
+
+    When crop_size is provided, crops are resized to it, and JPEG images are decoded at the coarsest DCT scale that still covers the smallest box of the image with crop_size pixels.
     """
 
-    def __init__(self, detection_dataset: VisionDataset, box_aug_params: dict = None):
+    def __init__(self, detection_dataset: VisionDataset, box_aug_params: dict = None, crop_size: typing.Tuple[int, int] = None):
         """
         Args:
             detection_dataset: the detection dataset where images are cropped as classification samples
@@ -97,49 +106,125 @@ class DetectionAsClassificationByCroppingDataset(DetectionAsClassificationBaseDa
                 'zoom_ratio_bounds': the lower/upper bound of box zoom ratio wrt box width and height, e.g., (0.3, 1.5)
                 'shift_relative_bounds': lower/upper bounds of relative ratio wrt box width and height that a box can shift, e.g., (-0.3, 0.1)
                 'rnd_seed' [optional]: rnd seed used for box crop zoom and shift, default being 0
+            crop_size (tuple): (width, height) crops are resized to, None for keeping the size of the boxes
         """
         super().__init__(detection_dataset, DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS)
 
         self._n_booxes = 0
         self._box_abs_id_to_img_rel_id = {}
+        self._box_id_ranges = []
         for img_id, x in enumerate(self._dataset.dataset_manifest.images):
+            self._box_id_ranges.append(range(self._n_booxes, self._n_booxes + len(x.labels)))
             for i in range(len(x.labels)):
                 self._box_abs_id_to_img_rel_id[self._n_booxes] = (img_id, i)
                 self._n_booxes += 1
         self._box_aug_params = box_aug_params
+        self._box_aug_seed = self._box_aug_params.get('rnd_seed', 0) if box_aug_params else None
+        self._box_aug_rnd = random.Random(self._box_aug_seed) if box_aug_params else None
+        self._crop_size = tuple(crop_size) if crop_size else None
 
-        self._box_aug_rnd = random.Random(self._box_aug_params.get('rnd_seed', 0)) if box_aug_params else None
-        self._box_pick_rnd = random.Random(0)
+        self._epoch = None
+        self._last_image = None
 
     def __len__(self):
         return self._n_booxes
 
+    def set_epoch(self, epoch: int):
+        """
+        Set the epoch the randomness of the crops depends on, to be called at the start of each epoch, before the DataLoader workers are created or, with persistent workers, in each of them.
+        TorchDataset.set_epoch and TorchIterableDataset.set_epoch forward it
+        """
+
+        self._epoch = epoch
+
     def _get_single_item(self, index):
-        img_idx, box_rel_idx = self._box_abs_id_to_img_rel_id[index]
+        if self._epoch is None:
+            return self._crop_box(index, rnd=self._box_aug_rnd)
 
-        img, boxes, _ = self._dataset[img_idx]
-        c_id, left, t, r, b = boxes[box_rel_idx].label_data
-        if self._dataset.coordinates == 'relative':
-            w, h = img.size
-            left, t, r, b = left * w, t * h, r * w, b * h
+        return self._crop_box(index, 0, self._epoch)
+
+    def iter_crops_by_image(self, n_copies=1):
+        """
+        Iterate over crops image by image, decoding each image once for all its boxes and copies.
 
-        box_img = DetectionAsClassificationByCroppingDataset.crop(img, left, t, r, b, self._box_aug_params, self._box_aug_rnd)
+        Args:
+            n_copies (int): number of crops of each box, which differ only with box_aug_params
+
+        Yields:
+            crop image, labels, index of the crop, where the index is copy * len(self) + box index
+        """
+
+        for box_ids in self._box_id_ranges:
+            for box_id in box_ids:
+                for copy in range(n_copies):
+                    yield self._crop_box(box_id, copy)[:2] + (str(copy * self._n_booxes + box_id),)
+
+    def _crop_box(self, index, copy=0, epoch=0, rnd: random.Random = None):
+        # rnd defaults to a random generator seeded with the rnd seed, the box, the copy and the epoch
+        img_idx, box_rel_idx = self._box_abs_id_to_img_rel_id[index]
+
+        # absolute coordinates from the manifest, same as the ones converted back from relative coordinates
+        c_id, left, t, r, b = self._dataset.dataset_manifest.images[img_idx].labels[box_rel_idx].label_data
+        if self._box_aug_params and rnd is None:
+            rnd = random.Random(f'{self._box_aug_seed}-{epoch}-{index}-{copy}')
+        img, img_scale = self._load_image(img_idx)
+        box_img = DetectionAsClassificationByCroppingDataset.crop(img, left, t, r, b, self._box_aug_params, rnd, img_scale, self._crop_size)
         return box_img, [ImageClassificationLabelManifest(c_id)], str(index)
 
+    def _load_image(self, img_idx):
+        if self._last_image is None or self._last_image[0] != img_idx:
+            if self._crop_size:
+                self._last_image = (img_idx,) + self._dataset.load_reduced_image(img_idx, self._min_scale(img_idx))
+            else:
+                self._last_image = (img_idx, self._dataset[img_idx][0], 1)
+
+        return self._last_image[1:]
+
+    def _min_scale(self, img_idx):
+        # smallest scale at which every box of the image, shrunk by the lowest zoom ratio, still spans crop_size. Boxes clipped by the image border can end up slightly upsampled
+        zoom_lower_b = min(1, self._box_aug_params['zoom_ratio_bounds'][0]) if self._box_aug_params and 'zoom_ratio_bounds' in self._box_aug_params else 1
+        crop_w, crop_h = self._crop_size
+        min_scale = 0
+        for label in self._dataset.dataset_manifest.images[img_idx].labels:
+            _, left, t, r, b = label.label_data
+            min_scale = max(min_scale, crop_w / max((r - left) * zoom_lower_b, 1), crop_h / max((b - t) * zoom_lower_b, 1))
+
+        return min(1, min_scale)
+
+    def __getstate__(self):
+        # the decoded image is not worth sending to other processes
+        state = self.__dict__.copy()
+        state['_last_image'] = None
+        return state
+
     @staticmethod
-    def crop(img, left, t, r, b, aug_params=None, rnd: random.Random = None):
+    def crop(img, left, t, r, b, aug_params=None, rnd: random.Random = None, img_scale=1, output_size: typing.Tuple[int, int] = None):
+        """
+        Crop box (left, t, r, b) out of img, with the box in the coordinates of the full resolution image.
+
+        Args:
+            img_scale (float): scale of img wrt the full resolution, when decoded at a reduced size, see PILImageLoader.load_reduced_from_stream
+            output_size (tuple): (width, height) the crop is resized to, in the same pass as cropping, None for keeping the size of the box in img
+        """
+
+        img_w, img_h = round(img.size[0] / img_scale), round(img.size[1] / img_scale)
         if aug_params:
             if not rnd:
                 raise ValueError
             if 'zoom_ratio_bounds' in aug_params:
                 ratio_lower_b, ratio_upper_b = aug_params['zoom_ratio_bounds']
-                left, t, r, b = BoxAlteration.zoom_box(left, t, r, b, img.size[0], img.size[1], ratio_lower_b, ratio_upper_b, rnd)
+                left, t, r, b = BoxAlteration.zoom_box(left, t, r, b, img_w, img_h, ratio_lower_b, ratio_upper_b, rnd)
 
             if 'shift_relative_bounds' in aug_params:
                 relative_lower_b, relative_upper_b = aug_params['shift_relative_bounds']
-                left, t, r, b = BoxAlteration.shift_box(left, t, r, b, img.size[0], img.size[1], relative_lower_b, relative_upper_b, rnd)
-
-        crop_img = img.crop((left, t, r, b))
+                left, t, r, b = BoxAlteration.shift_box(left, t, r, b, img_w, img_h, relative_lower_b, relative_upper_b, rnd)
+
+        box = (left * img_scale, t * img_scale, r * img_scale, b * img_scale)
+        if output_size:
+            from PIL import Image
+            crop_img = img.resize(output_size, Image.BILINEAR, box=box)
+        else:
+            crop_img = img.crop(box)
         crop_img.format = img.format
 
         return crop_img
@@ -151,13 +236,44 @@ class DetectionAsClassificationByCroppingDataset(DetectionAsClassificationBaseDa
         Args:
             'dir'(str): directory where cropped images will be saved
             'n_copies'(int): number of image copies generated for each bbox
+            'num_workers'(int): number of processes cropping images, each image being decoded once by one of them
+            'resume'(bool): reuse crops saved in 'dir' by a previous run
         """
 
-        local_cache_params = {'dir': kwargs.get('dir', f'{self.dataset_info.name}-cropped-ic'), 'n_copies': kwargs.get('n_copies')}
-        cache_decor = LocalFolderCacheDecorator(self, local_cache_params)
+        local_cache_params = {'dir': kwargs.get('dir', f'{self.dataset_info.name}-cropped-ic'), 'n_copies': kwargs.get('n_copies') or 1, 'num_workers': kwargs.get('num_workers', 1),
+                              'resume': kwargs.get('resume', False)}
+        cache_decor = _CropCacheDecorator(self, local_cache_params)
         return cache_decor.generate_manifest()
 
 
+class _CropCacheDecorator(LocalFolderCacheDecorator):
+    """
+    Cache crops image by image: the crops of all boxes and copies of an image are in the same group, so each image is decoded once.
+
+    Crop index is copy * number of boxes + box index, crops of different copies of a box differ by their randomness, see DetectionAsClassificationByCroppingDataset.
+    """
+
+    def _fingerprint(self):
+        return {**super()._fingerprint(), 'box_aug_params': self._dataset._box_aug_params, 'crop_size': self._dataset._crop_size}
+
+    def _index_groups(self):
+        n_boxes = len(self._dataset)
+        n_copies = self._local_cache_params['n_copies']
+        group_size = self._group_size()
+
+        groups = [[]]
+        for box_ids in self._dataset._box_id_ranges:
+            if len(groups[-1]) >= group_size:
+                groups.append([])
+            groups[-1].extend(copy * n_boxes + box_id for box_id in box_ids for copy in range(n_copies))
+
+        return [group for group in groups if group]
+
+    def _load_items(self, indices):
+        n_boxes = len(self._dataset)
+        return [self._dataset._crop_box(index % n_boxes, index // n_boxes)[:2] for index in indices]
+
+
 class BoxAlteration:
     @staticmethod
     def _stay_in_range(val, low, up):
@@ -1,19 +1,18 @@
 import logging
 from abc import abstractmethod, ABC
-from copy import deepcopy
 from typing import Any, Dict, List, Optional
 
-from vision_datasets.common import DatasetTypes, KeyValuePairDatasetInfo, VisionDataset
+from vision_datasets.common import DatasetTypes, VisionDataset
 from vision_datasets.key_value_pair import (
-    KeyValuePairDatasetManifest,
     KeyValuePairLabelManifest,
+    VisionAsKeyValuePairDatasetBase,
 )
 
 logger = logging.getLogger(__name__)
 
 
-class DetectionAsKeyValuePairDatasetBase(VisionDataset, ABC):
-    """Dataset class that access Detection datset as KeyValuePair dataset."""
+class DetectionAsKeyValuePairDatasetBase(VisionAsKeyValuePairDatasetBase, ABC):
+    """Dataset class that access Detection datset as KeyValuePair dataset, see VisionAsKeyValuePairDatasetBase."""
 
     _DEFAULT_FIELD_NAME = "detectedObjects"
 
@@ -39,47 +38,21 @@ class DetectionAsKeyValuePairDatasetBase(VisionDataset, ABC):
             raise ValueError("class_type_name should be a non-empty string.")
 
         self.class_type_name = class_type_name
-        # Generate schema and update dataset info
-        detection_dataset = deepcopy(detection_dataset)
-
-        dataset_info_dict = detection_dataset.dataset_info.__dict__
-        dataset_info_dict["type"] = DatasetTypes.KEY_VALUE_PAIR.name.lower()
-        self.class_names = [c.name for c in detection_dataset.dataset_manifest.categories]
-        self.class_id_to_names = {c.id: c.name for c in detection_dataset.dataset_manifest.categories}
-        self.img_id_to_pos = {x.id: i for i, x in enumerate(detection_dataset.dataset_manifest.images)}
-
-        schema = self._create_schema_with_class_names(include_class_names)
-        schema['description'] = custom_schema_description or schema['description']
-
-        # Update dataset_info with schema
-        dataset_info = KeyValuePairDatasetInfo({**dataset_info_dict, "schema": schema})
-
-        # Construct KeyValuePairDatasetManifest
-        annotations = []
-        for id, img in enumerate(detection_dataset.dataset_manifest.images, 1):
-            bboxes = [box.label_data for box in img.labels]
-
-            kvp_label_data = self.construct_kvp_label_data(bboxes)
-            img_ids = [self.img_id_to_pos[img.id]]  # 0-based index
-            kvp_annotation = KeyValuePairLabelManifest(
-                id, img_ids, label_data=kvp_label_data
-            )
-
-            # KVPDatasetManifest expects img.labels to be empty. Labels are instead stored in KVP annotation
-            img.labels = []
-            annotations.append(kvp_annotation)
-
-        dataset_manifest = KeyValuePairDatasetManifest(
-            detection_dataset.dataset_manifest.images,
-            annotations,
-            schema,
-            additional_info=detection_dataset.dataset_manifest.additional_info,
-        )
-        super().__init__(
-            dataset_info,
-            dataset_manifest,
-            dataset_resources=detection_dataset.dataset_resources,
-        )
+        categories = detection_dataset.dataset_manifest.categories
+        self.class_names = [c.name for c in categories]
+        self.class_id_to_names = {c.id: c.name for c in categories}
+        self._include_class_names = include_class_names
+        self._custom_schema_description = custom_schema_description
+
+        super().__init__(detection_dataset, (class_type_name, tuple(self.class_names), include_class_names, custom_schema_description))
+
+    def _create_schema(self) -> Dict[str, Any]:
+        schema = self._create_schema_with_class_names(self._include_class_names)
+        schema['description'] = self._custom_schema_description or schema['description']
+        return schema
+
+    def _construct_annotation_label_data(self, image, local_idx):
+        return self.construct_kvp_label_data([box.label_data for box in image.labels])
 
     @property
     @abstractmethod
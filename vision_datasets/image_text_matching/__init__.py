@@ -1,6 +1,7 @@
 from .coco_manifest_adaptor import ImageTextMatchingCocoManifestAdaptor
 from .manifest import ImageTextMatchingLabelManifest
 from .operations import ImageTextMatchingCocoDictGenerator
+from .negative_sampler import NegativeSampler
 from .vision_as_image_text_dataset import VisionAsImageTextDataset
 
-__all__ = ['ImageTextMatchingCocoManifestAdaptor', 'ImageTextMatchingLabelManifest', 'ImageTextMatchingCocoDictGenerator', 'VisionAsImageTextDataset']
+__all__ = ['ImageTextMatchingCocoManifestAdaptor', 'ImageTextMatchingLabelManifest', 'ImageTextMatchingCocoDictGenerator', 'NegativeSampler', 'VisionAsImageTextDataset']
@@ -0,0 +1,75 @@
+import typing
+
+import numpy as np
+
+
+class NegativeSampler:
+    """
+    Sample negative classes of an image, i.e., classes that the image does not possess, deterministically per image index.
+
+    neg_to_pos_ratio * n_positives negative classes (rounded stochastically, all negative classes if there are not enough) are drawn at once, with a counter-based Philox generator keyed by
+    (index, seed). So the cost does not grow with the number of classes, and samples do not depend on the order images are accessed in, or the process.
+
+    With hard negative pools, hard_negative_ratio of the negatives (rounded stochastically) are drawn from the pools of the positive classes, the rest from all other negative classes.
+    """
+
+    def __init__(self, n_categories: int, neg_to_pos_ratio: float, rnd_seed: int = 0, hard_negatives: typing.Dict[int, typing.Iterable[int]] = None, hard_negative_ratio: float = 0.5):
+        """
+        Args:
+            n_categories (int): number of classes
+            neg_to_pos_ratio (float): ratio of negative against positive classes
+            rnd_seed (int): random seed
+            hard_negatives (dict): class index to indices of classes easily confused with it
+            hard_negative_ratio (float): ratio of negatives drawn from hard negative pools, when there are enough of them
+        """
+
+        if neg_to_pos_ratio < 0:
+            raise ValueError('neg_to_pos_ratio must be non-negative.')
+
+        if not 0 <= hard_negative_ratio <= 1:
+            raise ValueError('hard_negative_ratio must be within [0, 1].')
+
+        self._n_categories = n_categories
+        self._neg_to_pos_ratio = neg_to_pos_ratio
+        self._seed = rnd_seed % (1 << 64)
+        self._hard_negatives = {c: np.unique(np.asarray(list(pool), dtype=np.int64)) for c, pool in hard_negatives.items()} if hard_negatives else {}
+        self._hard_negative_ratio = hard_negative_ratio
+
+    def sample(self, index: int, positives: typing.Iterable[int]) -> np.ndarray:
+        """
+        Sorted indices of the negative classes of image index, with given positive classes
+        """
+
+        positives = np.unique(np.asarray(list(positives), dtype=np.int64))
+        n_negatives = self._n_categories - len(positives)
+        if self._neg_to_pos_ratio == 0 or n_negatives <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        expected = self._neg_to_pos_ratio * len(positives)
+        if expected >= n_negatives:
+            return self._complement(positives, np.arange(n_negatives))
+
+        rng = np.random.Generator(np.random.Philox(key=np.array([index % (1 << 64), self._seed], dtype=np.uint64)))
+        n_samples = int(expected + rng.random())
+        hard = self._sample_hard(rng, positives, n_samples)
+        excluded = np.union1d(positives, hard)
+        others = self._complement(excluded, rng.choice(self._n_categories - len(excluded), n_samples - len(hard), replace=False))
+
+        return np.union1d(hard, others)
+
+    def _sample_hard(self, rng: np.random.Generator, positives: np.ndarray, n_samples: int) -> np.ndarray:
+        pools = [self._hard_negatives[c] for c in positives.tolist() if c in self._hard_negatives]
+        if not pools or not n_samples:
+            return np.empty(0, dtype=np.int64)
+
+        pool = np.setdiff1d(np.concatenate(pools), positives)
+        expected = n_samples * self._hard_negative_ratio
+        n_hard = min(len(pool), int(expected + rng.random()))
+        return np.sort(rng.choice(pool, n_hard, replace=False))
+
+    @staticmethod
+    def _complement(excluded: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+        # map ranks among classes not in sorted excluded, to class indices
+        ranks = np.sort(ranks)
+        shifted = excluded - np.arange(len(excluded))
+        return ranks + np.searchsorted(shifted, ranks, side='right')
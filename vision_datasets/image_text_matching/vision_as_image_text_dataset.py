@@ -1,25 +1,28 @@
-import random
+import typing
 from copy import deepcopy
 
 from ..common import DatasetTypes
 from ..common.dataset.base_dataset import BaseDataset
 from .manifest import ImageTextMatchingLabelManifest
+from .negative_sampler import NegativeSampler
 
 
 class VisionAsImageTextDataset(BaseDataset):
     """
     Consume traditional vision datasets of type
     [DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS, DatasetTypes.IMAGE_CLASSIFICATION_MULTILABEL, DatasetTypes.IMAGE_OBJECT_DETECTION], as DatasetTypes.IMAGE_TEXT_MATCHING dataset.
-    For a certain image, negative image-text pairs are generated from the labels that this image does not possess.
+    For a certain image, negative image-text pairs are generated from the labels that this image does not possess, see NegativeSampler.
     """
 
-    def __init__(self, dataset: BaseDataset, neg_to_pos_ratio=0, text_aug=None, rnd_seed=0):
+    def __init__(self, dataset: BaseDataset, neg_to_pos_ratio=0, text_aug=None, rnd_seed=0, hard_negatives: typing.Dict[int, typing.Iterable[int]] = None, hard_negative_ratio=0.5):
         """
         Args:
             dataset: dataset of expected type
             neg_to_pos_ratio: ratio of negative against positive image text pairs
             text_aug: a func that augments a string, i.e., a class name, e.g. dog => a photo of dog
             rnd_seed: random seed for choosing negative class names for negative image text pairs
+            hard_negatives: class index to indices of classes easily confused with it, from which hard_negative_ratio of the negative pairs are preferably drawn
+            hard_negative_ratio: ratio of negative pairs drawn from hard_negatives
         """
         if dataset is None:
             raise ValueError
@@ -35,6 +38,9 @@ class VisionAsImageTextDataset(BaseDataset):
         self._negative_pair_ratio = neg_to_pos_ratio
         self._text_aug = text_aug or (lambda x: x)
         self._rand_seed = rnd_seed
+        self._hard_negatives = hard_negatives
+        self._hard_negative_ratio = hard_negative_ratio
+        self._negative_sampler = None
 
     @property
     def categories(self):
@@ -49,16 +55,17 @@ class VisionAsImageTextDataset(BaseDataset):
         pos_class_names = [self._dataset.categories[x].name for x in pos_class_indices]
         labels = [ImageTextMatchingLabelManifest((self._text_aug(class_name), 1)) for class_name in pos_class_names]
         if self._negative_pair_ratio > 0:
-            neg_class_indices = set(range(len(self._dataset.categories))) - set(pos_class_indices)
-            neg_class_names = [self._dataset.categories[x].name for x in neg_class_indices]
-            if neg_class_names:
-                down_sample_ratio = self._negative_pair_ratio * len(pos_class_names) / len(neg_class_names)
-                if down_sample_ratio < 1:
-                    neg_class_names = [ncn for j, ncn in enumerate(neg_class_names) if random.Random(self._rand_seed+(index) * len(neg_class_names) + j).random() < down_sample_ratio]
-
+            neg_class_names = [self._dataset.categories[x].name for x in self._get_negative_sampler().sample(index, pos_class_indices).tolist()]
             neg_labels = [ImageTextMatchingLabelManifest((self._text_aug(class_name), 0)) for class_name in neg_class_names]
             labels += neg_labels
         return img, labels, str(index)
 
+    def _get_negative_sampler(self):
+        # created on first use, as categories of some datasets are only known once loaded
+        if self._negative_sampler is None:
+            self._negative_sampler = NegativeSampler(len(self._dataset.categories), self._negative_pair_ratio, self._rand_seed, self._hard_negatives, self._hard_negative_ratio)
+
+        return self._negative_sampler
+
     def close(self):
         self._dataset.close()
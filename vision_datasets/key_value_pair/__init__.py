@@ -1,6 +1,9 @@
 from .coco_manifest_adaptor import KeyValuePairCocoManifestAdaptor
 from .manifest import KeyValuePairLabelManifest, KeyValuePairDatasetManifest, KeyValuePairSchema
 from .operations import KeyValuePairCocoDictGenerator, KeyValuePairDatasetSampleByNumSamples
+from .schema_validator import KeyValuePairSchemaValidator
+from .vision_as_kvp_dataset import LazyKeyValuePairAnnotations, LazyUnlabeledImages, VisionAsKeyValuePairDatasetBase
 
 __all__ = ['KeyValuePairCocoManifestAdaptor', 'KeyValuePairCocoDictGenerator', 'KeyValuePairDatasetManifest',
-           'KeyValuePairLabelManifest', 'KeyValuePairSchema', 'KeyValuePairDatasetSampleByNumSamples']
+           'KeyValuePairLabelManifest', 'KeyValuePairSchema', 'KeyValuePairSchemaValidator', 'KeyValuePairDatasetSampleByNumSamples',
+           'LazyKeyValuePairAnnotations', 'LazyUnlabeledImages', 'VisionAsKeyValuePairDatasetBase']
@@ -7,9 +7,15 @@ logger = logging.getLogger(__name__)
 
 @CocoManifestAdaptorFactory.register(DatasetTypes.KEY_VALUE_PAIR)
 class KeyValuePairCocoManifestAdaptor(CocoManifestWithMultiImageLabelAdaptor):
-    def __init__(self, schema: dict) -> None:
+    def __init__(self, schema: dict, num_workers: int = 1) -> None:
+        """
+        Args:
+            schema (dict): key-value pair schema
+            num_workers (int): number of processes checking annotations against the schema, see KeyValuePairSchemaValidator.find_errors
+        """
         self.schema_dict = schema
         self.schema = KeyValuePairSchema(schema['name'], schema['fieldSchema'], schema.get('description', None))
+        self.num_workers = num_workers
         super().__init__(DatasetTypes.KEY_VALUE_PAIR)
 
     def _construct_label_manifest(self, img_ids, ann, coco_manifest):
@@ -19,7 +25,9 @@ class KeyValuePairCocoManifestAdaptor(CocoManifestWithMultiImageLabelAdaptor):
 
     def _construct_manifest(self, images_by_id, coco_manifest, data_type, additional_info):
         images, annotations = self.get_images_and_annotations(images_by_id, coco_manifest)
-        return KeyValuePairDatasetManifest(images, annotations, self.schema_dict, additional_info)
+        # all the annotations are checked at once, reporting all the ones not matching the schema
+        self.schema.validator.check_all([ann.fields for ann in annotations], self.num_workers)
+        return KeyValuePairDatasetManifest(images, annotations, self.schema, additional_info)
 
     def convert_bbox_ltwh_to_ltrb(self, value):
         if isinstance(value, list):
@@ -61,5 +69,4 @@ class KeyValuePairCocoManifestAdaptor(CocoManifestWithMultiImageLabelAdaptor):
 
         label_data = {KeyValuePairLabelManifest.LABEL_KEY: annotation[KeyValuePairLabelManifest.LABEL_KEY],
                       KeyValuePairLabelManifest.TEXT_INPUT_KEY: annotation.get(KeyValuePairLabelManifest.TEXT_INPUT_KEY, None)}
-        KeyValuePairLabelManifest.check_schema_match(label_data[KeyValuePairLabelManifest.LABEL_KEY], self.schema)
         return label_data
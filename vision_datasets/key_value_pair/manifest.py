@@ -1,3 +1,4 @@
+import functools
 from typing import Dict, List, Optional, Union
 from enum import Enum
 from ..common import MultiImageLabelManifest, DatasetManifestWithMultiImageLabel, DatasetTypes
@@ -106,6 +107,20 @@ class KeyValuePairSchema:
     def __eq__(self, other) -> bool:
         return isinstance(other, KeyValuePairSchema) and self.name == other.name and self.field_schema == other.field_schema and self.description == other.description
 
+    @functools.cached_property
+    def validator(self):
+        """
+        KeyValuePairSchemaValidator compiled from this schema on first use. The schema should not be edited afterwards.
+        """
+        from .schema_validator import KeyValuePairSchemaValidator
+        return KeyValuePairSchemaValidator(self)
+
+    def __getstate__(self):
+        # the compiled validator holds closures, it is compiled again after unpickling
+        state = dict(self.__dict__)
+        state.pop('validator', None)
+        return state
+
 
 class KeyValuePairLabelManifest(MultiImageLabelManifest):
     """
@@ -152,10 +167,7 @@ class KeyValuePairLabelManifest(MultiImageLabelManifest):
 
     @classmethod
     def check_schema_match(cls, fields: Dict[str, Dict], schema: KeyValuePairSchema):
-        for key, field_schema in schema.field_schema.items():
-            if key not in fields:
-                raise ValueError(f'{key} not found')
-            KeyValuePairLabelManifest.check_field_schema_match(fields[key], field_schema)
+        schema.validator.check(fields)
 
     @classmethod
     def check_field_schema_match(cls, value, field_schema: KeyValuePairFieldSchema):
@@ -189,10 +201,11 @@ class KeyValuePairLabelManifest(MultiImageLabelManifest):
 class KeyValuePairDatasetManifest(DatasetManifestWithMultiImageLabel):
     """Manifest that has schema in additional_info which defines the structure of the key-value pairs in the annotations."""
 
-    def __init__(self, images, annotations, schema, additional_info):
+    def __init__(self, images, annotations, schema, additional_info, validate: bool = True):
         self.schema = schema if isinstance(schema, KeyValuePairSchema) else KeyValuePairSchema(schema['name'], schema['fieldSchema'], schema.get('description'))
-        super().__init__(images, annotations, DatasetTypes.KEY_VALUE_PAIR, additional_info)
-        self._check_annotations()
+        super().__init__(images, annotations, DatasetTypes.KEY_VALUE_PAIR, additional_info, validate)
+        if validate:
+            self._check_annotations()
 
     def _check_annotations(self):
         for ann in self.annotations:
@@ -17,13 +17,12 @@ class KeyValuePairCocoDictGenerator(MultiImageCocoDictGenerator):
         if label.text is not None:
             coco_ann[KeyValuePairLabelManifest.TEXT_INPUT_KEY] = label.text
 
-    def _generate_images(self, manifest: KeyValuePairDatasetManifest):
-        images = super()._generate_images(manifest)
+    def _iter_images(self, manifest: KeyValuePairDatasetManifest):
         # add metadata field if exists
-        for img, img_manifest in zip(images, manifest.images):
+        for img, img_manifest in zip(super()._iter_images(manifest), manifest.images):
             if img_manifest.additional_info is not None and 'metadata' in img_manifest.additional_info:
                 img['metadata'] = img_manifest.additional_info['metadata']
-        return images
+            yield img
 
 
 @ManifestMergeStrategyFactory.register(_DATA_TYPE)
@@ -0,0 +1,147 @@
+import logging
+import typing
+
+from .manifest import KeyValuePairFieldSchema, KeyValuePairLabelManifest, KeyValuePairSchema, KeyValuePairValueTypes, _valid_ltrb_bbox
+
+logger = logging.getLogger(__name__)
+
+_VALUE_KEY = KeyValuePairLabelManifest.LABEL_VALUE_KEY
+_GROUNDINGS_KEY = KeyValuePairLabelManifest.LABEL_GROUNDINGS_KEY
+
+
+def _compile_field(field_schema: KeyValuePairFieldSchema) -> typing.Callable[[typing.Any], None]:
+    """
+    Closure checking the annotation of a field, specialized for the field schema. Checks and error messages are the ones of KeyValuePairLabelManifest.check_field_schema_match
+    """
+
+    python_type = KeyValuePairFieldSchema.TYPE_NAME_TO_PYTHON_TYPE[field_schema.type]
+    field_type = field_schema.type
+
+    if field_schema.classes:
+        classes = field_schema.classes
+
+        def check_value(value):
+            if value not in classes:
+                raise ValueError(f'{value} not found in classes {classes}')
+    elif field_type == KeyValuePairValueTypes.ARRAY:
+        check_item = _compile_field(field_schema.items)
+
+        def check_value(value):
+            for array_item in value:
+                check_item(array_item)
+    elif field_type == KeyValuePairValueTypes.OBJECT:
+        check_by_property = {k: _compile_field(v) for k, v in field_schema.properties.items()}
+
+        def check_value(value):
+            for k, v in value.items():
+                check_property = check_by_property.get(k)
+                if check_property is None:
+                    raise ValueError(f'{k} not found in schema')
+                check_property(v)
+    else:
+        check_value = None
+
+    def check_annotation(annotation):
+        if not isinstance(annotation, dict) or _VALUE_KEY not in annotation:
+            raise ValueError(f'{annotation} must be a dictionary that maps "{_VALUE_KEY}" to the annotation.')
+        value = annotation[_VALUE_KEY]
+        if not isinstance(value, python_type):
+            raise ValueError(f'{value} is not of type {field_type}')
+        if check_value is not None:
+            check_value(value)
+
+    if not field_schema.includeGrounding:
+        return check_annotation
+
+    def check_grounded_annotation(annotation):
+        if isinstance(annotation, dict) and _VALUE_KEY in annotation:
+            if _GROUNDINGS_KEY not in annotation:
+                raise ValueError(f'{_GROUNDINGS_KEY} is required in schema, but not found in {annotation}.')
+            if any(not _valid_ltrb_bbox(bbox) for bbox in annotation[_GROUNDINGS_KEY]):
+                raise ValueError(f'Invalid bboxes: {annotation[_GROUNDINGS_KEY]}. bbox must have 4 non-negative elements: left, top, right, bottom absolute pixel values.')
+        check_annotation(annotation)
+
+    return check_grounded_annotation
+
+
+# validator of a process in the pool of KeyValuePairSchemaValidator.find_errors
+_worker_validator = None
+
+
+def _init_validation_worker(schema):
+    global _worker_validator
+    _worker_validator = KeyValuePairSchemaValidator(schema)
+
+
+def _find_errors_in_chunk(args):
+    start, fields_chunk = args
+    return _worker_validator._find_errors_sequentially(fields_chunk, start)
+
+
+class KeyValuePairSchemaValidator:
+    """
+    Validator of key-value pair annotations against a schema, compiled once into a tree of closures specialized for each field schema, instead of interpreting the schema for every annotation
+    as KeyValuePairLabelManifest.check_schema_match does. Compiled validators are cached by the schemas, see KeyValuePairSchema.validator.
+    """
+
+    def __init__(self, schema: KeyValuePairSchema):
+        self.schema = schema
+        self._field_checks = [(key, _compile_field(field_schema)) for key, field_schema in schema.field_schema.items()]
+
+    def check(self, fields: typing.Dict[str, typing.Dict]):
+        """
+        Check the fields of an annotation, raise ValueError on the first mismatch
+        """
+
+        for key, check_field in self._field_checks:
+            if key not in fields:
+                raise ValueError(f'{key} not found')
+            check_field(fields[key])
+
+    def find_errors(self, fields_list: typing.Sequence[typing.Dict[str, typing.Dict]], num_workers: int = 1) -> typing.List[typing.Tuple[int, str]]:
+        """
+        Check the fields of many annotations, collecting the mismatches instead of stopping at the first one.
+
+        Args:
+            fields_list (list): fields of each annotation
+            num_workers (int): number of processes checking chunks of the annotations, it pays off only for large lists as the annotations are pickled to the processes
+
+        Returns:
+            list of (position in fields_list, error message), in the order of fields_list
+        """
+
+        if num_workers < 1:
+            raise ValueError('num_workers must be equal or greater than 1.')
+
+        if num_workers == 1 or len(fields_list) < 2:
+            return self._find_errors_sequentially(fields_list)
+
+        from concurrent.futures import ProcessPoolExecutor
+        chunk_size = max(1, len(fields_list) // (num_workers * 4))
+        chunks = [(start, list(fields_list[start:start + chunk_size])) for start in range(0, len(fields_list), chunk_size)]
+        with ProcessPoolExecutor(min(num_workers, len(chunks)), initializer=_init_validation_worker, initargs=(self.schema,)) as executor:
+            return [error for errors in executor.map(_find_errors_in_chunk, chunks) for error in errors]
+
+    def check_all(self, fields_list: typing.Sequence[typing.Dict[str, typing.Dict]], num_workers: int = 1, max_reported_errors: int = 10):
+        """
+        Check the fields of many annotations, raise one ValueError reporting the number of mismatching annotations and the first max_reported_errors of them, see find_errors
+        """
+
+        errors = self.find_errors(fields_list, num_workers)
+        if errors:
+            for index, message in errors:
+                logger.debug(f'Annotation {index} does not match the schema: {message}')
+            details = '\n'.join(f'annotation {index}: {message}' for index, message in errors[:max_reported_errors])
+            raise ValueError(f'{len(errors)} of {len(fields_list)} annotations do not match the schema {self.schema.name}:\n{details}')
+
+    def _find_errors_sequentially(self, fields_list, start=0):
+        errors = []
+        for index, fields in enumerate(fields_list, start):
+            try:
+                self.check(fields)
+            except ValueError as e:
+                errors.append((index, str(e)))
+            except (TypeError, AttributeError) as e:
+                errors.append((index, f'Malformed annotation: {e}'))
+
+        return errors
@@ -0,0 +1,105 @@
+import abc
+import collections
+import copy
+import functools
+import typing
+
+from ..common import DatasetTypes, ImageDataManifest, KeyValuePairDatasetInfo, VisionDataset
+from ..common.data_manifest import LazyConcatenation
+from .manifest import KeyValuePairDatasetManifest, KeyValuePairLabelManifest, KeyValuePairSchema
+
+
+class LazyUnlabeledImages(LazyConcatenation):
+    """
+    Images of a single-image manifest without their labels, as expected by DatasetManifestWithMultiImageLabel. Items returned are new lightweight ImageDataManifest sharing everything but
+    labels with the source manifest, so they should be treated as read-only.
+    """
+
+    def __init__(self, images: typing.Sequence[ImageDataManifest]):
+        super().__init__([images], [len(images)])
+
+    def _get_from_source(self, source_idx, local_idx, index):
+        image: ImageDataManifest = self._sources[source_idx][local_idx]
+        return ImageDataManifest(image.id, image.img_path, image.width, image.height, [], image.additional_info)
+
+
+class LazyKeyValuePairAnnotations(LazyConcatenation):
+    """
+    KeyValuePair annotations of a VisionAsKeyValuePairDatasetBase, created on access from the labels of the source images. Annotation ids are 1-based positions in the sequence, and image ids
+    are positions of the source images.
+    """
+
+    def __init__(self, dataset: 'VisionAsKeyValuePairDatasetBase', images: typing.Sequence[ImageDataManifest]):
+        super().__init__(images, [dataset._n_annotations(image) for image in images])
+        self._dataset = dataset
+
+    def _get_from_source(self, source_idx, local_idx, index):
+        label_data = self._dataset._construct_annotation_label_data(self._sources[source_idx], local_idx)
+        return KeyValuePairLabelManifest(index + 1, [source_idx], label_data=label_data)
+
+
+class VisionAsKeyValuePairDatasetBase(VisionDataset, abc.ABC):
+    """
+    Base of the dataset classes that access a single-image vision dataset as KeyValuePair dataset.
+
+    The source dataset is not copied: images of its manifest are shared read-only, see LazyUnlabeledImages, and KeyValuePair label data is constructed from their labels only when an annotation
+    is accessed, see LazyKeyValuePairAnnotations. So the source manifest should not be edited while this dataset is in use. Schemas are cached by the options they are created from, and each
+    dataset gets its own copy of the cached schema.
+    """
+
+    _SCHEMA_CACHE_SIZE = 16
+    _schema_cache = collections.OrderedDict()
+
+    def __init__(self, dataset: VisionDataset, schema_key: typing.Hashable):
+        """
+        Args:
+            dataset (VisionDataset): source dataset
+            schema_key (hashable): options the schema is created from by _create_schema, besides the dataset class
+        """
+
+        schema, parsed_schema = self._get_schema(schema_key)
+        dataset_info = KeyValuePairDatasetInfo({**dataset.dataset_info.__dict__, 'type': DatasetTypes.KEY_VALUE_PAIR.name.lower(), 'schema': schema})
+
+        images = dataset.dataset_manifest.images
+        # annotations are valid by construction, validating them would create all of them
+        dataset_manifest = KeyValuePairDatasetManifest(LazyUnlabeledImages(images), LazyKeyValuePairAnnotations(self, images), parsed_schema, dataset.dataset_manifest.additional_info,
+                                                       validate=False)
+        super().__init__(dataset_info, dataset_manifest, dataset_resources=dataset.dataset_resources)
+
+    @functools.cached_property
+    def img_id_to_pos(self) -> typing.Dict[typing.Union[int, str], int]:
+        return {x.id: i for i, x in enumerate(self.dataset_manifest.images)}
+
+    def _get_schema(self, schema_key) -> typing.Tuple[dict, KeyValuePairSchema]:
+        cache = VisionAsKeyValuePairDatasetBase._schema_cache
+        key = (type(self), schema_key)
+        if key in cache:
+            cache.move_to_end(key)
+        else:
+            schema = self._create_schema()
+            cache[key] = schema, KeyValuePairSchema(schema['name'], schema['fieldSchema'], schema.get('description'))
+            while len(cache) > self._SCHEMA_CACHE_SIZE:
+                cache.popitem(last=False)
+
+        # copied, so that editing the schema of a dataset does not affect the other datasets
+        return copy.deepcopy(cache[key])
+
+    @abc.abstractmethod
+    def _create_schema(self) -> typing.Dict[str, typing.Any]:
+        """
+        Schema of the dataset, as in KeyValuePairDatasetInfo
+        """
+        raise NotImplementedError
+
+    def _n_annotations(self, image: ImageDataManifest) -> int:
+        """
+        Number of annotations created from the labels of a source image
+        """
+        return 1
+
+    @abc.abstractmethod
+    def _construct_annotation_label_data(self, image: ImageDataManifest, local_idx: int) -> dict:
+        """
+        Label data of the local_idx-th annotation created from the labels of a source image
+        """
+        raise NotImplementedError
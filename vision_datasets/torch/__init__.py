@@ -1,4 +1,8 @@
+from .collate import CollateFactory, TaskCollate, create_collate_fn
 from .dataset import Dataset
+from .iterable_dataset import TorchIterableDataset
+from .sampler import AspectRatioBucketBatchSampler, ImageReuseDistributedSampler, LocalityAwareDistributedSampler
 from .torch_dataset import TorchDataset
 
-__all__ = ['Dataset', 'TorchDataset']
+__all__ = ['CollateFactory', 'TaskCollate', 'create_collate_fn', 'Dataset', 'AspectRatioBucketBatchSampler', 'ImageReuseDistributedSampler', 'LocalityAwareDistributedSampler', 'TorchDataset',
+           'TorchIterableDataset']
@@ -0,0 +1,276 @@
+import typing
+
+import numpy as np
+import torch
+
+from ..common.constants import DatasetTypes
+
+
+class TaskCollate:
+    """
+    Collate function of DataLoader, turning a batch of (image, target, idx_str) samples of TorchDataset into (images, targets, idx_strs). Targets are tensorized per task type, from the label
+    data of the whole batch at once, instead of label manifest by label manifest.
+
+    Images are stacked into one tensor if they are tensors of the same shape, otherwise returned as a list. Tensors created are pinned if pin_memory is set and cuda is available.
+    """
+
+    def __init__(self, pin_memory: bool = False):
+        self.pin_memory = pin_memory
+
+    def __call__(self, batch: typing.Sequence[tuple]):
+        images, targets, idx_strs = zip(*batch)
+        return self._collate_images(images), self.collate_targets(targets), list(idx_strs)
+
+    def collate_targets(self, targets: typing.Sequence) -> typing.Any:
+        raise NotImplementedError
+
+    def _tensor(self, array, dtype=None) -> torch.Tensor:
+        tensor = torch.as_tensor(array, dtype=dtype)
+        return tensor.pin_memory() if self.pin_memory and torch.cuda.is_available() else tensor
+
+    def _collate_images(self, images: typing.Sequence):
+        if images and all(isinstance(x, torch.Tensor) for x in images) and len({x.shape for x in images}) == 1:
+            stacked = torch.stack(images)
+            return stacked.pin_memory() if self.pin_memory and torch.cuda.is_available() else stacked
+
+        return list(images)
+
+    def _image_index(self, counts: typing.Sequence[int]) -> torch.Tensor:
+        # index of the sample in the batch of each flattened label
+        return self._tensor(np.repeat(np.arange(len(counts)), counts), dtype=torch.int64)
+
+
+class CollateFactory:
+    _mapping = {}
+
+    @classmethod
+    def register(cls, data_type: DatasetTypes):
+        def decorator(klass):
+            cls._mapping[data_type] = klass
+            return klass
+        return decorator
+
+    @classmethod
+    def create(cls, data_type: DatasetTypes, *args, **kwargs) -> TaskCollate:
+        if data_type not in cls._mapping:
+            raise ValueError(f'Collate is not supported for {data_type}.')
+
+        return cls._mapping[data_type](*args, **kwargs)
+
+
+def create_collate_fn(dataset, pin_memory: bool = False) -> TaskCollate:
+    """
+    Collate function for a dataset, based on its type and categories
+
+    Args:
+        dataset: VisionDataset or TorchDataset
+        pin_memory (bool): whether to pin the tensors created
+    """
+
+    dataset_info = dataset.dataset_info
+    if dataset_info.type == DatasetTypes.MULTITASK:
+        collate_by_task = {task_name: _create_task_collate(task_info.type, dataset.categories[task_name], pin_memory) for task_name, task_info in dataset_info.sub_task_infos.items()}
+        return CollateFactory.create(DatasetTypes.MULTITASK, collate_by_task, pin_memory=pin_memory)
+
+    return _create_task_collate(dataset_info.type, dataset.categories, pin_memory)
+
+
+def _create_task_collate(data_type: DatasetTypes, categories, pin_memory: bool) -> TaskCollate:
+    if data_type == DatasetTypes.IMAGE_CLASSIFICATION_MULTILABEL:
+        return CollateFactory.create(data_type, len(categories), pin_memory=pin_memory)
+
+    return CollateFactory.create(data_type, pin_memory=pin_memory)
+
+
+def _label_data(target) -> list:
+    return [label.label_data for label in target]
+
+
+@CollateFactory.register(DatasetTypes.IMAGE_CLASSIFICATION_MULTICLASS)
+class MulticlassClassificationCollate(TaskCollate):
+    """
+    Targets: int64 tensor of shape (batch_size,), the class id of each image, -1 for images without label
+    """
+
+    def collate_targets(self, targets):
+        return self._tensor([target[0].label_data if len(target) else -1 for target in targets], dtype=torch.int64)
+
+
+@CollateFactory.register(DatasetTypes.IMAGE_CLASSIFICATION_MULTILABEL)
+class MultilabelClassificationCollate(TaskCollate):
+    """
+    Targets: multi-hot float32 tensor of shape (batch_size, num_classes)
+    """
+
+    def __init__(self, num_classes: int, pin_memory: bool = False):
+        super().__init__(pin_memory)
+        self.num_classes = num_classes
+
+    def collate_targets(self, targets):
+        counts = [len(target) for target in targets]
+        class_ids = np.fromiter((label.label_data for target in targets for label in target), dtype=np.int64, count=sum(counts))
+        multi_hot = np.zeros((len(targets), self.num_classes), dtype=np.float32)
+        multi_hot[np.repeat(np.arange(len(targets)), counts), class_ids] = 1
+        return self._tensor(multi_hot)
+
+
+@CollateFactory.register(DatasetTypes.IMAGE_OBJECT_DETECTION)
+class ObjectDetectionCollate(TaskCollate):
+    """
+    Targets: dict of
+        'boxes': float32 tensor of shape (batch_size, max_n_boxes, 4), [left, top, right, bottom] of each box, padded with 0
+        'labels': int64 tensor of shape (batch_size, max_n_boxes), class id of each box, padded with -1
+        'num_boxes': int64 tensor of shape (batch_size,), number of boxes of each image
+
+    Target of a sample is either a list of ImageObjectDetectionLabelManifest, or an array of shape (n_boxes, 5) as returned by VisionDataset.get_boxes
+    """
+
+    def collate_targets(self, targets):
+        counts = np.fromiter((len(target) for target in targets), dtype=np.int64, count=len(targets))
+        if any(isinstance(target, (np.ndarray, torch.Tensor)) for target in targets):
+            boxes = np.concatenate([np.asarray(target if isinstance(target, (np.ndarray, torch.Tensor)) else _label_data(target), dtype=np.float32).reshape(-1, 5) for target in targets])
+        else:
+            boxes = np.array([label.label_data for target in targets for label in target], dtype=np.float32).reshape(-1, 5)
+
+        # boxes of the batch are scattered at once into the padded arrays, at (image, position of the box in the image)
+        max_n_boxes = int(counts.max()) if len(counts) else 0
+        image_index = np.repeat(np.arange(len(targets)), counts)
+        box_index = np.arange(len(boxes)) - np.repeat(np.cumsum(counts) - counts, counts)
+        padded_boxes = np.zeros((len(targets), max_n_boxes, 4), dtype=np.float32)
+        padded_boxes[image_index, box_index] = boxes[:, 1:]
+        padded_labels = np.full((len(targets), max_n_boxes), -1, dtype=np.int64)
+        padded_labels[image_index, box_index] = boxes[:, 0]
+
+        return {'boxes': self._tensor(padded_boxes), 'labels': self._tensor(padded_labels), 'num_boxes': self._tensor(counts)}
+
+
+@CollateFactory.register(DatasetTypes.IMAGE_REGRESSION)
+class ImageRegressionCollate(TaskCollate):
+    """
+    Targets: float32 tensor of shape (batch_size,), the target of each image, nan for images without label
+    """
+
+    def collate_targets(self, targets):
+        return self._tensor([target[0].label_data if len(target) else float('nan') for target in targets], dtype=torch.float32)
+
+
+@CollateFactory.register(DatasetTypes.IMAGE_MATTING)
+class ImageMattingCollate(TaskCollate):
+    """
+    Targets: dict of
+        'mattings': uint8 tensor of shape (batch_size, max_height, max_width), matting of each image padded with 0 at the bottom and right
+        'sizes': int64 tensor of shape (batch_size, 2), height and width of each matting
+    """
+
+    def collate_targets(self, targets):
+        mattings = [np.asarray(target if isinstance(target, (np.ndarray, torch.Tensor)) else target[0].label_data) for target in targets]
+        sizes = np.array([x.shape[:2] for x in mattings], dtype=np.int64).reshape(-1, 2)
+        max_h, max_w = sizes.max(axis=0) if len(sizes) else (0, 0)
+        padded = np.zeros((len(mattings), max_h, max_w), dtype=np.uint8)
+        for i, matting in enumerate(mattings):
+            padded[i, :matting.shape[0], :matting.shape[1]] = matting if matting.ndim == 2 else matting[..., 0]
+
+        return {'mattings': self._tensor(padded), 'sizes': self._tensor(sizes)}
+
+
+@CollateFactory.register(DatasetTypes.IMAGE_CAPTION)
+class ImageCaptionCollate(TaskCollate):
+    """
+    Targets: dict of
+        'captions': list of the captions of all images
+        'image_index': int64 tensor, index in the batch of the image of each caption
+    """
+
+    def collate_targets(self, targets):
+        return {'captions': [caption for target in targets for caption in _label_data(target)], 'image_index': self._image_index([len(target) for target in targets])}
+
+
+@CollateFactory.register(DatasetTypes.TEXT_2_IMAGE_RETRIEVAL)
+class Text2ImageRetrievalCollate(TaskCollate):
+    """
+    Targets: dict of
+        'queries': list of the queries of all images
+        'image_index': int64 tensor, index in the batch of the image of each query
+    """
+
+    def collate_targets(self, targets):
+        return {'queries': [query for target in targets for query in _label_data(target)], 'image_index': self._image_index([len(target) for target in targets])}
+
+
+@CollateFactory.register(DatasetTypes.IMAGE_TEXT_MATCHING)
+class ImageTextMatchingCollate(TaskCollate):
+    """
+    Targets: dict of
+        'texts': list of the texts of all images
+        'matches': float32 tensor, match score of each text
+        'image_index': int64 tensor, index in the batch of the image of each text
+    """
+
+    def collate_targets(self, targets):
+        label_data = [x for target in targets for x in _label_data(target)]
+        return {'texts': [x[0] for x in label_data], 'matches': self._tensor([x[1] for x in label_data], dtype=torch.float32), 'image_index': self._image_index([len(target) for target in targets])}
+
+
+@CollateFactory.register(DatasetTypes.VISUAL_QUESTION_ANSWERING)
+class VisualQuestionAnsweringCollate(TaskCollate):
+    """
+    Targets: dict of
+        'questions': list of the questions of all images
+        'answers': list of the answers of all images
+        'image_index': int64 tensor, index in the batch of the image of each question
+    """
+
+    def collate_targets(self, targets):
+        label_data = [x for target in targets for x in _label_data(target)]
+        return {'questions': [x['question'] for x in label_data], 'answers': [x['answer'] for x in label_data], 'image_index': self._image_index([len(target) for target in targets])}
+
+
+@CollateFactory.register(DatasetTypes.VISUAL_OBJECT_GROUNDING)
+class VisualObjectGroundingCollate(TaskCollate):
+    """
+    Targets: dict of
+        'questions': list of the questions of all images
+        'answers': list of the answers of all images
+        'groundings': list of the groundings of each answer, as in the label data
+        'image_index': int64 tensor, index in the batch of the image of each question
+    """
+
+    def collate_targets(self, targets):
+        label_data = [x for target in targets for x in _label_data(target)]
+        return {'questions': [x['question'] for x in label_data], 'answers': [x['answer'] for x in label_data], 'groundings': [x['groundings'] for x in label_data],
+                'image_index': self._image_index([len(target) for target in targets])}
+
+
+@CollateFactory.register(DatasetTypes.KEY_VALUE_PAIR)
+class KeyValuePairCollate(TaskCollate):
+    """
+    Images of all samples are flattened, stacked into one tensor if they are tensors of the same shape.
+
+    Targets: dict of
+        'fields': list of the fields of each sample
+        'text': list of the text input of each sample, None if absent
+        'image_index': int64 tensor, index in the batch of the sample of each image
+    """
+
+    def __call__(self, batch):
+        images, targets, idx_strs = zip(*batch)
+        collated_targets = self.collate_targets(targets)
+        collated_targets['image_index'] = self._image_index([len(x) for x in images])
+        return self._collate_images([image for sample_images in images for image in sample_images]), collated_targets, list(idx_strs)
+
+    def collate_targets(self, targets):
+        return {'fields': [target.fields for target in targets], 'text': [target.text for target in targets]}
+
+
+@CollateFactory.register(DatasetTypes.MULTITASK)
+class MultitaskCollate(TaskCollate):
+    """
+    Targets: dict of task name to the targets collated by the collate of the task, images without labels of a task having empty labels
+    """
+
+    def __init__(self, collate_by_task: typing.Dict[str, TaskCollate], pin_memory: bool = False):
+        super().__init__(pin_memory)
+        self.collate_by_task = collate_by_task
+
+    def collate_targets(self, targets):
+        return {task_name: collate.collate_targets([target.get(task_name, []) for target in targets]) for task_name, collate in self.collate_by_task.items()}
@@ -1,9 +1,12 @@
+import time
 from abc import ABC, abstractclassmethod
 from inspect import signature
 
 import torch
 from PIL import ImageFile
 
+from ..common.profiling import get_profiler
+
 
 def _identity(*args):
     return args
@@ -43,6 +46,17 @@ class Dataset(torch.utils.data.Dataset, ABC):
         else:
             self._transform = val
 
+    def _timed_transform(self, image, target):
+        # transform, timed as the 'transform' stage if profiling is enabled, see common.profiling
+        profiler = get_profiler()
+        if not profiler:
+            return self.transform(image, target)
+
+        start = time.perf_counter_ns()
+        result = self.transform(image, target)
+        profiler.record('transform', start)
+        return result
+
     def close(self):
         """Release the resources allocated for this dataset."""
         pass
@@ -0,0 +1,161 @@
+import logging
+import math
+import random
+import typing
+
+import torch
+
+from ..common.dataset.base_dataset import BaseDataset
+from .dataset import Dataset
+from .locality import locality_blocks
+
+logger = logging.getLogger(__name__)
+
+
+def _distributed_rank_and_world_size() -> typing.Tuple[int, int]:
+    if torch.distributed.is_available() and torch.distributed.is_initialized():
+        return torch.distributed.get_rank(), torch.distributed.get_world_size()
+
+    return 0, 1
+
+
+class TorchIterableDataset(torch.utils.data.IterableDataset, Dataset):
+    """
+    Dataset class used for pytorch training that streams samples, instead of accessing them in random order, to read storage such as zip files and urls sequentially.
+
+    Samples are ordered by their containers and positions in them, then split into blocks of at most block_size consecutive samples (see locality.locality_blocks). With shuffle, the blocks are
+    permuted per epoch, and samples of each rank pass through a shuffle buffer. Each rank (torch.distributed) gets a contiguous part of the blocks, with the same number of samples, padded with
+    samples of other ranks as DistributedSampler does. DataLoader workers of a rank read batch_size consecutive samples of the rank in turns, so that the DataLoader yields the samples of the
+    rank in a deterministic order, independent of the number of workers.
+
+    The order only depends on seed, epoch and the number of ranks. Training is resumed from a checkpoint {'epoch': epoch, 'offset': number of samples of the rank consumed in the epoch}, see
+    load_state_dict.
+    """
+
+    def __init__(self, manifest_dataset: BaseDataset, transform=None, shuffle=False, seed=0, block_size=256, shuffle_buffer_size=1024, batch_size=1, rank=None, world_size=None):
+        """
+        Args:
+            manifest_dataset (BaseDataset): dataset to stream, usually a VisionDataset
+            transform: transform of (image, target) or of image
+            shuffle (bool): whether to shuffle blocks and samples, per epoch
+            seed (int): random seed, the same on all ranks
+            block_size (int): number of consecutive samples kept together when shuffling blocks
+            shuffle_buffer_size (int): number of samples of the shuffle buffer of a rank
+            batch_size (int): batch size of the DataLoader, number of consecutive samples read by a worker in its turn
+            rank (int): rank of this process, from torch.distributed if None
+            world_size (int): number of ranks, from torch.distributed if None
+        """
+
+        if block_size < 1 or shuffle_buffer_size < 1 or batch_size < 1:
+            raise ValueError('block_size, shuffle_buffer_size and batch_size must be equal or greater than 1.')
+
+        Dataset.__init__(self, transform)
+        self.dataset = manifest_dataset
+        self.shuffle = shuffle
+        self.seed = seed
+        self.block_size = block_size
+        self.shuffle_buffer_size = shuffle_buffer_size
+        self.batch_size = batch_size
+
+        dist_rank, dist_world_size = _distributed_rank_and_world_size()
+        self.rank = dist_rank if rank is None else rank
+        self.world_size = dist_world_size if world_size is None else world_size
+        if not 0 <= self.rank < self.world_size:
+            raise ValueError(f'rank must be within [0, {self.world_size}), got {self.rank}.')
+
+        self.epoch = 0
+        self.offset = 0
+        self._blocks = None
+
+    @property
+    def categories(self):
+        return self.dataset.categories
+
+    @property
+    def dataset_resources(self):
+        return self.dataset.dataset_resources
+
+    @property
+    def dataset_info(self):
+        return self.dataset.dataset_info
+
+    @property
+    def num_samples_per_rank(self):
+        return math.ceil(len(self.dataset) / self.world_size)
+
+    def set_epoch(self, epoch: int, offset: int = 0):
+        """
+        Set the epoch of the next iteration, and the number of samples of the rank to skip in it, e.g., consumed before a checkpoint. The epoch is also set on the streamed dataset, for
+        datasets whose samples depend on it, e.g., DetectionAsClassificationByCroppingDataset
+        """
+
+        if not 0 <= offset <= self.num_samples_per_rank:
+            raise ValueError(f'offset must be within [0, {self.num_samples_per_rank}], got {offset}.')
+
+        self.epoch = epoch
+        self.offset = offset
+        if hasattr(self.dataset, 'set_epoch'):
+            self.dataset.set_epoch(epoch)
+
+    def state_dict(self) -> dict:
+        return {'epoch': self.epoch, 'offset': self.offset}
+
+    def load_state_dict(self, state_dict: dict):
+        self.set_epoch(state_dict['epoch'], state_dict.get('offset', 0))
+
+    def rank_indices(self) -> typing.List[int]:
+        """
+        Indices of the samples of this rank in the current epoch, in the order they are yielded by a DataLoader, before skipping offset
+        """
+
+        if self._blocks is None:
+            self._blocks = locality_blocks(self.dataset, self.block_size)
+
+        blocks = list(self._blocks)
+        if self.shuffle:
+            random.Random(f'{self.seed}-{self.epoch}').shuffle(blocks)
+        order = [index for block in blocks for index in block]
+
+        n_per_rank = self.num_samples_per_rank
+        if len(order) < n_per_rank * self.world_size:
+            # pad by wrapping around, as DistributedSampler does
+            order += (order * math.ceil(n_per_rank * self.world_size / max(len(order), 1)))[:n_per_rank * self.world_size - len(order)]
+        indices = order[self.rank * n_per_rank:(self.rank + 1) * n_per_rank]
+
+        if self.shuffle:
+            indices = list(self._buffer_shuffle(indices, random.Random(f'{self.seed}-{self.epoch}-{self.rank}')))
+
+        return indices
+
+    def __len__(self):
+        return self.num_samples_per_rank - self.offset
+
+    def __iter__(self):
+        indices = self.rank_indices()[self.offset:]
+        worker_info = torch.utils.data.get_worker_info()
+        worker_id, num_workers = (0, 1) if worker_info is None else (worker_info.id, worker_info.num_workers)
+        for position, index in enumerate(indices):
+            if (position // self.batch_size) % num_workers != worker_id:
+                continue
+
+            image, target, idx_str = self.dataset[index]
+            image, target = self._timed_transform(image, target)
+            yield image, target, idx_str
+
+    def close(self):
+        self.dataset.close()
+
+    def _buffer_shuffle(self, indices: typing.Iterable[int], rnd: random.Random):
+        # once the buffer is full, each sample of the stream replaces a random sample of the buffer, which is yielded
+        buffer = []
+        for index in indices:
+            if len(buffer) < self.shuffle_buffer_size:
+                buffer.append(index)
+                continue
+
+            i = rnd.randrange(len(buffer))
+            yield buffer[i]
+            buffer[i] = index
+
+        rnd.shuffle(buffer)
+        yield from buffer
@@ -0,0 +1,88 @@
+import logging
+import os
+import typing
+import zipfile
+
+from ..common.dataset.base_dataset import BaseDataset
+from ..common.utils import can_be_url
+
+logger = logging.getLogger(__name__)
+
+
+def _is_zip_entry(path: str):
+    return '@' in path and not can_be_url(path)
+
+
+def split_image_path(path: str) -> typing.Tuple[str, str]:
+    """
+    Split an image path readable by FileReader into (container, name in the container): the zip file of <zip_filename>@<entry_name> paths, otherwise the folder of the file or url
+    """
+
+    path = str(path)
+    if _is_zip_entry(path):
+        return tuple(path.split('@', 1))
+
+    container, _, name = path.replace('\\', '/').rpartition('/')
+    return container, name
+
+
+def locality_keys(dataset: BaseDataset) -> typing.List[tuple]:
+    """
+    Key of each sample of the dataset, (container, position of the image in the container), so that sorting samples by keys reads each container sequentially. Positions in local zip files
+    are the offsets of the entries, other positions are the names of the files. Samples without a raw image path (see BaseDataset.get_raw_image_path) keep their index order, ahead of the others.
+    """
+
+    keys = []
+    entry_offsets = {}
+    for index in range(len(dataset)):
+        path = dataset.get_raw_image_path(index)
+        if not path:
+            keys.append(('', 0, index))
+            continue
+
+        container, name = split_image_path(path)
+        if _is_zip_entry(str(path)):
+            if container not in entry_offsets:
+                entry_offsets[container] = _zip_entry_offsets(container)
+            keys.append((container, entry_offsets[container].get(name, 0), name))
+        else:
+            keys.append((container, 0, name))
+
+    return keys
+
+
+def locality_order(dataset: BaseDataset) -> typing.List[int]:
+    """
+    Indices of the samples sorted by locality_keys
+    """
+
+    keys = locality_keys(dataset)
+    return sorted(range(len(keys)), key=keys.__getitem__)
+
+
+def locality_blocks(dataset: BaseDataset, block_size: int) -> typing.List[typing.List[int]]:
+    """
+    Indices of the samples sorted by locality_keys, in blocks of at most block_size consecutive samples of the same container
+    """
+
+    keys = locality_keys(dataset)
+    blocks = []
+    for index in sorted(range(len(keys)), key=keys.__getitem__):
+        if not blocks or len(blocks[-1]) == block_size or keys[blocks[-1][0]][0] != keys[index][0]:
+            blocks.append([])
+        blocks[-1].append(index)
+
+    return blocks
+
+
+def _zip_entry_offsets(zip_path: str) -> typing.Dict[str, int]:
+    # only the central directory is read
+    if not os.path.isfile(zip_path):
+        return {}
+
+    try:
+        with zipfile.ZipFile(zip_path) as zf:
+            return {info.filename: info.header_offset for info in zf.infolist()}
+    except zipfile.BadZipFile:
+        logger.warning(f'Failed to read entries of {zip_path}, its images are ordered by name.')
+        return {}
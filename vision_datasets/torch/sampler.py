@@ -0,0 +1,200 @@
+import logging
+import math
+import random
+import typing
+
+import numpy as np
+import torch
+
+from .iterable_dataset import _distributed_rank_and_world_size
+from .locality import locality_blocks
+
+logger = logging.getLogger(__name__)
+
+
+class LocalityAwareDistributedSampler(torch.utils.data.Sampler):
+    """
+    Sampler with the semantics of torch.utils.data.DistributedSampler (num_replicas, rank, shuffle, seed, drop_last, set_epoch), that reads images of the same container (zip file, shard or
+    folder) together.
+
+    Samples are grouped in blocks of at most block_size consecutive samples of a container, ordered by position in it, see locality.locality_blocks. With shuffle, the order of the blocks and the
+    order of the samples in each block are shuffled, seeded by seed and epoch. Each replica gets a contiguous part of the blocks, so that it reads few containers at a time, sequentially.
+    """
+
+    def __init__(self, dataset, num_replicas: int = None, rank: int = None, shuffle: bool = True, seed: int = 0, drop_last: bool = False, block_size: int = 64):
+        """
+        Args:
+            dataset: dataset to sample, providing get_raw_image_path, e.g., VisionDataset or TorchDataset
+            num_replicas (int): number of replicas, from torch.distributed if None
+            rank (int): rank of this replica, from torch.distributed if None
+            shuffle (bool): whether to shuffle blocks and samples in blocks
+            seed (int): random seed, the same on all replicas
+            drop_last (bool): whether to drop the tail of the samples to split them evenly among replicas, instead of padding them
+            block_size (int): max number of samples of a block
+        """
+
+        if block_size < 1:
+            raise ValueError('block_size must be equal or greater than 1.')
+
+        dist_rank, dist_world_size = _distributed_rank_and_world_size()
+        self.num_replicas = dist_world_size if num_replicas is None else num_replicas
+        self.rank = dist_rank if rank is None else rank
+        if not 0 <= self.rank < self.num_replicas:
+            raise ValueError(f'rank must be within [0, {self.num_replicas}), got {self.rank}.')
+
+        self.dataset = dataset
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.block_size = block_size
+        self.epoch = 0
+
+        if self.drop_last and len(dataset) % self.num_replicas:
+            self.num_samples = math.ceil((len(dataset) - self.num_replicas) / self.num_replicas)
+        else:
+            self.num_samples = math.ceil(len(dataset) / self.num_replicas)
+        self.total_size = self.num_samples * self.num_replicas
+        self._blocks = None
+
+    # whether to shuffle the samples in each block too, with shuffle
+    _shuffle_in_blocks = True
+
+    def _create_blocks(self) -> typing.List[typing.List[int]]:
+        return locality_blocks(self.dataset, self.block_size)
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+        # for datasets whose samples depend on the epoch, e.g., DetectionAsClassificationByCroppingDataset
+        if hasattr(self.dataset, 'set_epoch'):
+            self.dataset.set_epoch(epoch)
+
+    def __len__(self):
+        return self.num_samples
+
+    def __iter__(self) -> typing.Iterator[int]:
+        if self._blocks is None:
+            self._blocks = self._create_blocks()
+
+        blocks = [list(block) for block in self._blocks]
+        if self.shuffle:
+            rnd = random.Random(f'{self.seed}-{self.epoch}')
+            rnd.shuffle(blocks)
+            if self._shuffle_in_blocks:
+                for block in blocks:
+                    rnd.shuffle(block)
+
+        indices = [index for block in blocks for index in block]
+        if len(indices) < self.total_size:
+            indices += (indices * math.ceil(self.total_size / max(len(indices), 1)))[:self.total_size - len(indices)]
+        else:
+            indices = indices[:self.total_size]
+
+        return iter(indices[self.rank * self.num_samples:(self.rank + 1) * self.num_samples])
+
+
+class ImageReuseDistributedSampler(LocalityAwareDistributedSampler):
+    """
+    Sampler with the semantics of torch.utils.data.DistributedSampler, that reads the annotations sharing images together, for the image cache of multi-image datasets to serve them, see
+    VisionDataset.image_cache_size.
+
+    Samples are split into blocks of at most block_size consecutive samples in the order of VisionDataset.image_reuse_order. With shuffle, the order of the blocks is shuffled, seeded by seed and
+    epoch, while the samples of each block stay in order. Each replica gets a contiguous part of the blocks.
+    """
+
+    _shuffle_in_blocks = False
+
+    def _create_blocks(self) -> typing.List[typing.List[int]]:
+        order = self.dataset.image_reuse_order()
+        return [order[i:i + self.block_size] for i in range(0, len(order), self.block_size)]
+
+
+class AspectRatioBucketBatchSampler(torch.utils.data.Sampler):
+    """
+    Batch sampler yielding batches of images of similar aspect ratios, to reduce padding and resizing of batches of images of various resolutions.
+
+    Images are split into num_buckets buckets of about the same number of images by their log aspect ratio log(width / height). Widths and heights are read from the manifest, or from the image
+    headers if missing there, see VisionDataset.get_image_size. Each batch contains images of one bucket.
+
+    In distributed training, batches are dealt to replicas in turns, each replica getting the same number of batches: batches are repeated from the start to fill the last turn, or the last
+    incomplete turn is dropped with drop_last. The order is seeded by seed and epoch, the same on all replicas.
+    """
+
+    def __init__(self, dataset, batch_size: int, num_buckets: int = 2, shuffle: bool = True, seed: int = 0, drop_last: bool = False, num_replicas: int = None, rank: int = None):
+        """
+        Args:
+            dataset: dataset to sample, providing get_image_size, e.g., VisionDataset or TorchDataset
+            batch_size (int): number of samples of a batch, per replica
+            num_buckets (int): number of aspect ratio buckets
+            shuffle (bool): whether to shuffle samples in buckets and the order of batches
+            seed (int): random seed, the same on all replicas
+            drop_last (bool): whether to drop incomplete batches of each bucket and the last incomplete turn of batches of replicas
+            num_replicas (int): number of replicas, from torch.distributed if None
+            rank (int): rank of this replica, from torch.distributed if None
+        """
+
+        if batch_size < 1 or num_buckets < 1:
+            raise ValueError('batch_size and num_buckets must be equal or greater than 1.')
+
+        dist_rank, dist_world_size = _distributed_rank_and_world_size()
+        self.num_replicas = dist_world_size if num_replicas is None else num_replicas
+        self.rank = dist_rank if rank is None else rank
+        if not 0 <= self.rank < self.num_replicas:
+            raise ValueError(f'rank must be within [0, {self.num_replicas}), got {self.rank}.')
+
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.num_buckets = num_buckets
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.epoch = 0
+        self.buckets = self._create_buckets()
+
+    def _create_buckets(self) -> typing.List[typing.List[int]]:
+        sizes = np.array([self.dataset.get_image_size(index) for index in range(len(self.dataset))], dtype=np.float64).reshape(-1, 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_ratios = np.log(sizes[:, 0] / sizes[:, 1])
+        log_ratios[~np.isfinite(log_ratios)] = 0
+
+        # inner boundaries at the quantiles, so that buckets have about the same number of images
+        boundaries = np.quantile(log_ratios, np.arange(1, self.num_buckets) / self.num_buckets) if len(log_ratios) else []
+        bucket_ids = np.searchsorted(boundaries, log_ratios, side='right')
+        buckets = [np.flatnonzero(bucket_ids == bucket_id).tolist() for bucket_id in range(self.num_buckets)]
+        logger.debug(f'Sizes of aspect ratio buckets: {[len(x) for x in buckets]}')
+
+        return buckets
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+        # for datasets whose samples depend on the epoch, e.g., DetectionAsClassificationByCroppingDataset
+        if hasattr(self.dataset, 'set_epoch'):
+            self.dataset.set_epoch(epoch)
+
+    def _num_batches(self) -> int:
+        if self.drop_last:
+            return sum(len(bucket) // self.batch_size for bucket in self.buckets)
+
+        return sum(math.ceil(len(bucket) / self.batch_size) for bucket in self.buckets)
+
+    def __len__(self):
+        n_batches = self._num_batches()
+        return n_batches // self.num_replicas if self.drop_last else math.ceil(n_batches / self.num_replicas)
+
+    def __iter__(self) -> typing.Iterator[typing.List[int]]:
+        rnd = random.Random(f'{self.seed}-{self.epoch}')
+        batches = []
+        for bucket in self.buckets:
+            bucket = list(bucket)
+            if self.shuffle:
+                rnd.shuffle(bucket)
+            n_batches = len(bucket) // self.batch_size if self.drop_last else math.ceil(len(bucket) / self.batch_size)
+            batches += [bucket[i * self.batch_size:(i + 1) * self.batch_size] for i in range(n_batches)]
+
+        if self.shuffle:
+            rnd.shuffle(batches)
+
+        total_size = len(self) * self.num_replicas
+        if len(batches) < total_size:
+            batches += (batches * math.ceil(total_size / max(len(batches), 1)))[:total_size - len(batches)]
+
+        return iter(batches[self.rank:total_size:self.num_replicas])
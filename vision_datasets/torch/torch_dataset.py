@@ -30,10 +30,30 @@ class TorchDataset(Dataset):
     def __getitem__(self, index):
         if isinstance(index, int):
             image, target, idx_str = self.dataset[index]
-            image, target = self.transform(image, target)
+            image, target = self._timed_transform(image, target)
             return image, target, idx_str
         else:
-            return [self.transform(img, target) + (idx,) for img, target, idx in self.dataset[index]]
+            return [self._timed_transform(img, target) + (idx,) for img, target, idx in self.dataset[index]]
+
+    def get_image_size(self, index):
+        return self.dataset.get_image_size(index)
+
+    def get_raw_image_path(self, index):
+        return self.dataset.get_raw_image_path(index)
+
+    def set_epoch(self, epoch: int):
+        """
+        Set the epoch of the wrapped dataset, for datasets whose samples depend on it, e.g., DetectionAsClassificationByCroppingDataset
+        """
+
+        if hasattr(self.dataset, 'set_epoch'):
+            self.dataset.set_epoch(epoch)
+
+    def image_reuse_order(self):
+        return self.dataset.image_reuse_order()
+
+    def start_fetch_warmer(self, order=None):
+        self.dataset.start_fetch_warmer(order)
 
     def __len__(self):
         return len(self.dataset)
@@ -1,18 +1,17 @@
-from copy import deepcopy
 import logging
 from typing import Any, Dict
 
-from vision_datasets.common import DatasetTypes, KeyValuePairDatasetInfo, VisionDataset
+from vision_datasets.common import DatasetTypes, VisionDataset
 from vision_datasets.key_value_pair import (
-    KeyValuePairDatasetManifest,
     KeyValuePairLabelManifest,
+    VisionAsKeyValuePairDatasetBase,
 )
 
 logger = logging.getLogger(__name__)
 
 
-class VQAAsKeyValuePairDataset(VisionDataset):
-    """Dataset class that access Visual Question Answering (VQA) datset as KeyValuePair dataset."""
+class VQAAsKeyValuePairDataset(VisionAsKeyValuePairDatasetBase):
+    """Dataset class that access Visual Question Answering (VQA) datset as KeyValuePair dataset, one annotation per question, see VisionAsKeyValuePairDatasetBase."""
 
     ANSWER_KEY = "answer"
     RATIONALE_KEY = "rationale"
@@ -28,37 +27,16 @@ class VQAAsKeyValuePairDataset(VisionDataset):
         if vqa_dataset is None or vqa_dataset.dataset_info.type is not DatasetTypes.VISUAL_QUESTION_ANSWERING:
             raise ValueError("Input dataset must be a Visual Question Answering dataset.")
 
-        # Generate schema and update dataset info
-        vqa_dataset = deepcopy(vqa_dataset)
+        super().__init__(vqa_dataset, None)
 
-        dataset_info_dict = deepcopy(vqa_dataset.dataset_info.__dict__)
-        dataset_info_dict["type"] = DatasetTypes.KEY_VALUE_PAIR.name.lower()
+    def _create_schema(self) -> Dict[str, Any]:
+        return self._schema
 
-        schema = self._schema
-        # Update dataset_info with schema
-        dataset_info = KeyValuePairDatasetInfo({**dataset_info_dict, "schema": schema})
+    def _n_annotations(self, image):
+        return len(image.labels)
 
-        dataset_manifest = vqa_dataset.dataset_manifest
-        self.img_id_to_pos = {x.id: i for i, x in enumerate(dataset_manifest.images)}
-
-        # Construct KeyValuePairDatasetManifest
-        annotations = []
-        id = 1
-        for _, img in enumerate(dataset_manifest.images, 1):
-            label_data = [label.label_data for label in img.labels]
-
-            for label in label_data:
-                kvp_label_data = self.construct_kvp_label_data(label)
-                img_ids = [self.img_id_to_pos[img.id]]  # 0-based index
-                kvp_annotation = KeyValuePairLabelManifest(id, img_ids, label_data=kvp_label_data)
-                id += 1
-
-                # KVPDatasetManifest expects img.labels to be empty. Labels are instead stored in KVP annotation
-                img.labels = []
-                annotations.append(kvp_annotation)
-
-        dataset_manifest = KeyValuePairDatasetManifest(deepcopy(dataset_manifest.images), annotations, schema, additional_info=deepcopy(vqa_dataset.dataset_manifest.additional_info))
-        super().__init__(dataset_info, dataset_manifest, dataset_resources=vqa_dataset.dataset_resources)
+    def _construct_annotation_label_data(self, image, local_idx):
+        return self.construct_kvp_label_data(image.labels[local_idx].label_data)
 
     @property
     def _schema(self) -> Dict[str, Any]: